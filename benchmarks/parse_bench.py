@@ -0,0 +1,170 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from consts import ProviderName
+from models.story_info import StoryRef
+from providers import PROVIDER_MAP
+from providers.base import BaseProvider
+from providers.parsing import resolve_parser
+from utils.config import get_config, load_config_project
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+DEFAULT_ITERATIONS = 50
+DEFAULT_WARMUP = 3
+FIXTURE_STORY_ID = "fixture"
+
+
+def _html_provider(source: str, fixture: str) -> Callable[[], BaseProvider]:
+    html = (FIXTURES_DIR / fixture).read_text(encoding="utf-8")
+
+    def make() -> BaseProvider:
+        provider = PROVIDER_MAP[source]()
+        provider.fetch_html = lambda story: html
+        return provider
+
+    return make
+
+
+def _metruyenchu_provider() -> BaseProvider:
+    book = (FIXTURES_DIR / "metruyenchu_book.json").read_text(encoding="utf-8")
+    chapters = (FIXTURES_DIR / "metruyenchu_chapters.json").read_text(encoding="utf-8")
+    provider = PROVIDER_MAP[ProviderName.METRUYENCHU.value]()
+    # The JSON decoding of `res.json()` is part of the extraction cost, so it stays inside the timed call.
+    provider.fetch_book = lambda story: json.loads(book)["data"]
+    provider.fetch_api = lambda story: json.loads(chapters)
+    return provider
+
+
+# One recorded page (or API exchange) per provider in `PROVIDER_MAP`.
+FIXTURE_PROVIDERS: Dict[str, Callable[[], BaseProvider]] = {
+    ProviderName.TRUYENQQTO.value: _html_provider(ProviderName.TRUYENQQTO.value, "truyenqqto.html"),
+    ProviderName.NETTRUYEN.value: _html_provider(ProviderName.NETTRUYEN.value, "nettruyen.html"),
+    ProviderName.GOCTRUYENTRANHVUI.value: _html_provider(ProviderName.GOCTRUYENTRANHVUI.value, "goctruyentranhvui.html"),
+    ProviderName.METRUYENCHU.value: _metruyenchu_provider,
+}
+
+
+def _percentile(samples: List[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def bench_provider(make_provider: Callable[[], BaseProvider], iterations: int, warmup: int = DEFAULT_WARMUP) -> dict:
+    """
+        Times `get_story_info` on a recorded page, without any network access.
+
+        The provider is shared and every call gets a fresh `StoryRef`, like the stories of a run. Peak memory is measured in a separate
+        call under `tracemalloc`, so the tracing overhead does not leak into the timings.
+
+        Args:
+            make_provider (Callable[[], BaseProvider]): Builds a provider serving the fixture.
+            iterations (int): Timed calls.
+            warmup (int): Untimed calls made first (imports, selector compilation, caches).
+
+        Returns:
+            dict: `iterations`, `mean_ms`, `p95_ms`, `min_ms` and `peak_kib`, plus the extracted `chapter`.
+    """
+    provider = make_provider()
+    for _ in range(warmup):
+        provider.get_story_info(StoryRef(FIXTURE_STORY_ID))
+
+    samples = []
+    info = None
+    for _ in range(iterations):
+        story = StoryRef(FIXTURE_STORY_ID)
+        started = time.perf_counter()
+        info = provider.get_story_info(story)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        provider.get_story_info(StoryRef(FIXTURE_STORY_ID))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "min_ms": round(min(samples), 3),
+        "peak_kib": round(peak / 1024, 1),
+        "chapter": info.latest_chapter if info else None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(iterations: int = DEFAULT_ITERATIONS, providers: List[str] | None = None,
+        warmup: int = DEFAULT_WARMUP) -> dict:
+    """
+        Benchmarks every fixture provider (or the given ones) and returns a JSON-serializable report.
+    """
+    load_config_project()
+    results = {}
+    for source in providers or FIXTURE_PROVIDERS:
+        results[source] = bench_provider(FIXTURE_PROVIDERS[source], iterations, warmup)
+        if PROVIDER_MAP[source].selectors:
+            results[source]["parser"] = resolve_parser(get_config(f"provider.{source}.parser", "auto"))
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """
+        Describes the change of each provider's mean, p95 and peak memory against an earlier report.
+    """
+    lines = []
+    for source, result in report["results"].items():
+        before = baseline.get("results", {}).get(source)
+        if not before:
+            continue
+        deltas = []
+        for key in ("mean_ms", "p95_ms", "peak_kib"):
+            if before.get(key):
+                deltas.append(f"{key} {before[key]} -> {result[key]} ({(result[key] / before[key] - 1) * 100:+.1f}%)")
+        lines.append(f"{source}: " + ", ".join(deltas))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo thời gian parse trang truyện từ fixture, không cần mạng")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--provider", action="append", choices=sorted(FIXTURE_PROVIDERS),
+                        help="chỉ đo provider này (lặp lại được)")
+    parser.add_argument("--output", help="ghi kết quả JSON ra file, ví dụ bench_output.txt")
+    parser.add_argument("--compare", help="file JSON của một lần đo trước để so sánh")
+    args = parser.parse_args()
+
+    report = run(args.iterations, args.provider)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for line in compare(report, baseline):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
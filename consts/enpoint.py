@@ -5,4 +5,11 @@ ENDPOINTS = {
     ProviderName.NETTRUYEN: "https://nettruyen.gg/truyen-tranh",
     ProviderName.METRUYENCHU: "https://backend.metruyencv.com/api/chapters",
     ProviderName.GOCTRUYENTRANHVUI: "https://goctruyentranhvui30.com/truyen"
-}
\ No newline at end of file
+}
+
+METRUYENCHU_BOOK_ENDPOINT = "https://backend.metruyencv.com/api/books"
+
+# Pages listing recently updated stories, newest first.
+LISTING_ENDPOINTS = {
+    ProviderName.TRUYENQQTO: "https://truyenqqko.com/truyen-moi-cap-nhat/trang-{page}"
+}
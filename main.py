@@ -1,9 +1,19 @@
+import argparse
+
 from runner import Runner
+from runner.daemon import Daemon
 
 
 def main():
+    parser = argparse.ArgumentParser(description="NovelNow")
+    parser.add_argument("--daemon", action="store_true", help="chạy liên tục, tự gửi thông báo khi có chap mới")
+    args = parser.parse_args()
+
     runner = Runner()
-    runner.run()
+    if args.daemon:
+        Daemon(runner).serve()
+    else:
+        runner.run()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
 
 class StoryStatus(Enum):
@@ -16,4 +16,15 @@ class StoryInfo:
 
     @classmethod
     def empty(cls):
-        return cls(latest_chapter=0, latest_chapter_date="", status=StoryStatus.UNKNOWN)
\ No newline at end of file
+        return cls(latest_chapter=0, latest_chapter_date="", status=StoryStatus.UNKNOWN)
+
+@dataclass(frozen=True, slots=True)
+class StoryRef:
+    """
+        The story a provider call is about. Providers are shared by every story of a source, so the
+        story ID, the last known chapter and the cached provider data are passed with each call.
+        `meta` is updated in place, so the owner sees what the provider stored.
+    """
+    id: str
+    last_chapter: int = 0
+    meta: dict = field(default_factory=dict)
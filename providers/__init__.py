@@ -1,4 +1,8 @@
+import threading
+from typing import Dict
+
 from consts import ProviderName
+from providers.base import BaseProvider
 from providers.goctruyentranhvui import GocTruyenTranhVuiProvider
 from providers.metruyenchu import MeChuyenChuProvider
 from providers.nettruyen import NetTruyenProvider
@@ -9,4 +13,39 @@ PROVIDER_MAP = {
     ProviderName.TRUYENQQTO.value: TruyenQQTOProvider,
     ProviderName.METRUYENCHU.value: MeChuyenChuProvider,
     ProviderName.GOCTRUYENTRANHVUI.value: GocTruyenTranhVuiProvider
-}
\ No newline at end of file
+}
+
+_providers: Dict[str, BaseProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(source: str) -> BaseProvider:
+    """
+        Returns the provider shared by every story of a source, creating it on first use.
+
+        Args:
+            source (str): The story source, e.g. "truyenqqto".
+
+        Returns:
+            BaseProvider: The provider instance.
+
+        Raises:
+            ValueError: If no provider exists for the source.
+    """
+    with _providers_lock:
+        provider = _providers.get(source)
+        if provider is None:
+            provider_class = PROVIDER_MAP.get(source)
+            if provider_class is None:
+                raise ValueError(f"Provider {source} not found.")
+            provider = provider_class()
+            _providers[source] = provider
+        return provider
+
+
+def reset_providers() -> None:
+    """
+        Drops the shared providers, so the next `get_provider` reads their config again.
+    """
+    with _providers_lock:
+        _providers.clear()
@@ -1,79 +1,280 @@
+import time
+from contextlib import contextmanager
+
 import requests
-from typing import Optional
-from bs4 import BeautifulSoup
+from typing import TYPE_CHECKING, Optional
+from bs4 import BeautifulSoup, SoupStrainer
 from abc import ABC, abstractmethod
 from logger import setup_logger
-from models.story_info import StoryInfo
+from models.story_info import StoryInfo, StoryRef
+from providers import parsing
+from providers.cache import ValidatorCache
+from providers.mirrors import MirrorRegistry, is_mirror_failure
+from providers.http import (
+    DEFAULT_ENCODING,
+    DEFAULT_STREAM_TAIL_BYTES,
+    DEFAULT_TIMEOUT,
+    get_session,
+    read_until,
+    transfer_stats,
+)
+from providers.parsing import PARSER_AUTO
 from utils.config import get_config
+from utils.metrics import phase_metrics
+
+if TYPE_CHECKING:
+    from providers.parse_pool import ParsePool
 
 logger = setup_logger()
 
 class BaseProvider(ABC):
-    @abstractmethod
-    def __init__(self, id: str, last_chapter: int = 0):
+    name: Optional[str] = None
+    validator_cache: Optional[ValidatorCache] = None
+    mirror_registry: Optional[MirrorRegistry] = None
+    # Set by the Runner for runs with enough pages to parse, see `common.parse_pool_min_batch`.
+    parse_pool: Optional["ParsePool"] = None
+    encoding: str = DEFAULT_ENCODING
+    # Substrings marking the blocks a streamed story page must contain before the download stops.
+    stream_markers: tuple[str, ...] = ()
+    # CSS selectors used to extract the story info from the story page.
+    selectors: dict[str, str] = {}
+    # Restricts the parsed tree to the elements the selectors need.
+    parse_only: Optional[SoupStrainer] = None
+
+    def __init__(self):
         """
-            Initializes the BaseProvider instance.
+            Initializes the BaseProvider instance with the `[provider.<name>]` config and shared session.
 
-            Args:
-                id (str): The unique identifier for the provider.
-                last_chapter (int, optional): The last chapter number. Defaults to 0.
+            A provider holds no story state: one instance serves every story of its source (see
+            `providers.get_provider`) and each call gets the story as a `StoryRef`.
         """
-        name = getattr(self, "name", None)
-        if name is not None:
-            self.config = get_config(f"provider.{name}")
+        if self.name is not None:
+            self.config = get_config(f"provider.{self.name}") or {}
         else:
-            self.config = None
-        self.id = id
-        self.last_chapter = last_chapter
+            self.config = {}
+        self.session = get_session(self.name or "default", self.config)
 
     @staticmethod
-    def parse_html(html_content: str) -> BeautifulSoup:
+    def parse_html(html_content: str, parser: Optional[str] = PARSER_AUTO,
+                   parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
         """
             Parses the given HTML content into a BeautifulSoup object.
 
             Args:
                 html_content (str): The HTML content to be parsed.
+                parser (Optional[str]): "auto", "lxml" or "html.parser". Defaults to "auto",
+                    which uses lxml when it is installed.
+                parse_only (Optional[SoupStrainer]): Builds only the matching subtrees.
 
             Returns:
                 BeautifulSoup: A BeautifulSoup object representing the parsed HTML content.
+        """
+        return parsing.parse_html(html_content, parser, parse_only)
 
-            This method uses the 'html.parser' to parse the provided HTML string and
-            returns a BeautifulSoup object for further processing.
+    @contextmanager
+    def parse_story_page(self, html_content: str, story_id: Optional[str] = None):
         """
-        soup = BeautifulSoup(html_content, "html.parser")
-        return soup
+            Parses a story page with the provider's parser backend and `parse_only` strainer.
 
-    @staticmethod
-    def request_get(url: str, **kwargs) -> Optional[requests.Response]:
+            `[provider.<name>]` may set `parser` ("auto", "lxml", "html.parser") and
+            `parse_only = false` to build the full tree. Use as a context manager: the tree
+            is decomposed on exit. The time spent until then is recorded as the `parse` phase.
+
+            Args:
+                html_content (str): The HTML of the story page.
+                story_id (Optional[str]): The story the page belongs to, for the phase metrics.
+
+            Returns:
+                ContextManager[BeautifulSoup]: The parsed (possibly partial) document.
+        """
+        parse_only = self.parse_only if self.config.get("parse_only", True) else None
+        with phase_metrics.timed("parse", self.name, story_id):
+            with parsing.parsed_html(html_content, self.config.get("parser", PARSER_AUTO), parse_only) as soup:
+                yield soup
+
+    def mirror_url(self, url: str) -> str:
+        """
+            Moves a URL of the provider to its fastest healthy mirror, see `[provider.<name>] mirrors`.
+
+            Args:
+                url (str): A URL on the provider's default endpoint (or one of its mirrors).
+
+            Returns:
+                str: The URL on the mirror requests currently go to.
+        """
+        if self.mirror_registry is None or self.name is None:
+            return url
+        return self.mirror_registry.route(self.name, url)
+
+    def parse_story_info(self, html_content: str, story: StoryRef) -> StoryInfo:
+        """
+            Turns a downloaded story page into its `StoryInfo`: in the parse pool when the Runner set
+            one up, in this thread otherwise.
+
+            Args:
+                html_content (str): The HTML of the story page.
+                story (StoryRef): The story the page belongs to.
+
+            Returns:
+                StoryInfo: The result of `extract_story_info`.
+        """
+        pool = self.parse_pool
+        if pool is not None:
+            with phase_metrics.timed("parse", self.name, story.id):
+                return pool.parse(self, html_content, story)
+        with self.parse_story_page(html_content, story.id) as soup:
+            return self.extract_story_info(soup, story)
+
+    @abstractmethod
+    def extract_story_info(self, soup: BeautifulSoup, story: StoryRef) -> StoryInfo:
+        """
+            Extracts the story info from a parsed story page.
+
+            Abstract, so a provider that forgets it fails when it is created rather than mid-fetch.
+            Providers without a story page (e.g. JSON APIs) override it to say so.
+
+            Args:
+                soup (BeautifulSoup): The story page, parsed with `parse_only` applied.
+                story (StoryRef): The story the page belongs to.
+
+            Returns:
+                StoryInfo: The story info read from the page.
+        """
+        pass
+
+    def request_get(self, url: str, conditional: bool = False, story_id: Optional[str] = None,
+                    **kwargs) -> Optional[requests.Response]:
         """
             Sends a GET request to the specified URL.
 
             Args:
                 url (str): The URL to send the GET request to.
-                **kwargs: Additional keyword arguments to be passed to the requests.get() method.
+                conditional (bool, optional): Send `If-None-Match` / `If-Modified-Since` from the
+                    validator cache. A 304 response is then returned as is. Defaults to False.
+                story_id (Optional[str]): The story the request is made for, for the phase metrics.
+                **kwargs: Additional keyword arguments to be passed to the session's get() method.
 
             Returns:
-                Optional[requests.Response]: The response object if the request is successful, None otherwise.
+                Optional[requests.Response]: The response object if the request is successful, None if the
+                    page could not be fetched (e.g. a 404).
+
+            Raises:
+                requests.RequestException: When the host itself failed (no connection, timeout, 5xx) and
+                    no other mirror is left.
+
+            The request goes through the provider's shared keep-alive session, which retries
+            connection resets and 5xx responses. When no timeout is given, `timeout` from
+            `[provider.<name>]` is used. The request goes to the current mirror; when the mirror cannot
+            be reached (or answers 5xx) it is marked unhealthy and the request moves to the next one.
+            Validators stay keyed by `url`, whichever mirror answered. Exceptions are logged; only host
+            failures are raised, so a missing story page never counts against its host.
+        """
+        kwargs.setdefault("timeout", self.config.get("timeout", DEFAULT_TIMEOUT))
+        cache = self.validator_cache if conditional and self.config.get("conditional_requests", True) else None
+        if cache is not None:
+            kwargs["headers"] = {**cache.conditional_headers(url), **(kwargs.get("headers") or {})}
 
-            This method handles exceptions that may occur during the GET request and
-            prints an error message if the request fails.
+        name = self.name
+        registry = self.mirror_registry if name is not None else None
+        target = self.mirror_url(url)
+        while True:
+            res = None
+            try:
+                started = time.perf_counter()
+                res = self.session.get(target, **kwargs)
+                ttfb_ms = res.elapsed.total_seconds() * 1000
+                phase_metrics.record("ttfb", ttfb_ms, name, story_id)
+                if not kwargs.get("stream"):
+                    download_ms = max((time.perf_counter() - started) * 1000 - ttfb_ms, 0)
+                    phase_metrics.record("download", download_ms, name, story_id)
+                res.raise_for_status()
+                if registry is not None:
+                    registry.record_success(name, target, ttfb_ms)
+                if cache is not None:
+                    content_length = int(res.headers.get("Content-Length") or 0) if kwargs.get("stream") else None
+                    cache.record_response(url, res, content_length)
+                if res.status_code == 304:
+                    res.close()
+                return res
+            except requests.RequestException as e:
+                if res is not None:
+                    # A streamed error response would otherwise keep its connection checked out.
+                    res.close()
+                logger.error(f"GET {target} failed: {e}")
+                host_failure = is_mirror_failure(e)
+                target = registry.failover(name, target) if registry is not None and host_failure else None
+                if target is None:
+                    if host_failure:
+                        raise
+                    return None
+
+    @property
+    def stream_enabled(self) -> bool:
+        """
+            Whether story pages are downloaded with an early-terminating streamed read.
+        """
+        return bool(self.stream_markers) and self.config.get("stream", False)
+
+    def read_text(self, res: requests.Response, story_id: Optional[str] = None) -> str:
         """
-        try:
-            res = requests.get(url, **kwargs)
-            res.raise_for_status()
-            return res
-        except requests.RequestException as e:
-            logger.error(f"GET {url} failed: {e}")
-            return None
+            Decodes the body of a story page response with the provider's known encoding.
+
+            Streamed responses are read only until `stream_markers` have been seen (see
+            `providers.http.read_until`); others are decoded in full. Bytes read and bytes
+            skipped are recorded in `transfer_stats` under the provider name.
+
+            Args:
+                res (requests.Response): The story page response.
+                story_id (Optional[str]): The story the page belongs to, for the phase metrics.
+
+            Returns:
+                str: The decoded (possibly truncated) HTML.
+        """
+        encoding = self.config.get("encoding", self.encoding)
+        name = self.name or "default"
+        if not self.stream_enabled:
+            res.encoding = encoding
+            transfer_stats.record(name, len(res.content))
+            return res.text
+
+        tail_bytes = self.config.get("stream_tail_bytes", DEFAULT_STREAM_TAIL_BYTES)
+        with phase_metrics.timed("download", name, story_id):
+            text, bytes_read, early_stop = read_until(res, self.stream_markers, encoding, tail_bytes)
+        content_length = int(res.headers.get("Content-Length") or 0)
+        bytes_saved = max(content_length - bytes_read, 0) if early_stop else 0
+        transfer_stats.record(name, bytes_read, bytes_saved, early_stop)
+        return text
+
+    def get_story_url(self, story: StoryRef) -> Optional[str]:
+        """
+            Returns the URL of the story page, used as the validator cache key.
+
+            Args:
+                story (StoryRef): The story.
+
+            Returns:
+                Optional[str]: The story page URL, or None if the provider has no single page.
+        """
+        return None
+
+    def discard_validators(self, story: StoryRef) -> None:
+        """
+            Drops the cached validators of the story page so the next fetch downloads it in full.
+        """
+        if self.validator_cache is not None:
+            self.validator_cache.discard(self.get_story_url(story))
 
     @abstractmethod
-    def get_story_info(self) -> StoryInfo:
+    def get_story_info(self, story: StoryRef) -> StoryInfo:
         """
             Abstract method to retrieve the latest chapter information.
 
             This method must be implemented by subclasses of `BaseProvider`.
             It is expected to return the latest chapter number and its release date.
 
+            Args:
+                story (StoryRef): The story to check.
+
             Returns:
                 tuple:
                     - int: The latest chapter number.
@@ -82,7 +283,7 @@ class BaseProvider(ABC):
         pass
 
     @abstractmethod
-    def get_link_chapter(self, chapter: int) -> str:
+    def get_link_chapter(self, story: StoryRef, chapter: int) -> str:
         """
             Abstract method to retrieve the link to a specific chapter.
 
@@ -90,6 +291,7 @@ class BaseProvider(ABC):
             It is expected to return the URL for the specified chapter.
 
             Args:
+                story (StoryRef): The story.
                 chapter (int): The chapter number for which the link is requested.
 
             Returns:
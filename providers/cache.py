@@ -0,0 +1,141 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+# Returned by `fetch_html` when the server answers 304 Not Modified.
+NOT_MODIFIED = object()
+
+
+class ValidatorCache:
+    def __init__(self):
+        """
+            In-memory view of the `http_cache` table, keyed by provider URL.
+
+            Each entry keeps the `ETag` / `Last-Modified` validators of the last full
+            response and its size, so a 304 can be counted as bytes saved. Entries
+            touched during a run are tracked and written back by the Runner.
+        """
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._dirty: set[str] = set()
+        self._deleted: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def reset_stats(self) -> None:
+        """
+            Zeroes the hit/miss/bytes-saved counters, so they cover a single fetch cycle.
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.bytes_saved = 0
+
+    def load(self, rows: Iterable) -> None:
+        with self._lock:
+            for row in rows:
+                self._entries[row["url"]] = {
+                    "etag": row["etag"],
+                    "last_modified": row["last_modified"],
+                    "content_length": row["content_length"] or 0,
+                }
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+            Builds the conditional request headers for a URL.
+
+            Args:
+                url (str): The provider URL.
+
+            Returns:
+                Dict[str, str]: `If-None-Match` / `If-Modified-Since` headers, empty if the URL is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record_response(self, url: str, res: requests.Response, content_length: Optional[int] = None) -> None:
+        """
+            Counts a conditional response as a hit or a miss and refreshes the validators.
+
+            Args:
+                url (str): The provider URL.
+                res (requests.Response): The response of the conditional request.
+                content_length (Optional[int]): Size of the full body. Defaults to the length of
+                    `res.content`; streamed responses must pass it so the body is not read here.
+        """
+        with self._lock:
+            if res.status_code == 304:
+                self.hits += 1
+                entry = self._entries.get(url)
+                if entry:
+                    self.bytes_saved += entry["content_length"]
+                return
+
+            self.misses += 1
+            etag = res.headers.get("ETag")
+            last_modified = res.headers.get("Last-Modified")
+            if not etag and not last_modified:
+                if url in self._entries:
+                    del self._entries[url]
+                    self._dirty.discard(url)
+                    self._deleted.add(url)
+                return
+
+            self._entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_length": len(res.content) if content_length is None else content_length,
+            }
+            self._dirty.add(url)
+            self._deleted.discard(url)
+
+    def discard(self, url: Optional[str]) -> None:
+        """
+            Forgets the validators of a URL, e.g. after its page failed to parse.
+
+            Args:
+                url (Optional[str]): The provider URL.
+        """
+        if not url:
+            return
+        with self._lock:
+            if self._entries.pop(url, None) is not None:
+                self._dirty.discard(url)
+                self._deleted.add(url)
+
+    def pop_changes(self) -> Tuple[List[Tuple], List[str]]:
+        """
+            Returns the rows to upsert and the URLs to delete since the last call.
+
+            Returns:
+                Tuple[List[Tuple], List[str]]: `(url, etag, last_modified, content_length, updated_at)` rows
+                and deleted URLs.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            upserts = [
+                (
+                    url,
+                    self._entries[url]["etag"],
+                    self._entries[url]["last_modified"],
+                    self._entries[url]["content_length"],
+                    now,
+                )
+                for url in self._dirty
+            ]
+            deleted = list(self._deleted)
+            self._dirty.clear()
+            self._deleted.clear()
+        return upserts, deleted
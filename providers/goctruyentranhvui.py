@@ -1,25 +1,41 @@
 from typing import Optional
 
+from bs4 import BeautifulSoup, SoupStrainer
+
 from utils.config import get_config
 from .base import BaseProvider
+from .cache import NOT_MODIFIED
+from .parsing import has_class
 from consts import ProviderName
 from consts.enpoint import ENDPOINTS
 from utils import extract_chapter_number
 from utils.datetime import format_date_chapter
-from models.story_info import StoryInfo, StoryStatus
+from models.story_info import StoryInfo, StoryRef, StoryStatus
 
 class GocTruyenTranhVuiProvider(BaseProvider):
-    def __init__(self, id: str, last_chapter: int = 0):
+    name = ProviderName.GOCTRUYENTRANHVUI.value
+    stream_markers = ("information-section", "list row pa-4")
+    selectors = {
+        "chapter_item": "div.list.row.pa-4 > div:nth-child(1)",
+        "chapter_name": "div.chapter-info span",
+        "chapter_date": "div.text--disabled div.d-flex div",
+        "status": ".information-section.pa-4 > div:nth-child(3) > span",
+    }
+    parse_only = SoupStrainer(class_=has_class("list", "information-section"))
+
+    def get_story_url(self, story: StoryRef) -> str:
         """
-            Initializes the GocTruyenTranhVuiProvider instance.
-            Args:
-                id (str): The unique identifier for the provider.
-                last_chapter (int, optional): The last chapter number. Defaults to 0.
+        Returns the URL of the story page.
+
+        Args:
+            story (StoryRef): The story.
+
+        Returns:
+            str: The story page URL.
         """
-        self.name = ProviderName.GOCTRUYENTRANHVUI.value
-        super().__init__(id, last_chapter)
+        return f"{ENDPOINTS[ProviderName.GOCTRUYENTRANHVUI]}/{story.id}"
 
-    def fetch_html(self) -> Optional[str]:
+    def fetch_html(self, story: StoryRef) -> Optional[str]:
         """
             Abstract method to retrieve the latest chapter information.
 
@@ -32,17 +48,19 @@ class GocTruyenTranhVuiProvider(BaseProvider):
                     - str: The release date of the latest chapter in string format.
         """
 
-        url = f"{ENDPOINTS[ProviderName.GOCTRUYENTRANHVUI]}/{self.id}"
+        url = self.get_story_url(story)
         headers = {
             "User-Agent": self.config['user_agent']
         }
         cookies = {
             "cf_clearance": self.config['cf_clearance']
         }
-        res = super().request_get(url, headers=headers, cookies=cookies)
-        return res.text if res else None
+        res = super().request_get(url, conditional=True, story_id=story.id, stream=self.stream_enabled, headers=headers, cookies=cookies)
+        if res is not None and res.status_code == 304:
+            return NOT_MODIFIED
+        return self.read_text(res, story.id) if res else None
 
-    def get_story_info(self) -> StoryInfo:
+    def get_story_info(self, story: StoryRef) -> StoryInfo:
         """
         Retrieves detailed information about the story, including the latest chapter, its release date, and status.
 
@@ -50,30 +68,43 @@ class GocTruyenTranhVuiProvider(BaseProvider):
         and determines the story's status (e.g., ongoing or completed). If the latest chapter matches the previously
         recorded chapter, an empty `StoryInfo` object is returned.
         """
-        html = self.fetch_html()
-        soup = super().parse_html(html)
-        if soup is None:
+        html = self.fetch_html(story)
+        if html is NOT_MODIFIED:
             return StoryInfo.empty()
 
-        chapter_item = soup.select_one("div.list.row.pa-4 > div:nth-child(1)")
-        latest_chapter = extract_chapter_number(chapter_item.select_one("div.chapter-info span").get_text(strip=True))
-        if latest_chapter == self.last_chapter:
+        return self.parse_story_info(html, story)
+
+    def extract_story_info(self, soup: BeautifulSoup, story: StoryRef) -> StoryInfo:
+        """
+        Extracts the latest chapter, its release date and the story status from a parsed story page.
+
+        Args:
+            soup (BeautifulSoup): The story page, parsed with `parse_only` applied.
+            story (StoryRef): The story, whose `last_chapter` is compared with the page.
+
+        Returns:
+            StoryInfo: The story info, or an empty `StoryInfo` if the latest chapter is already known.
+        """
+        chapter_item = soup.select_one(self.selectors["chapter_item"])
+        latest_chapter = extract_chapter_number(chapter_item.select_one(self.selectors["chapter_name"]).get_text(strip=True))
+        if latest_chapter == story.last_chapter:
             return StoryInfo.empty()
 
-        latest_chapter_date = format_date_chapter(chapter_item.select_one("div.text--disabled div.d-flex div").get_text(strip=True))
-        status_elem = soup.select_one(".information-section.pa-4 > div:nth-child(3) > span")
+        latest_chapter_date = format_date_chapter(chapter_item.select_one(self.selectors["chapter_date"]).get_text(strip=True))
+        status_elem = soup.select_one(self.selectors["status"])
         status_text = status_elem.get_text(strip=True) if status_elem else ""
         status = StoryStatus.COMPLETED if "Hoàn thành" in status_text else StoryStatus.ONGOING
         return StoryInfo(latest_chapter, latest_chapter_date, status)
 
-    def get_link_chapter(self, chapter: int) -> str:
+    def get_link_chapter(self, story: StoryRef, chapter: int) -> str:
         """
         Constructs the URL for a specific chapter of the comic.
 
         Args:
+            story (StoryRef): The story.
             chapter (int): The chapter number for which the URL is to be constructed.
 
         Returns:
             str: The URL for the specified chapter.
         """
-        return f"{ENDPOINTS[ProviderName.GOCTRUYENTRANHVUI]}/{self.id}/chuong-{chapter}"
\ No newline at end of file
+        return self.mirror_url(f"{ENDPOINTS[ProviderName.GOCTRUYENTRANHVUI]}/{story.id}/chuong-{chapter}")
\ No newline at end of file
@@ -0,0 +1,170 @@
+import codecs
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.transport import mount_transport
+
+DEFAULT_TIMEOUT = 20
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_POOL_MAXSIZE = 10
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+DEFAULT_ENCODING = "utf-8"
+STREAM_CHUNK_SIZE = 16 * 1024
+DEFAULT_STREAM_TAIL_BYTES = 16 * 1024
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def build_session(settings: Optional[Dict[str, Any]] = None) -> requests.Session:
+    """
+        Builds a keep-alive session with connection pooling and a retry policy.
+
+        Args:
+            settings (Optional[Dict[str, Any]]): The `[provider.<name>]` config section.
+                Recognised keys: `max_retries`, `backoff_factor`, `pool_maxsize`.
+
+        Returns:
+            requests.Session: A session retrying GET requests on connection resets and 5xx.
+    """
+    settings = settings or {}
+    retry = Retry(
+        total=settings.get("max_retries", DEFAULT_MAX_RETRIES),
+        backoff_factor=settings.get("backoff_factor", DEFAULT_BACKOFF_FACTOR),
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    pool_maxsize = settings.get("pool_maxsize", DEFAULT_POOL_MAXSIZE)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(name: str, settings: Optional[Dict[str, Any]] = None) -> requests.Session:
+    """
+        Returns the shared session of a provider, creating it on first use, behind the
+        `[http] transport` (live, or a record/replay cassette named after the provider).
+
+        Args:
+            name (str): The provider name, e.g. "truyenqqto".
+            settings (Optional[Dict[str, Any]]): The provider config used when the session is created.
+
+        Returns:
+            requests.Session: The session shared by every instance of the provider.
+    """
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = mount_transport(build_session(settings), name)
+            _sessions[name] = session
+        return session
+
+
+def close_sessions() -> None:
+    """
+        Closes every shared provider session and drops their pooled connections.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class TransferStats:
+    def __init__(self):
+        """
+            Counts bytes downloaded and bytes skipped by early-terminated reads, per provider.
+        """
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"requests": 0, "early_stops": 0, "bytes_read": 0, "bytes_saved": 0}
+        )
+
+    def record(self, name: str, bytes_read: int, bytes_saved: int = 0, early_stop: bool = False) -> None:
+        with self._lock:
+            stats = self._stats[name]
+            stats["requests"] += 1
+            stats["bytes_read"] += bytes_read
+            stats["bytes_saved"] += bytes_saved
+            if early_stop:
+                stats["early_stops"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+transfer_stats = TransferStats()
+
+
+def read_until(
+    res: requests.Response,
+    markers: Sequence[str],
+    encoding: str = DEFAULT_ENCODING,
+    tail_bytes: int = DEFAULT_STREAM_TAIL_BYTES,
+) -> Tuple[str, int, bool]:
+    """
+        Reads a streamed response until every marker has been seen, plus a tail.
+
+        The body is decoded incrementally with a fixed encoding, so requests never has
+        to guess the charset. Once all markers are found, `tail_bytes` more bytes are read
+        so the block that follows the last marker is complete, then the response is closed.
+        Closing a response that was not read to the end drops its keep-alive connection, so
+        the next request on the session opens a new one.
+
+        Args:
+            res (requests.Response): A response opened with `stream=True`.
+            markers (Sequence[str]): Substrings that must all appear before stopping.
+            encoding (str, optional): Encoding of the body. Defaults to "utf-8".
+            tail_bytes (int, optional): Bytes to keep reading after the last marker.
+
+        Returns:
+            Tuple[str, int, bool]: The decoded text, the number of bytes read from the wire
+            and whether the download stopped before the end of the body.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = list(markers)
+    overlap = max((len(marker) for marker in markers), default=0)
+    parts = []
+    scanned_tail = ""
+    remaining_tail = None
+    early_stop = False
+
+    try:
+        for chunk in res.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            text = decoder.decode(chunk)
+            parts.append(text)
+
+            if remaining_tail is None:
+                window = scanned_tail + text
+                pending = [marker for marker in pending if marker not in window]
+                scanned_tail = window[-overlap:] if overlap else ""
+                if not pending:
+                    remaining_tail = tail_bytes
+                    continue
+
+            if remaining_tail is not None:
+                remaining_tail -= len(chunk)
+                if remaining_tail <= 0:
+                    early_stop = True
+                    break
+        parts.append(decoder.decode(b"", final=True))
+        bytes_read = res.raw.tell() if res.raw is not None else sum(len(part) for part in parts)
+    finally:
+        res.close()
+
+    return "".join(parts), bytes_read, early_stop
@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Set
+from urllib.parse import urlparse
+
+import requests
+from bs4 import SoupStrainer
+
+from consts import ProviderName
+from consts.enpoint import LISTING_ENDPOINTS
+from logger import setup_logger
+from providers.base import BaseProvider
+from providers.http import DEFAULT_ENCODING, DEFAULT_TIMEOUT, get_session
+from providers.parsing import PARSER_AUTO, has_class, parsed_html
+from utils.config import get_config
+from utils.datetime import parse_update_time
+
+logger = setup_logger()
+
+DEFAULT_LISTING_MAX_PAGES = 10
+
+
+class ListingEntry(NamedTuple):
+    story_id: str
+    updated_at: Optional[datetime]
+
+
+class UpdateListing:
+    name: str = ""
+    # CSS selectors of one entry on the listing page, its story link and its update time.
+    selectors: dict[str, str] = {}
+    parse_only: Optional[SoupStrainer] = None
+
+    def __init__(self):
+        """
+            Initializes the listing reader with the `[provider.<name>]` config and shared session.
+        """
+        self.config = get_config(f"provider.{self.name}") or {}
+        self.session = get_session(self.name, self.config)
+
+    def page_url(self, page: int) -> str:
+        url = LISTING_ENDPOINTS[ProviderName(self.name)].format(page=page)
+        registry = BaseProvider.mirror_registry
+        return registry.route(self.name, url) if registry is not None else url
+
+    @staticmethod
+    def story_id_from_url(url: str) -> str:
+        """
+            Extracts the story ID from a story link, e.g. `/truyen-tranh/blue-box-11258` -> `blue-box-11258`.
+        """
+        path = urlparse(url).path.rstrip("/")
+        slug = path.rsplit("/", 1)[-1]
+        return slug[:-len(".html")] if slug.endswith(".html") else slug
+
+    def fetch_page(self, page: int) -> Optional[str]:
+        # Routed once: after a failover the mirror could change before the error is logged.
+        url = self.page_url(page)
+        try:
+            res = self.session.get(url, timeout=self.config.get("timeout", DEFAULT_TIMEOUT))
+            res.raise_for_status()
+        except requests.RequestException as e:
+            logger.error(f"GET {url} failed: {e}")
+            return None
+        res.encoding = self.config.get("encoding", DEFAULT_ENCODING)
+        return res.text
+
+    def parse_page(self, html: str, now: datetime) -> List[ListingEntry]:
+        """
+            Extracts the entries of a listing page in page order (newest first).
+
+            Args:
+                html (str): The HTML of the listing page.
+                now (datetime): Reference time for relative update times.
+
+            Returns:
+                List[ListingEntry]: One entry per story on the page.
+        """
+        entries = []
+        with parsed_html(html, self.config.get("parser", PARSER_AUTO), self.parse_only) as soup:
+            for item in soup.select(self.selectors["item"]):
+                link = item.select_one(self.selectors["link"])
+                if link is None or not link.get("href"):
+                    continue
+                time_elem = item.select_one(self.selectors["time"])
+                updated_at = parse_update_time(time_elem.get_text(strip=True), now) if time_elem else None
+                entries.append(ListingEntry(self.story_id_from_url(link["href"]), updated_at))
+        return entries
+
+    def collect_updated_ids(self, since: datetime, max_pages: Optional[int] = None) -> Optional[Set[str]]:
+        """
+            Pages back through the listing until it reaches entries older than `since`.
+
+            Args:
+                since (datetime): Time of the previous complete scan.
+                max_pages (Optional[int]): Upper bound on pages to read. Defaults to
+                    `listing_max_pages` from config.
+
+            Returns:
+                Optional[Set[str]]: IDs of the stories updated since `since`, or None if the scan
+                could not reach `since` (request failure, unknown layout or page limit hit).
+        """
+        max_pages = max_pages or self.config.get("listing_max_pages", DEFAULT_LISTING_MAX_PAGES)
+        now = datetime.now()
+        updated_ids: Set[str] = set()
+
+        for page in range(1, max_pages + 1):
+            html = self.fetch_page(page)
+            if html is None:
+                return None
+
+            entries = self.parse_page(html, now)
+            if not entries:
+                return None
+
+            for entry in entries:
+                if entry.updated_at is not None and entry.updated_at < since:
+                    return updated_ids
+                updated_ids.add(entry.story_id)
+
+        logger.warning(f"⚠️ {self.name}: quét {max_pages} trang vẫn chưa tới lần quét trước, fetch từng truyện.")
+        return None
+
+
+class TruyenQQTOUpdateListing(UpdateListing):
+    name = ProviderName.TRUYENQQTO.value
+    selectors = {
+        "item": "ul.list_grid > li",
+        "link": ".book_name a",
+        "time": ".time-ago",
+    }
+    parse_only = SoupStrainer(class_=has_class("list_grid"))
+
+
+LISTING_MAP = {
+    ProviderName.TRUYENQQTO.value: TruyenQQTOUpdateListing,
+}
@@ -1,64 +1,147 @@
-from typing import Optional
+import requests
+from bs4 import BeautifulSoup
+
 from .base import BaseProvider
 from consts import ProviderName
-from consts.enpoint import ENDPOINTS
-from models.story_info import StoryInfo, StoryStatus
+from consts.enpoint import ENDPOINTS, METRUYENCHU_BOOK_ENDPOINT
+from models.story_info import StoryInfo, StoryRef, StoryStatus
 from utils import extract_chapter_number
 from utils.datetime import iso_to_ddmmyyyy
 
+BOOK_STATUS_COMPLETED = 2
+
+
 class MeChuyenChuProvider(BaseProvider):
-    def __init__(self, id: str, last_chapter: int = 0):
+    name = ProviderName.METRUYENCHU.value
+    @staticmethod
+    def _json(res: requests.Response | None, url: str) -> dict:
+        # request_get reports page errors (e.g. a 404) as None; raising marks the check as failed (backoff).
+        if res is None:
+            raise requests.RequestException(f"GET {url} failed")
+        data = res.json()
+        if not isinstance(data, dict):
+            raise ValueError(f"Unexpected response from {url}")
+        return data
+
+    def fetch_book(self, story: StoryRef) -> dict:
         """
-            Initializes the MeChuyenChuProvider instance.
-            Args:
-                id (str): The unique identifier for the provider.
-                last_chapter (int, optional): The last chapter number. Defaults to 0.
+        Fetches the book metadata, which carries `latest_index` without any chapter records.
+
+        Args:
+            story (StoryRef): The story, its ID is the book ID.
+
+        Returns:
+            dict: The book metadata.
+
+        Raises:
+            requests.RequestException: If the request failed.
+            ValueError: If the response is not the expected JSON object.
+        """
+        url = f"{METRUYENCHU_BOOK_ENDPOINT}/{story.id}"
+        book_info = self._json(super().request_get(url, story_id=story.id), url).get('data')
+        if not isinstance(book_info, dict):
+            raise ValueError(f"Unexpected response from {url}")
+        return book_info
+
+    def fetch_api(self, story: StoryRef) -> dict:
         """
-        self.novel_link = ""
-        self.latest_chapter = 0
-        super().__init__(id, last_chapter)
+        Fetches the newest published chapter of the book.
+
+        The chapter list is requested sorted by descending index with a page size of 1,
+        so only the newest record is transferred.
+
+        Args:
+            story (StoryRef): The story, its ID is the book ID.
+
+        Returns:
+            dict: The API response, `data` chapters and `extra.book`.
 
-    def fetch_api(self) -> Optional[dict]:
+        Raises:
+            requests.RequestException: If the request failed.
+            ValueError: If the response lacks the chapter list or the book.
+        """
         params = {
-            "filter[book_id]": self.id,
-            "filter[type]": "published"
+            "filter[book_id]": story.id,
+            "filter[type]": "published",
+            "sort": "-index",
+            "limit": 1,
         }
 
-        res = super().request_get(ENDPOINTS[ProviderName.METRUYENCHU], params=params)
-        return res.json() if res else None
+        url = ENDPOINTS[ProviderName.METRUYENCHU]
+        data = self._json(super().request_get(url, story_id=story.id, params=params), url)
+        if not isinstance(data.get('data'), list) or not isinstance(data.get('extra'), dict) \
+                or not isinstance(data['extra'].get('book'), dict):
+            raise ValueError(f"Unexpected response from {url}")
+        return data
 
-    def get_story_info(self) -> StoryInfo:
+    @staticmethod
+    def _remember_link(story: StoryRef, book_info: dict):
+        if book_info.get('link'):
+            story.meta['link'] = book_info['link']
+
+    @staticmethod
+    def _newest_chapter(chapters: list) -> dict:
+        # Falls back to the highest index in case the API ignores the sort/limit parameters.
+        return max(chapters, key=lambda chapter: chapter.get('index') or 0)
+
+    def get_story_info(self, story: StoryRef) -> StoryInfo:
         """
         Retrieves detailed information about the story, including the latest chapter, its release date, and status.
 
-        This method fetches the HTML content of the story page, parses it to extract the latest chapter information,
-        and determines the story's status (e.g., ongoing or completed). If the latest chapter matches the previously
-        recorded chapter, an empty `StoryInfo` object is returned.
+        The book metadata is fetched first: if its `latest_index` is the one seen on the last successful check,
+        an empty `StoryInfo` object is returned without touching the chapter list. Otherwise only the newest
+        chapter is fetched to read its number and release date. `latest_index` and the book link are kept in
+        `story.meta`.
+
+        Raises:
+            requests.RequestException: If a request failed.
+            ValueError: If the API answered with an unexpected payload.
         """
-        res = self.fetch_api()
-        if not res or 'extra' not in res or 'book' not in res['extra'] or not res['data']:
+        book_info = self.fetch_book(story)
+        self._remember_link(story, book_info)
+        # `latest_index` numbers the book's chapters, not the chapter names `last_chapter` comes from, so it is
+        # only compared with the index cached by the last read; without one the newest chapter is read once.
+        latest_index = book_info.get('latest_index')
+        if latest_index is not None and latest_index == story.meta.get('latest_index'):
+            return StoryInfo.empty()
+
+        res = self.fetch_api(story)
+        if not res['data']:
             return StoryInfo.empty()
 
         book_info = res['extra']['book']
-        self.novel_link = book_info.get('link', "")
-        self.latest_chapter = book_info.get('latest_index', 0)
-        latest_chapter_info = res['data'][-1]
+        self._remember_link(story, book_info)
+        latest_chapter_info = self._newest_chapter(res['data'])
         latest_chapter = extract_chapter_number(latest_chapter_info.get('name', ""))
-        if latest_chapter == self.last_chapter:
-            return StoryInfo.empty()
+        if latest_chapter == story.last_chapter:
+            story_info = StoryInfo.empty()
+        else:
+            latest_chapter_date = iso_to_ddmmyyyy(latest_chapter_info.get('published_at', ""))
+            status = StoryStatus.COMPLETED if book_info.get('status') == BOOK_STATUS_COMPLETED else StoryStatus.ONGOING
+            story_info = StoryInfo(latest_chapter, latest_chapter_date, status)
 
-        latest_chapter_date = iso_to_ddmmyyyy(latest_chapter_info.get('published_at', ""))
-        status = StoryStatus.COMPLETED if res['extra']['book']['status'] == 2 else StoryStatus.ONGOING
-        return StoryInfo(latest_chapter, latest_chapter_date, status)
+        # Only remembered once the chapter has been read, so a failed check is retried next run.
+        if book_info.get('latest_index') is not None:
+            story.meta['latest_index'] = book_info['latest_index']
+        return story_info
+
+    def extract_story_info(self, soup: BeautifulSoup, story: StoryRef) -> StoryInfo:
+        """
+        Not used: metruyenchu is read from its JSON API, `get_story_info` never parses a story page.
+        """
+        raise NotImplementedError(f"{self.name} has no story page to parse")
 
-    def get_link_chapter(self, chapter: int) -> str:
+    def get_link_chapter(self, story: StoryRef, chapter: int) -> str:
         """
-        Constructs the URL for a specific chapter of the comic.
+        Constructs the URL for a specific chapter of the novel.
 
         Args:
+            story (StoryRef): The story, whose `meta` holds the book link.
             chapter (int): The chapter number for which the URL is to be constructed.
 
         Returns:
-            str: The URL for the specified chapter.
+            str: The URL for the specified chapter, built from the cached book link. Chapter URLs use the
+            book's `latest_index`, which may differ from the number in the chapter name.
         """
-        return f"{self.novel_link}/chuong-{self.latest_chapter}"
\ No newline at end of file
+        chapter_index = story.meta.get('latest_index') or chapter
+        return f"{story.meta.get('link', '')}/chuong-{chapter_index}"
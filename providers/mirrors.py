@@ -0,0 +1,226 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from logger import setup_logger
+from providers.http import build_session
+from utils.transport import mount_transport
+
+logger = setup_logger()
+
+DEFAULT_PROBE_TIMEOUT = 5
+DEFAULT_PROBE_INTERVAL_SEC = 3600
+LATENCY_EMA_ALPHA = 0.3
+
+
+def origin_of(url: str) -> str:
+    """
+        Returns the `scheme://host[:port]` part of a URL.
+    """
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def with_origin(url: str, origin: str) -> str:
+    """
+        Moves a URL to another origin, keeping its path and query.
+    """
+    return origin + url[len(origin_of(url)):]
+
+
+def is_mirror_failure(error: requests.RequestException) -> bool:
+    """
+        Whether a failed request points at the mirror rather than the page: no connection, a timeout
+        or a 5xx. A 404 of one story says nothing about the mirror.
+    """
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+@dataclass
+class MirrorStats:
+    origin: str
+    healthy: bool = True
+    latency_ms: Optional[float] = None
+    failures: int = 0
+    last_probe_at: Optional[str] = None
+
+
+class MirrorRegistry:
+    def __init__(self):
+        """
+            In-memory view of the `provider_mirrors` table: the origins each provider can be fetched
+            from, with their health and latency.
+
+            Requests go to the fastest healthy origin. A mirror that stops answering is marked unhealthy
+            and the request moves to the next one; `probe()` brings it back once it answers again.
+            The Runner loads the rows at startup and writes them back with `rows()`.
+        """
+        self._lock = threading.Lock()
+        self._mirrors: Dict[str, List[MirrorStats]] = {}
+
+    def configure(self, name: str, origins: Iterable[str]) -> None:
+        """
+            Sets the origins of a provider, primary first. Stats of origins that stay are kept.
+
+            Args:
+                name (str): The provider name.
+                origins (Iterable[str]): Base URLs; only their origin is used.
+        """
+        with self._lock:
+            known = {mirror.origin: mirror for mirror in self._mirrors.get(name, [])}
+            mirrors: List[MirrorStats] = []
+            for origin in dict.fromkeys(origin_of(url) for url in origins):
+                mirrors.append(known.get(origin) or MirrorStats(origin))
+            self._mirrors[name] = mirrors
+
+    def load(self, rows: Iterable) -> None:
+        with self._lock:
+            for row in rows:
+                for mirror in self._mirrors.get(row["provider"], []):
+                    if mirror.origin == row["origin"]:
+                        mirror.healthy = bool(row["healthy"])
+                        mirror.latency_ms = row["latency_ms"]
+                        mirror.failures = row["failures"] or 0
+                        mirror.last_probe_at = row["last_probe_at"]
+
+    def rows(self) -> List[Tuple]:
+        """
+            Returns `(provider, origin, healthy, latency_ms, failures, last_probe_at)` for every mirror.
+        """
+        with self._lock:
+            return [
+                (name, m.origin, int(m.healthy), m.latency_ms, m.failures, m.last_probe_at)
+                for name, mirrors in self._mirrors.items()
+                for m in mirrors
+            ]
+
+    def origins(self, name: str) -> List[str]:
+        with self._lock:
+            return [mirror.origin for mirror in self._mirrors.get(name, [])]
+
+    def _find(self, name: str, origin: str) -> Optional[MirrorStats]:
+        return next((m for m in self._mirrors.get(name, []) if m.origin == origin), None)
+
+    def _best(self, name: str) -> Optional[MirrorStats]:
+        mirrors = self._mirrors.get(name) or []
+        healthy = [m for m in mirrors if m.healthy]
+        if not healthy:
+            # Nothing answers: keep using the origin that failed least, the primary on a tie.
+            return min(mirrors, key=lambda m: m.failures, default=None)
+        return min(healthy, key=lambda m: float("inf") if m.latency_ms is None else m.latency_ms)
+
+    def current(self, name: str) -> Optional[str]:
+        """
+            Returns the origin requests of the provider go to, None if it has no mirrors configured.
+        """
+        with self._lock:
+            best = self._best(name)
+            return best.origin if best else None
+
+    def route(self, name: str, url: str) -> str:
+        """
+            Moves a URL of one of the provider's origins to the current origin. Other URLs are returned as is.
+        """
+        with self._lock:
+            if self._find(name, origin_of(url)) is None:
+                return url
+            return with_origin(url, self._best(name).origin)
+
+    def record_success(self, name: str, url: str, latency_ms: float) -> None:
+        with self._lock:
+            mirror = self._find(name, origin_of(url))
+            if mirror is None:
+                return
+            mirror.healthy = True
+            mirror.failures = 0
+            if mirror.latency_ms is None:
+                mirror.latency_ms = latency_ms
+            else:
+                mirror.latency_ms = LATENCY_EMA_ALPHA * latency_ms + (1 - LATENCY_EMA_ALPHA) * mirror.latency_ms
+
+    def failover(self, name: str, url: str) -> Optional[str]:
+        """
+            Marks the origin of a failed URL unhealthy and returns the URL on the next healthy origin.
+
+            Returns:
+                Optional[str]: The URL to retry, or None if no other healthy origin is left.
+        """
+        with self._lock:
+            mirror = self._find(name, origin_of(url))
+            if mirror is None:
+                return None
+            mirror.healthy = False
+            mirror.failures += 1
+            if not any(m.healthy for m in self._mirrors[name]):
+                return None
+            next_origin = self._best(name).origin
+        logger.warning(f"🪞 {name}: {mirror.origin} không phản hồi, chuyển sang {next_origin}")
+        return with_origin(url, next_origin)
+
+    def probe_due(self, name: str, interval_sec: float, now: Optional[datetime] = None) -> bool:
+        """
+            Whether the provider has several origins and one of them was not probed in the last `interval_sec`.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            mirrors = self._mirrors.get(name) or []
+            if len(mirrors) < 2:
+                return False
+            return any(
+                m.last_probe_at is None or datetime.fromisoformat(m.last_probe_at) <= now - timedelta(seconds=interval_sec)
+                for m in mirrors
+            )
+
+    def probe(self, name: str, timeout: float = DEFAULT_PROBE_TIMEOUT) -> None:
+        """
+            Sends one HEAD request to the root of every origin of the provider, at the same time, and
+            records which ones answer and how fast. Probes are not retried. They go through the
+            `[http] transport` too, with their own `<name>-mirrors` cassette, so a replay stays offline.
+        """
+        origins = self.origins(name)
+        if not origins:
+            return
+
+        session = mount_transport(build_session({"max_retries": 0}), f"{name}-mirrors")
+
+        def probe_one(origin: str) -> Tuple[str, Optional[float]]:
+            started = time.monotonic()
+            try:
+                res = session.head(f"{origin}/", timeout=timeout)
+                res.close()
+            except requests.RequestException:
+                return origin, None
+            if res.status_code >= 500:
+                return origin, None
+            return origin, (time.monotonic() - started) * 1000
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(origins), thread_name_prefix="mirror-probe") as pool:
+                results = list(pool.map(probe_one, origins))
+        finally:
+            session.close()
+
+        probed_at = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            for origin, latency_ms in results:
+                mirror = self._find(name, origin)
+                if mirror is None:
+                    continue
+                mirror.last_probe_at = probed_at
+                mirror.healthy = latency_ms is not None
+                if latency_ms is None:
+                    mirror.failures += 1
+                else:
+                    mirror.failures = 0
+                    mirror.latency_ms = latency_ms
+            best = self._best(name)
+        summary = ", ".join(f"{origin}={'lỗi' if ms is None else f'{ms:.0f}ms'}" for origin, ms in results)
+        logger.info(f"🪞 {name}: {summary} -> dùng {best.origin}")
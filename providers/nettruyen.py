@@ -1,22 +1,37 @@
 from typing import Optional
-from models.story_info import StoryInfo, StoryStatus
+
+from bs4 import BeautifulSoup, SoupStrainer
+from models.story_info import StoryInfo, StoryRef, StoryStatus
 from .base import BaseProvider
+from .cache import NOT_MODIFIED
 from consts import ProviderName
 from consts.enpoint import ENDPOINTS
 from utils import extract_chapter_number
 from utils.datetime import format_date_chapter
 
 class NetTruyenProvider(BaseProvider):
-    def __init__(self, id: str, last_chapter: int = 0):
+    name = ProviderName.NETTRUYEN.value
+    stream_markers = ("chapter_list",)
+    selectors = {
+        "chapter_item": "#chapter_list > li",
+        "chapter_name": "div.chapter a",
+        "chapter_date": "div.col-xs-4.no-wrap.small.text-center",
+    }
+    parse_only = SoupStrainer(id="chapter_list")
+
+    def get_story_url(self, story: StoryRef) -> str:
         """
-            Initializes the NetTruyenProvider instance.
-            Args:
-                id (str): The unique identifier for the provider.
-                last_chapter (int, optional): The last chapter number. Defaults to 0.
+        Returns the URL of the story page.
+
+        Args:
+            story (StoryRef): The story.
+
+        Returns:
+            str: The story page URL.
         """
-        super().__init__(id, last_chapter)
+        return f"{ENDPOINTS[ProviderName.NETTRUYEN]}/{story.id}"
 
-    def fetch_html(self) -> Optional[str]:
+    def fetch_html(self, story: StoryRef) -> Optional[str]:
         """
             Abstract method to retrieve the latest chapter information.
 
@@ -29,11 +44,13 @@ class NetTruyenProvider(BaseProvider):
                     - str: The release date of the latest chapter in string format.
         """
 
-        url = f"{ENDPOINTS[ProviderName.NETTRUYEN]}/{self.id}"
-        res = super().request_get(url)
-        return res.text if res else None
+        url = self.get_story_url(story)
+        res = super().request_get(url, conditional=True, story_id=story.id, stream=self.stream_enabled)
+        if res is not None and res.status_code == 304:
+            return NOT_MODIFIED
+        return self.read_text(res, story.id) if res else None
 
-    def get_story_info(self) -> StoryInfo:
+    def get_story_info(self, story: StoryRef) -> StoryInfo:
         """"
         Retrieves detailed information about the story, including the latest chapter, its release date, and status.
 
@@ -41,27 +58,40 @@ class NetTruyenProvider(BaseProvider):
         and determines the story's status (e.g., ongoing or completed). If the latest chapter matches the previously
         recorded chapter, an empty `StoryInfo` object is returned.
         """
-        html = self.fetch_html()
-        soup = super().parse_html(html)
-        if soup is None:
+        html = self.fetch_html(story)
+        if html is NOT_MODIFIED:
             return StoryInfo.empty()
 
-        chapter_item = soup.select_one("#chapter_list > li")
-        latest_chapter = extract_chapter_number(chapter_item.select_one("div.chapter a").get_text(strip=True))
-        if latest_chapter == self.last_chapter:
+        return self.parse_story_info(html, story)
+
+    def extract_story_info(self, soup: BeautifulSoup, story: StoryRef) -> StoryInfo:
+        """
+        Extracts the latest chapter, its release date and the story status from a parsed story page.
+
+        Args:
+            soup (BeautifulSoup): The story page, parsed with `parse_only` applied.
+            story (StoryRef): The story, whose `last_chapter` is compared with the page.
+
+        Returns:
+            StoryInfo: The story info, or an empty `StoryInfo` if the latest chapter is already known.
+        """
+        chapter_item = soup.select_one(self.selectors["chapter_item"])
+        latest_chapter = extract_chapter_number(chapter_item.select_one(self.selectors["chapter_name"]).get_text(strip=True))
+        if latest_chapter == story.last_chapter:
             return StoryInfo.empty()
 
-        latest_chapter_date = format_date_chapter(chapter_item.select_one("div.col-xs-4.no-wrap.small.text-center").get_text(strip=True))
+        latest_chapter_date = format_date_chapter(chapter_item.select_one(self.selectors["chapter_date"]).get_text(strip=True))
         return StoryInfo(latest_chapter, latest_chapter_date, StoryStatus.ONGOING) # TODO: Handle completed status if applicable
 
-    def get_link_chapter(self, chapter: int) -> str:
+    def get_link_chapter(self, story: StoryRef, chapter: int) -> str:
         """
         Constructs the URL for a specific chapter of the comic.
 
         Args:
+            story (StoryRef): The story.
             chapter (int): The chapter number for which the URL is to be constructed.
 
         Returns:
             str: The URL for the specified chapter.
         """
-        return f"{ENDPOINTS[ProviderName.NETTRUYEN]}/{self.id}/chuong-{chapter}"
\ No newline at end of file
+        return self.mirror_url(f"{ENDPOINTS[ProviderName.NETTRUYEN]}/{story.id}/chuong-{chapter}")
\ No newline at end of file
@@ -0,0 +1,53 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+from models.story_info import StoryInfo, StoryRef
+from utils.config import load_config_project
+from utils.metrics import phase_metrics
+
+if TYPE_CHECKING:
+    from providers.base import BaseProvider
+
+
+def _init_worker():
+    load_config_project()
+    # Timings of the child would never reach `run_metrics`; the parent records the `parse` phase.
+    phase_metrics.enabled = False
+
+
+def _parse_page(source: str, story_id: str, last_chapter: int, html: str) -> StoryInfo:
+    from providers import get_provider
+
+    return get_provider(source).parse_story_info(html, StoryRef(story_id, last_chapter))
+
+
+class ParsePool:
+    def __init__(self, processes: int):
+        """
+            Process pool running the CPU-bound part of a fetch: building the tree of a story page and
+            extracting its `StoryInfo`.
+
+            Fetch threads keep the network I/O; they hand the downloaded page to a worker process and
+            wait for the plain `StoryInfo`, so parsing is not serialized by the GIL. Workers are spawned
+            (not forked, the runner has threads) on first use and load `config.toml` themselves.
+
+            Args:
+                processes (int): Worker processes, usually the number of cores.
+        """
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def parse(self, provider: "BaseProvider", html: str, story: StoryRef) -> StoryInfo:
+        """
+            Parses a story page of `provider` in a worker process. Extraction errors are raised here.
+        """
+        future = self._executor.submit(_parse_page, provider.name, story.id, story.last_chapter, html)
+        return future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAS_LXML = False
+
+PARSER_AUTO = "auto"
+PARSER_LXML = "lxml"
+PARSER_HTML = "html.parser"
+
+
+def resolve_parser(name: Optional[str] = PARSER_AUTO) -> str:
+    """
+        Picks the BeautifulSoup tree builder to use.
+
+        Args:
+            name (Optional[str]): "auto", "lxml" or "html.parser". "auto" (or None) uses lxml
+                when it is installed and falls back to the pure-Python "html.parser".
+
+        Returns:
+            str: The tree builder name passed to BeautifulSoup.
+    """
+    if name in (None, PARSER_AUTO):
+        return PARSER_LXML if HAS_LXML else PARSER_HTML
+    if name == PARSER_LXML and not HAS_LXML:
+        return PARSER_HTML
+    return name
+
+
+def has_class(*class_names: str) -> Callable[[Optional[str]], bool]:
+    """
+        Builds a SoupStrainer attribute filter matching tags carrying any of the given classes.
+
+        SoupStrainer sees the raw `class` attribute string while the document is parsed,
+        so the value is split here instead of being compared as a whole.
+
+        Args:
+            *class_names (str): The CSS classes to look for.
+
+        Returns:
+            Callable[[Optional[str]], bool]: The filter, usable as `SoupStrainer(class_=...)`.
+    """
+    wanted = set(class_names)
+
+    def match(value: Optional[str]) -> bool:
+        return value is not None and not wanted.isdisjoint(value.split())
+
+    return match
+
+
+def parse_html(
+    html_content: str,
+    parser: Optional[str] = PARSER_AUTO,
+    parse_only: Optional[SoupStrainer] = None,
+) -> BeautifulSoup:
+    """
+        Parses HTML, optionally building only the subtrees matched by `parse_only`.
+
+        Args:
+            html_content (str): The HTML content to be parsed.
+            parser (Optional[str]): The parser backend, see `resolve_parser`.
+            parse_only (Optional[SoupStrainer]): Restricts the tree to the matching elements.
+
+        Returns:
+            BeautifulSoup: The parsed document.
+    """
+    return BeautifulSoup(html_content, resolve_parser(parser), parse_only=parse_only)
+
+
+@contextmanager
+def parsed_html(
+    html_content: str,
+    parser: Optional[str] = PARSER_AUTO,
+    parse_only: Optional[SoupStrainer] = None,
+) -> Iterator[BeautifulSoup]:
+    """
+        Context manager around `parse_html` that decomposes the tree on exit.
+
+        Decomposing breaks the parent/child reference cycles of the tree, so its memory
+        is released right away instead of waiting for the cyclic garbage collector.
+    """
+    soup = parse_html(html_content, parser, parse_only)
+    try:
+        yield soup
+    finally:
+        soup.decompose()
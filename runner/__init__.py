@@ -1,17 +1,35 @@
+import hashlib
+import json
+import os
 import sqlite3
 import time
-from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import List
 
+from consts import ProviderName
+from consts.enpoint import ENDPOINTS
 from consts.errors import StoryError
 from logger import PrefixAdapter, setup_logger
-from utils import chunk_by_size, load_json_file, write_json_file
+from providers import PROVIDER_MAP
+from providers.base import BaseProvider
+from providers.cache import ValidatorCache
+from providers.http import close_sessions, transfer_stats
+from providers.listing import LISTING_MAP
+from providers.mirrors import DEFAULT_PROBE_INTERVAL_SEC, DEFAULT_PROBE_TIMEOUT, MirrorRegistry
+from providers.parse_pool import ParsePool
+from utils import load_json_file, write_json_file
 from utils.config import get_config, load_config_project
-from utils.datetime import get_time_now_format
-from utils.discord import DiscordClient
-from .story import Story
+from utils.datetime import ISO_DATE_FORMAT, get_time_now_format, to_display_date, to_iso_date
+from utils.discord import DiscordClient, pack_lines
+from utils.metrics import phase_metrics, summarize, write_export
+from .catalog import StoryCatalog
+from .circuit import DEFAULT_COOLDOWN_SEC, DEFAULT_FAILURE_THRESHOLD, CircuitBreaker
+from .fetcher import ConcurrentFetcher, fetch_story
+from .outbox import DEFAULT_MAX_ATTEMPTS, DEFAULT_RETRY_BASE_SEC, DeliveryWorker, Outbox, OutboxMessage
+from .scheduler import format_check_time, parse_check_time
+from .storage import Storage
+from .story import DATE_FIELDS, Story
 
 logger = setup_logger()
 
@@ -20,6 +38,23 @@ TRACKING_DB_PATH = "story_tracking.db"
 MAX_TRACKING_SNAPSHOTS = 30
 JSON_SYNC_INTERVAL_DAYS = 3
 APP_STATE_LAST_JSON_SYNC = "last_json_sync_date"
+APP_STATE_LISTING_SCAN = "last_listing_scan_at.{source}"
+DEFAULT_LISTING_RECHECK_DAYS = 7
+DEFAULT_DISCORD_SEND_CONCURRENCY = 8
+DEFAULT_OUTBOX_DRAIN_TIMEOUT_SEC = 60
+APP_STATE_TRACKING_MIGRATED = "tracking_json_migrated_date"
+APP_STATE_CIRCUITS = "open_circuits"
+DEFAULT_METRICS_KEEP_RUNS = 50
+# Below this many story pages a run parses in its fetch threads; spawning worker processes would cost more.
+DEFAULT_PARSE_POOL_MIN_BATCH = 16
+UPSERT_SNAPSHOT_SQL = """
+    INSERT INTO story_snapshots (channel_id, snapshot_date, chapter, avg_days_per_chapter)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(channel_id, snapshot_date)
+    DO UPDATE SET
+        chapter = excluded.chapter,
+        avg_days_per_chapter = excluded.avg_days_per_chapter
+"""
 
 
 class Runner:
@@ -27,80 +62,50 @@ class Runner:
         load_config_project()
         self.data_path = data_path or get_config("common.data_path")
         self.db_path = db_path or TRACKING_DB_PATH
-        self.discord_client = DiscordClient(get_config("discord.bot_token"))
+        self.discord_client = DiscordClient(
+            get_config("discord.bot_token"),
+            max_connections=get_config("discord.send_concurrency", DEFAULT_DISCORD_SEND_CONCURRENCY),
+        )
         self.stories: List[Story] = []
-        self.last_fetch_summary = {"fetched": 0, "skip_stale": 0, "skip_source": 0}
-        self._init_db()
+        self.last_fetch_summary = {
+            "fetched": 0,
+            "skip_not_due": 0,
+            "skip_source": 0,
+            "skip_listing": 0,
+            "skip_limit": 0,
+            "skip_circuit": 0,
+            "cache_hit": 0,
+            "cache_miss": 0,
+            "cache_bytes_saved": 0,
+        }
+        self.queue_summary = {"total": 0, "skip_not_due": 0, "skip_source": 0, "skip_limit": 0}
+        self.validator_cache = ValidatorCache()
+        self.mirror_registry = MirrorRegistry()
+        self.parse_pool: ParsePool | None = None
+        self.storage = Storage(self.db_path)
+        self.outbox = Outbox(
+            self.storage,
+            max_attempts=get_config("discord.outbox_max_attempts", DEFAULT_MAX_ATTEMPTS),
+            retry_base_sec=get_config("discord.outbox_retry_base_sec", DEFAULT_RETRY_BASE_SEC),
+        )
+        self.delivery_worker = DeliveryWorker(
+            self.outbox,
+            self.discord_client,
+            get_config("discord.send_concurrency", DEFAULT_DISCORD_SEND_CONCURRENCY),
+        )
+        self.circuit_breaker = CircuitBreaker(
+            get_config("common.circuit_failure_threshold", DEFAULT_FAILURE_THRESHOLD),
+            get_config("common.circuit_cooldown_sec", DEFAULT_COOLDOWN_SEC),
+            state=self._get_app_state(APP_STATE_CIRCUITS),
+        )
         self._bootstrap_stories_from_json()
 
     @staticmethod
     def sort_by_update_date(data: List[Story]) -> List[Story]:
-        def parse_date(date_str: str):
-            try:
-                return datetime.strptime(date_str, "%d/%m/%Y")
-            except ValueError:
-                return datetime(1900, 1, 1)
-
-        return sorted(data, key=lambda x: parse_date(x.latest_chapter_date), reverse=True)
-
-    def _connect_db(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-
-    @contextmanager
-    def _db(self):
-        conn = self._connect_db()
-        try:
-            yield conn
-            conn.commit()
-        finally:
-            conn.close()
-
-    def _init_db(self):
-        with self._db() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS stories (
-                    id TEXT PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    source TEXT NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    last_chapter INTEGER NOT NULL,
-                    latest_chapter_date TEXT NOT NULL,
-                    error TEXT,
-                    last_check_date TEXT,
-                    avg_days_per_chapter REAL,
-                    next_check_date TEXT,
-                    last_success_date TEXT,
-                    error_count INTEGER NOT NULL DEFAULT 0
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS story_snapshots (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    channel_id TEXT NOT NULL,
-                    snapshot_date TEXT NOT NULL,
-                    chapter INTEGER NOT NULL,
-                    avg_days_per_chapter REAL,
-                    created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                    UNIQUE(channel_id, snapshot_date)
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS app_state (
-                    key TEXT PRIMARY KEY,
-                    value TEXT
-                )
-                """
-            )
+        return StoryCatalog(data).sorted_by_update_date()
 
     def _bootstrap_stories_from_json(self):
-        with self._db() as conn:
+        with self.storage.transaction() as conn:
             has_story = conn.execute("SELECT 1 FROM stories LIMIT 1").fetchone()
             if has_story:
                 return
@@ -119,7 +124,7 @@ class Runner:
 
     @staticmethod
     def _row_to_story(row: sqlite3.Row) -> Story:
-        return Story(
+        story = Story(
             id=row["id"],
             title=row["title"],
             source=row["source"],
@@ -132,177 +137,464 @@ class Runner:
             next_check_date=row["next_check_date"],
             last_success_date=row["last_success_date"],
             error_count=row["error_count"] or 0,
+            source_meta=row["source_meta"],
+            next_check_at=row["next_check_at"],
+        )
+        story.mark_clean()
+        return story
+
+    @staticmethod
+    def _story_row(story_data: dict) -> tuple:
+        return (
+            story_data["id"],
+            story_data["title"],
+            story_data["source"],
+            story_data["channel_id"],
+            story_data["last_chapter"],
+            story_data["latest_chapter_date"],
+            story_data["error"],
+            story_data["last_check_date"],
+            story_data["avg_days_per_chapter"],
+            story_data["next_check_date"],
+            story_data["last_success_date"],
+            story_data["error_count"],
+            json.dumps(story_data["source_meta"], ensure_ascii=False) if story_data["source_meta"] else None,
+            story_data["next_check_at"],
         )
 
     def _save_stories(self, stories: List[Story]):
-        payload = [story.to_dict() for story in stories if not story.is_completed]
-
-        with self._db() as conn:
-            active_ids = set()
-            for story_data in payload:
-                active_ids.add(story_data["id"])
-                conn.execute(
-                    """
-                    INSERT INTO stories (
-                        id, title, source, channel_id, last_chapter, latest_chapter_date,
-                        error, last_check_date, avg_days_per_chapter, next_check_date,
-                        last_success_date, error_count
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(id) DO UPDATE SET
-                        title = excluded.title,
-                        source = excluded.source,
-                        channel_id = excluded.channel_id,
-                        last_chapter = excluded.last_chapter,
-                        latest_chapter_date = excluded.latest_chapter_date,
-                        error = excluded.error,
-                        last_check_date = excluded.last_check_date,
-                        avg_days_per_chapter = excluded.avg_days_per_chapter,
-                        next_check_date = excluded.next_check_date,
-                        last_success_date = excluded.last_success_date,
-                        error_count = excluded.error_count
-                    """,
-                    (
-                        story_data["id"],
-                        story_data["title"],
-                        story_data["source"],
-                        story_data["channel_id"],
-                        story_data["last_chapter"],
-                        story_data["latest_chapter_date"],
-                        story_data["error"],
-                        story_data["last_check_date"],
-                        story_data["avg_days_per_chapter"],
-                        story_data["next_check_date"],
-                        story_data["last_success_date"],
-                        story_data["error_count"],
-                    ),
+        """
+        Writes the changed stories in one transaction and removes the completed ones by ID.
+
+        Only stories with dirty fields are upserted, unchanged rows are not touched. Rows of stories
+        that were not loaded on this run are kept.
+        """
+        dirty_stories = [story for story in stories if not story.is_completed and story.is_dirty()]
+        completed_ids = [(story.id,) for story in stories if story.is_completed]
+        if not dirty_stories and not completed_ids:
+            return
+
+        with self.storage.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO stories (
+                    id, title, source, channel_id, last_chapter, latest_chapter_date,
+                    error, last_check_date, avg_days_per_chapter, next_check_date,
+                    last_success_date, error_count, source_meta, next_check_at
                 )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title,
+                    source = excluded.source,
+                    channel_id = excluded.channel_id,
+                    last_chapter = excluded.last_chapter,
+                    latest_chapter_date = excluded.latest_chapter_date,
+                    error = excluded.error,
+                    last_check_date = excluded.last_check_date,
+                    avg_days_per_chapter = excluded.avg_days_per_chapter,
+                    next_check_date = excluded.next_check_date,
+                    last_success_date = excluded.last_success_date,
+                    error_count = excluded.error_count,
+                    source_meta = excluded.source_meta,
+                    next_check_at = excluded.next_check_at
+                """,
+                [self._story_row(story.to_dict()) for story in dirty_stories],
+            )
+            conn.executemany("DELETE FROM stories WHERE id = ?", completed_ids)
 
-            if active_ids:
-                placeholders = ",".join("?" for _ in active_ids)
-                conn.execute(f"DELETE FROM stories WHERE id NOT IN ({placeholders})", tuple(active_ids))
-            else:
-                conn.execute("DELETE FROM stories")
+        for story in dirty_stories:
+            story.mark_clean()
+        logger.info(f"💾 Lưu {len(dirty_stories)} truyện thay đổi, xoá {len(completed_ids)} truyện hoàn thành.")
 
     def _get_app_state(self, key: str) -> str | None:
-        with self._db() as conn:
-            row = conn.execute("SELECT value FROM app_state WHERE key = ?", (key,)).fetchone()
-        return row["value"] if row else None
+        return self.storage.get_state(key)
 
     def _set_app_state(self, key: str, value: str):
-        with self._db() as conn:
-            conn.execute(
+        self.storage.set_state(key, value)
+
+    def _load_validator_cache(self):
+        with self.storage.transaction() as conn:
+            rows = conn.execute("SELECT url, etag, last_modified, content_length FROM http_cache").fetchall()
+        self.validator_cache = ValidatorCache()
+        self.validator_cache.load(rows)
+        BaseProvider.validator_cache = self.validator_cache
+
+    def _save_validator_cache(self):
+        upserts, deleted = self.validator_cache.pop_changes()
+        if not upserts and not deleted:
+            return
+
+        with self.storage.transaction() as conn:
+            conn.executemany(
                 """
-                INSERT INTO app_state (key, value)
-                VALUES (?, ?)
-                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                INSERT INTO http_cache (url, etag, last_modified, content_length, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_length = excluded.content_length,
+                    updated_at = excluded.updated_at
                 """,
-                (key, value),
+                upserts,
+            )
+            conn.executemany("DELETE FROM http_cache WHERE url = ?", [(url,) for url in deleted])
+
+    def _load_mirror_registry(self):
+        """
+        Builds the mirror list of every provider, its default endpoint first, then `provider.<name>.mirrors`,
+        and restores their health and latency from `provider_mirrors`.
+        """
+        self.mirror_registry = MirrorRegistry()
+        for source in PROVIDER_MAP:
+            mirrors = get_config(f"provider.{source}.mirrors", []) or []
+            self.mirror_registry.configure(source, [ENDPOINTS[ProviderName(source)], *mirrors])
+        with self.storage.transaction() as conn:
+            rows = conn.execute(
+                "SELECT provider, origin, healthy, latency_ms, failures, last_probe_at FROM provider_mirrors"
+            ).fetchall()
+        self.mirror_registry.load(rows)
+        BaseProvider.mirror_registry = self.mirror_registry
+
+    def _probe_mirrors_if_due(self):
+        for source in PROVIDER_MAP:
+            if not get_config(f"provider.{source}.enabled", True):
+                continue
+            interval = get_config(f"provider.{source}.mirror_probe_interval_sec", DEFAULT_PROBE_INTERVAL_SEC)
+            if self.mirror_registry.probe_due(source, interval):
+                timeout = get_config(f"provider.{source}.mirror_probe_timeout", DEFAULT_PROBE_TIMEOUT)
+                self.mirror_registry.probe(source, timeout)
+
+    def _save_mirror_registry(self):
+        with self.storage.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO provider_mirrors (provider, origin, healthy, latency_ms, failures, last_probe_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(provider, origin) DO UPDATE SET
+                    healthy = excluded.healthy,
+                    latency_ms = excluded.latency_ms,
+                    failures = excluded.failures,
+                    last_probe_at = excluded.last_probe_at
+                """,
+                self.mirror_registry.rows(),
             )
 
-    def _sync_db_to_json_if_due(self, stories: List[Story]):
+    def _sync_db_to_json_if_due(self):
         today = datetime.today()
         last_sync_str = self._get_app_state(APP_STATE_LAST_JSON_SYNC)
         if last_sync_str:
             try:
-                last_sync = datetime.strptime(last_sync_str, "%d/%m/%Y")
+                last_sync = datetime.strptime(last_sync_str, ISO_DATE_FORMAT)
                 if (today - last_sync).days < JSON_SYNC_INTERVAL_DAYS:
                     return
             except ValueError:
                 pass
 
-        data = [story.to_dict() for story in Runner.sort_by_update_date(stories) if not story.is_completed]
+        # A run only holds its due stories, the export covers the whole table, newest update first.
+        with self.storage.transaction() as conn:
+            rows = conn.execute("SELECT * FROM stories ORDER BY latest_chapter_date DESC").fetchall()
+        data = [self._json_story(self._row_to_story(row)) for row in rows]
         write_json_file(self.data_path, data)
-        self._set_app_state(APP_STATE_LAST_JSON_SYNC, today.strftime("%d/%m/%Y"))
+        self._set_app_state(APP_STATE_LAST_JSON_SYNC, today.strftime(ISO_DATE_FORMAT))
         logger.info(f"✅ Đồng bộ SQLite -> data.json thành công.[{get_time_now_format()}]")
 
+    @staticmethod
+    def _json_story(story: Story) -> dict:
+        # data.json is edited by hand, it keeps the dd/mm/yyyy dates.
+        data = story.to_dict()
+        for name in DATE_FIELDS:
+            data[name] = to_display_date(data[name])
+        return data
+
     def fetch_latest_chapters(self):
-        skip_source = [s for s in self.stories if s.get_skip_reason() == "metruyenchu2"]
-        skip_stale = [s for s in self.stories if s.get_skip_reason() == "stale_interval"]
-        stories_to_fetch = [s for s in self.stories if s.get_skip_reason() is None]
+        stories_to_fetch = StoryCatalog(self.stories).due(datetime.now(), self._disabled_sources())
+        stories_to_fetch, listed_not_due, skip_listing = self._apply_update_listings(stories_to_fetch)
         will_check = len(stories_to_fetch)
+        skip_not_due = self.queue_summary["skip_not_due"] - len(listed_not_due)
         self.last_fetch_summary = {
             "fetched": will_check,
-            "skip_stale": len(skip_stale),
-            "skip_source": len(skip_source),
+            "skip_not_due": skip_not_due,
+            "skip_source": self.queue_summary["skip_source"],
+            "skip_listing": len(skip_listing),
+            "skip_limit": self.queue_summary["skip_limit"],
         }
         logger.info(
-            f"📋 Fetch plan: {len(self.stories)} tổng"
+            f"📋 Fetch plan: {self.queue_summary['total']} tổng"
             f" | ✅ sẽ check: {will_check}"
-            f" | ⏭️ stale skip: {len(skip_stale)}"
-            f" | ⏭️ metruyenchu: {len(skip_source)}"
+            f" | ⏭️ chưa tới hạn: {skip_not_due}"
+            f" | ⏭️ source tắt: {self.queue_summary['skip_source']}"
+            f" | ⏭️ listing không đổi: {len(skip_listing)}"
+            f" | ⏭️ vượt giới hạn: {self.queue_summary['skip_limit']}"
         )
 
-        # if skip_stale:
-        #     preview = ", ".join(
-        #         f"{story.title} (next_due={story._format_date(story._get_stale_next_due_date()) if story._get_stale_next_due_date() else 'unknown'})"
-        #         for story in skip_stale[:5]
-        #     )
-        #     if len(skip_stale) > 5:
-        #         preview += f", ... +{len(skip_stale) - 5} truyện"
-        #     logger.info(f"⏭️ Stale schedule preview: {preview}")
+        transfer_stats.reset()
+        self.validator_cache.reset_stats()
+        self.circuit_breaker.deferred = 0
+        fetch_concurrency = get_config("common.fetch_concurrency", 1)
+        BaseProvider.parse_pool = self._parse_pool_for(stories_to_fetch, fetch_concurrency)
+        try:
+            if fetch_concurrency and fetch_concurrency > 1:
+                fetcher = ConcurrentFetcher(fetch_concurrency, get_config("common.story_fetch_delay_sec"))
+                fetcher.run(stories_to_fetch, self.circuit_breaker)
+            else:
+                self._fetch_sequentially(stories_to_fetch, self.circuit_breaker)
+        finally:
+            BaseProvider.parse_pool = None
+        self._set_app_state(APP_STATE_CIRCUITS, self.circuit_breaker.dumps())
+
+        self.last_fetch_summary.update({
+            "fetched": will_check - self.circuit_breaker.deferred,
+            "skip_circuit": self.circuit_breaker.deferred,
+            "cache_hit": self.validator_cache.hits,
+            "cache_miss": self.validator_cache.misses,
+            "cache_bytes_saved": self.validator_cache.bytes_saved,
+        })
+        self._log_transfer_stats()
+
+    def _parse_pool_for(self, stories_to_fetch: List[Story], fetch_concurrency: int) -> ParsePool | None:
+        """
+        Returns the process pool that parses the story pages of this run, or None to parse them in the
+        fetch threads: when fetching is sequential, only one core is available, or fewer than
+        `common.parse_pool_min_batch` stories have an HTML page. The pool is started once and kept for
+        later cycles.
+        """
+        processes = get_config("common.parse_processes", 0) or os.cpu_count() or 1
+        html_pages = sum(1 for story in stories_to_fetch if story.provider.selectors)
+        min_batch = get_config("common.parse_pool_min_batch", DEFAULT_PARSE_POOL_MIN_BATCH)
+        if processes <= 1 or not fetch_concurrency or fetch_concurrency <= 1 or html_pages < min_batch:
+            return None
+        if self.parse_pool is None:
+            self.parse_pool = ParsePool(processes)
+            logger.info(f"🧮 Parse HTML trên {processes} tiến trình.")
+        return self.parse_pool
+
+    def _apply_update_listings(self, stories_to_fetch: List[Story]):
+        """
+        Narrows the fetch list using the "recently updated" listing of sources that have one.
+
+        For each source with `listing_detector = true`, the listing is paged back to the previous scan.
+        Listed stories are fetched even if their `next_check_at` has not come yet; those are loaded from
+        the database by ID. Unlisted ones are only fetched when they carry an error or their last full
+        fetch is older than `listing_recheck_days`. Without a previous scan, or when the scan cannot
+        reach it, every due story is fetched as usual.
+
+        Returns:
+            Tuple[List[Story], List[Story], List[Story]]: stories to fetch, listed stories that were not due,
+            listing skips.
+        """
+        skip_listing: List[Story] = []
+        listed_not_due: List[Story] = []
+        today = datetime.today()
+        today_str = today.strftime(ISO_DATE_FORMAT)
+
+        for source, listing_cls in LISTING_MAP.items():
+            if not get_config(f"provider.{source}.listing_detector", False):
+                continue
+            if not get_config(f"provider.{source}.enabled", True):
+                continue
+
+            state_key = APP_STATE_LISTING_SCAN.format(source=source)
+            last_scan = self._get_app_state(state_key)
+            scan_started = datetime.now()
+            updated_ids = None
+            if last_scan:
+                updated_ids = listing_cls().collect_updated_ids(datetime.fromisoformat(last_scan))
+            # A complete scan, or the full per-story fetch below, covers every update until now.
+            self._set_app_state(state_key, scan_started.isoformat(timespec="seconds"))
+            if updated_ids is None:
+                continue
+
+            recheck_days = get_config(f"provider.{source}.listing_recheck_days", DEFAULT_LISTING_RECHECK_DAYS)
+            recheck_before = (today - timedelta(days=recheck_days)).date()
+
+            listed = self._load_stories_by_ids(source, sorted(updated_ids))
+            listed_not_due.extend(s for s in listed if not s.is_due())
+            for story in listed:
+                story.force_check = True
+
+            source_stories = [s for s in stories_to_fetch if s.source == source]
+            recheck = StoryCatalog(source_stories).success_not_after(recheck_before)
+            unchanged = [
+                story for story, recheck_due in zip(source_stories, recheck)
+                if not (recheck_due or story.id in updated_ids or story.error or story.error_count)
+            ]
+            unchanged_ids = {s.id for s in unchanged}
+            intervals = StoryCatalog(unchanged).success_interval_hours(datetime.now())
+            for story, hours in zip(unchanged, intervals):
+                story.mark_checked_by_listing(today_str, timedelta(hours=hours))
+            stories_to_fetch = [s for s in stories_to_fetch if s.id not in unchanged_ids] + listed
+            skip_listing.extend(unchanged)
+            logger.info(
+                f"🔎 {source}: listing có {len(updated_ids)} truyện cập nhật"
+                f" | fetch {len(source_stories) - len(unchanged) + len(listed)}"
+                f" | bỏ qua {len(unchanged)}"
+            )
+
+        return stories_to_fetch, listed_not_due, skip_listing
+
+    @staticmethod
+    def _log_transfer_stats():
+        for name, stats in sorted(transfer_stats.snapshot().items()):
+            logger.info(
+                f"📦 {name}: {stats['requests']} trang"
+                f" | đọc {stats['bytes_read'] // 1024} KB"
+                f" | tiết kiệm {stats['bytes_saved'] // 1024} KB"
+                f" | dừng sớm {stats['early_stops']}"
+            )
 
+    @staticmethod
+    def _fetch_sequentially(stories_to_fetch: List[Story], breaker: CircuitBreaker | None = None):
         remaining_requests = len(stories_to_fetch)
         for index, story in enumerate(stories_to_fetch):
             prefix = f"[{index + 1}/{len(stories_to_fetch)}] - "
             story.logger = PrefixAdapter(logger, {"prefix": prefix})
-            attempted = story.get_latest_chapter()
+            attempted = fetch_story(story, breaker)
             if attempted:
                 remaining_requests -= 1
                 if remaining_requests > 0:
                     time.sleep(get_config("common.story_fetch_delay_sec"))
 
-    def prepare(self):
-        with self._db() as conn:
-            rows = conn.execute("SELECT * FROM stories").fetchall()
+    @staticmethod
+    def _disabled_sources() -> List[str]:
+        return [source for source in PROVIDER_MAP if not get_config(f"provider.{source}.enabled", True)]
+
+    def _load_due_stories(self, now: datetime):
+        """
+        Loads only the stories whose check is due, most overdue first, from the `next_check_at` index.
+
+        Stories of disabled sources are left in the database. `common.max_stories_per_run` caps how many
+        due stories are loaded; the rest stay due and are picked up first on the next run.
+        Stories that carry an error are always due, like in `Story.is_due`, and rank as due now. Their stored
+        `next_check_at` is left alone, so a story this run does not fetch keeps its backoff.
+        """
+        now_str = format_check_time(now)
+        disabled = self._disabled_sources()
+        source_filter = f"source NOT IN ({','.join('?' for _ in disabled)})" if disabled else "1"
+        # Errors are non-empty codes, so `error > ''` means "has an error"; unlike `IS NOT NULL` it lets SQLite
+        # answer the OR from the partial `idx_stories_error` and `idx_stories_next_check_at` indexes.
+        due_filter = "(error > '' OR next_check_at <= ?)"
+        params = (*disabled, now_str)
+        limit = get_config("common.max_stories_per_run", 0) or -1
+
+        with self.storage.transaction() as conn:
+            counts = conn.execute(
+                f"""
+                SELECT
+                    COUNT(*) AS total,
+                    COALESCE(SUM(CASE WHEN {source_filter} AND {due_filter} THEN 1 ELSE 0 END), 0) AS due,
+                    COALESCE(SUM(CASE WHEN {source_filter} THEN 0 ELSE 1 END), 0) AS disabled
+                FROM stories
+                """,
+                params + tuple(disabled),
+            ).fetchone()
+            rows = conn.execute(
+                f"""
+                SELECT * FROM stories
+                WHERE {source_filter} AND {due_filter}
+                ORDER BY MIN(next_check_at, ?)
+                LIMIT ?
+                """,
+                params + (now_str, limit),
+            ).fetchall()
+
         self.stories = [self._row_to_story(row) for row in rows]
+        self.queue_summary = {
+            "total": counts["total"],
+            "skip_not_due": counts["total"] - counts["due"] - counts["disabled"],
+            "skip_source": counts["disabled"],
+            "skip_limit": counts["due"] - len(rows),
+        }
+
+    def _load_stories_by_ids(self, source: str, story_ids: List[str]) -> List[Story]:
+        loaded_ids = {story.id for story in self.stories}
+        story_ids = [story_id for story_id in story_ids if story_id not in loaded_ids]
+        if not story_ids:
+            return []
+
+        with self.storage.transaction() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM stories WHERE source = ? AND id IN ({','.join('?' for _ in story_ids)})",
+                (source, *story_ids),
+            ).fetchall()
+        stories = [self._row_to_story(row) for row in rows]
+        self.stories.extend(stories)
+        return stories
+
+    def prepare(self):
+        self._load_due_stories(datetime.now())
+        # Loaded once per Runner: later cycles of a resident process keep the in-memory cache.
+        if BaseProvider.validator_cache is not self.validator_cache:
+            self._load_validator_cache()
+        if BaseProvider.mirror_registry is not self.mirror_registry:
+            self._load_mirror_registry()
+        self._probe_mirrors_if_due()
+
+    def next_due_at(self) -> datetime | None:
+        """
+        Returns the earliest `next_check_at` among the stories of enabled sources, None if there is none.
+        """
+        disabled = self._disabled_sources()
+        source_filter = f"WHERE source NOT IN ({','.join('?' for _ in disabled)})" if disabled else ""
+        with self.storage.transaction() as conn:
+            row = conn.execute(f"SELECT MIN(next_check_at) FROM stories {source_filter}", disabled).fetchone()
+        return parse_check_time(row[0])
 
     def update_data(self):
-        uncompleted_stories = [story for story in self.stories if not story.is_completed]
-        ordered_stories = Runner.sort_by_update_date(uncompleted_stories)
-        self._save_stories(ordered_stories)
-        self._sync_db_to_json_if_due(ordered_stories)
+        with phase_metrics.timed("sqlite_stories"):
+            self._save_stories(self.stories)
+        with phase_metrics.timed("sqlite_http_cache"):
+            self._save_validator_cache()
+        with phase_metrics.timed("sqlite_mirrors"):
+            self._save_mirror_registry()
+        self._sync_db_to_json_if_due()
         logger.info(f"✅ SQLite cập nhật thành công.[{get_time_now_format()}]")
 
     def update_tracking(self):
-        today_str = datetime.today().strftime("%d/%m/%Y")
-        story_channel_map = {story.id: str(story.channel_id) for story in self.stories}
-        self._migrate_tracking_json_to_db(story_channel_map)
-
-        with self._db() as conn:
-            for story in self.stories:
-                if not story.is_new_chapter:
-                    continue
-
-                channel_key = str(story.channel_id)
-                conn.execute(
-                    """
-                    INSERT INTO story_snapshots (channel_id, snapshot_date, chapter, avg_days_per_chapter)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(channel_id, snapshot_date)
-                    DO UPDATE SET
-                        chapter = excluded.chapter,
-                        avg_days_per_chapter = excluded.avg_days_per_chapter
-                    """,
-                    (channel_key, today_str, story.last_chapter, story.avg_days_per_chapter),
-                )
+        """
+        Records today's chapter for every story with a new chapter in one batched upsert, then keeps only
+        the newest `MAX_TRACKING_SNAPSHOTS` snapshots of the affected channels with a single prune.
+        """
+        self._migrate_tracking_json_to_db()
+
+        today_str = datetime.today().strftime(ISO_DATE_FORMAT)
+        snapshots = [
+            (str(story.channel_id), today_str, story.last_chapter, story.avg_days_per_chapter)
+            for story in self.stories
+            if story.is_new_chapter
+        ]
+        if not snapshots:
+            return
 
-                conn.execute(
-                    """
-                    DELETE FROM story_snapshots
-                    WHERE channel_id = ?
-                      AND id NOT IN (
-                        SELECT id
+        channel_keys = sorted({channel_key for channel_key, *_ in snapshots})
+        with self.storage.transaction() as conn:
+            conn.executemany(UPSERT_SNAPSHOT_SQL, snapshots)
+            conn.execute(
+                """
+                DELETE FROM story_snapshots
+                WHERE id IN (
+                    SELECT id
+                    FROM (
+                        SELECT id, ROW_NUMBER() OVER (PARTITION BY channel_id ORDER BY id DESC) AS position
                         FROM story_snapshots
-                        WHERE channel_id = ?
-                        ORDER BY id DESC
-                        LIMIT ?
-                      )
-                    """,
-                    (channel_key, channel_key, MAX_TRACKING_SNAPSHOTS),
+                        WHERE channel_id IN (SELECT value FROM json_each(?))
+                    )
+                    WHERE position > ?
                 )
+                """,
+                (json.dumps(channel_keys), MAX_TRACKING_SNAPSHOTS),
+            )
+
+    def _migrate_tracking_json_to_db(self):
+        """
+        Imports the legacy `story_tracking.json` snapshots once. The attempt is recorded in `app_state`,
+        so later runs never look for the file again.
+        """
+        if self._get_app_state(APP_STATE_TRACKING_MIGRATED):
+            return
+        self._import_tracking_json()
+        self._set_app_state(APP_STATE_TRACKING_MIGRATED, datetime.today().strftime(ISO_DATE_FORMAT))
 
-    def _migrate_tracking_json_to_db(self, story_id_to_channel: Dict[str, str]):
+    def _import_tracking_json(self):
         try:
             tracking = load_json_file(TRACKING_PATH)
         except Exception:
@@ -311,11 +603,15 @@ class Runner:
         if not isinstance(tracking, dict) or not tracking:
             return
 
-        with self._db() as conn:
+        with self.storage.transaction() as conn:
             already_migrated = conn.execute("SELECT 1 FROM story_snapshots LIMIT 1").fetchone()
             if already_migrated:
                 return
 
+            story_id_to_channel = {
+                row["id"]: str(row["channel_id"]) for row in conn.execute("SELECT id, channel_id FROM stories")
+            }
+            rows = []
             for key, value in tracking.items():
                 channel_id = story_id_to_channel.get(key, str(key))
                 snapshots = value.get("snapshots", []) if isinstance(value, dict) else []
@@ -326,66 +622,56 @@ class Runner:
                     else:
                         normalized.append(snap)
 
-                for snap in normalized[-MAX_TRACKING_SNAPSHOTS:]:
-                    conn.execute(
-                        """
-                        INSERT INTO story_snapshots (channel_id, snapshot_date, chapter, avg_days_per_chapter)
-                        VALUES (?, ?, ?, ?)
-                        ON CONFLICT(channel_id, snapshot_date)
-                        DO UPDATE SET
-                            chapter = excluded.chapter,
-                            avg_days_per_chapter = excluded.avg_days_per_chapter
-                        """,
-                        (
-                            channel_id,
-                            snap.get("date"),
-                            snap.get("chapter"),
-                            snap.get("avg_days_per_chapter"),
-                        ),
-                    )
-
-    def send_story_channels(self, stories: List[Story]):
-        filtered_stories = [s for s in stories if s.error is None or s.error == StoryError.SEND_DISCORD_PER_STORY]
-        story_send_delay_sec = get_config("discord.story_send_delay_sec")
+                rows.extend(
+                    (channel_id, to_iso_date(snap.get("date")), snap.get("chapter"), snap.get("avg_days_per_chapter"))
+                    for snap in normalized[-MAX_TRACKING_SNAPSHOTS:]
+                )
+            conn.executemany(UPSERT_SNAPSHOT_SQL, rows)
 
-        for story in filtered_stories:
-            try:
-                self.discord_client.send_message(story.channel_id, story.channel_message())
-                story.clear_error_if(StoryError.SEND_DISCORD_PER_STORY)
-            except Exception:
-                story.set_error(StoryError.SEND_DISCORD_PER_STORY)
+    @staticmethod
+    def _story_key(story: Story) -> str:
+        # Built from the displayed date, so keys queued before the ISO date migration still match.
+        return f"{story.id}:{story.last_chapter}:{to_display_date(story.latest_chapter_date)}"
 
-            if story is not filtered_stories[-1]:
-                time.sleep(story_send_delay_sec)
+    def build_story_channel_messages(self, stories: List[Story]) -> List[OutboxMessage]:
+        filtered_stories = [s for s in stories if s.error is None or s.error == StoryError.SEND_DISCORD_PER_STORY]
+        return [
+            OutboxMessage(f"story:{self._story_key(story)}", str(story.channel_id), story.channel_message())
+            for story in filtered_stories
+        ]
 
-    def send_general_channel(self, stories: List[Story]):
+    def build_general_channel_messages(self, stories: List[Story]) -> List[OutboxMessage]:
         filtered_stories = [s for s in stories if s.error is None or s.error == StoryError.SEND_DISCORD_GENERAL]
         if not filtered_stories:
-            return
+            return []
 
         header = f"**📢 BẢN TIN CẬP NHẬT CÔNG PHÁP! [{get_time_now_format()}]**"
-        channel_id = get_config("discord.general_channel_id")
+        channel_id = str(get_config("discord.general_channel_id"))
 
         sorted_stories = Runner.sort_by_update_date(filtered_stories)
-        chunk_stories = chunk_by_size(sorted_stories, get_config("discord.general_channel_chunk_size"))
-
-        for i, chunk in enumerate(chunk_stories):
-            success = True
-            lines = [story.message_channel_general() for story in chunk]
-            message = header + "\n" + "\n".join(lines) if i == 0 else "\n".join(lines)
-
-            try:
-                self.discord_client.send_message(channel_id, message)
-                logger.info(f"✅ Gửi thông báo vào kênh chung thành công. (chunk {i + 1}/{len(chunk_stories)}).")
-            except Exception:
-                success = False
-
-            for part_story in chunk:
-                part_story.resolve_or_set_error(success, StoryError.SEND_DISCORD_GENERAL)
-
-            time.sleep(get_config("discord.general_send_delay_sec"))
-
-    def confirm_and_send_discord(self, time_format: str):
+        # The same set of updates always yields the same keys, so a digest is queued once.
+        story_keys = "|".join(sorted(self._story_key(story) for story in sorted_stories))
+        digest_key = hashlib.sha1(story_keys.encode("utf-8")).hexdigest()
+        messages = pack_lines([story.message_channel_general() for story in sorted_stories], header=header)
+        return [
+            OutboxMessage(f"general:{digest_key}:{i}", channel_id, message)
+            for i, (message, _) in enumerate(messages)
+        ]
+
+    def enqueue_notifications(self, stories: List[Story]):
+        """
+        Queues the general digest and the per-story messages in the outbox; the delivery worker sends them.
+        Delivery state lives in the outbox from here on, so the legacy send errors of the stories are cleared.
+        """
+        messages = self.build_general_channel_messages(stories) + self.build_story_channel_messages(stories)
+        added = self.outbox.enqueue(messages)
+        for story in stories:
+            story.clear_error_if(StoryError.SEND_DISCORD_GENERAL)
+            story.clear_error_if(StoryError.SEND_DISCORD_PER_STORY)
+        self.delivery_worker.wake()
+        logger.info(f"📮 Đã xếp {added}/{len(messages)} tin nhắn vào outbox.")
+
+    def confirm_and_send_discord(self, time_format: str, auto_send: bool = False):
         if not get_config("discord.bot_token"):
             logger.warning("⚠️ Bot token không được cấu hình. Bỏ qua gửi thông báo.")
             return
@@ -399,10 +685,9 @@ class Runner:
         logger.warning(f"Số truyện có chương mới: {len(stories_to_process)} truyện.")
         self.log_output_console(stories_to_process, time_format)
 
-        choice = input("Bạn muốn gửi vào Discord? [y/N]: ").strip().lower()
+        choice = "y" if auto_send else input("Bạn muốn gửi vào Discord? [y/N]: ").strip().lower()
         if choice == "y":
-            self.send_general_channel(stories_to_process)
-            self.send_story_channels(stories_to_process)
+            self.enqueue_notifications(stories_to_process)
 
     def get_stories_to_process(self):
         return [s for s in self.stories if s.needs_attention()]
@@ -443,9 +728,21 @@ class Runner:
             message1 += f"=> {total_stories_update} truyện có chap mới - Thời gian check: {time_format}"
             logger.info(message1)
 
-    def run(self):
+    def start_delivery(self):
+        if get_config("discord.bot_token"):
+            # Messages left by earlier runs go out while this run fetches.
+            self.delivery_worker.start()
+
+    def run_cycle(self, auto_send: bool = False):
+        """
+        One pass of the pipeline: load the due stories, fetch them, queue the notifications and persist.
+
+        Args:
+            auto_send (bool): Queue the notifications without asking on the console (daemon mode).
+        """
         start_time = time.time()
-        logger.info("🚀 Đang khởi động...")
+        phase_metrics.enabled = get_config("metrics.enabled", True)
+        phase_metrics.start_run(format_check_time(datetime.now()))
         self.prepare()
         self.fetch_latest_chapters()
 
@@ -455,10 +752,86 @@ class Runner:
         logger.info(
             "📊 Fetch summary: "
             f"đã fetch {self.last_fetch_summary['fetched']}, "
-            f"skip stale {self.last_fetch_summary['skip_stale']}, "
-            f"skip source {self.last_fetch_summary['skip_source']}"
+            f"skip chưa tới hạn {self.last_fetch_summary['skip_not_due']}, "
+            f"skip source {self.last_fetch_summary['skip_source']}, "
+            f"skip listing {self.last_fetch_summary['skip_listing']}, "
+            f"skip giới hạn {self.last_fetch_summary['skip_limit']}, "
+            f"hoãn do ngắt mạch {self.last_fetch_summary['skip_circuit']}, "
+            f"cache hit {self.last_fetch_summary['cache_hit']}, "
+            f"cache miss {self.last_fetch_summary['cache_miss']} "
+            f"(~{self.last_fetch_summary['cache_bytes_saved'] // 1024} KB tiết kiệm)"
         )
 
-        self.confirm_and_send_discord(time_format)
+        self.confirm_and_send_discord(time_format, auto_send=auto_send)
         self.update_data()
-        self.update_tracking()
+        with phase_metrics.timed("sqlite_tracking"):
+            self.update_tracking()
+        self.save_run_metrics(export=True)
+
+    def save_run_metrics(self, export: bool = False):
+        """
+        Writes the phase timings collected since the last call to `run_metrics`, keeping the newest
+        `metrics.keep_runs` runs, and logs the p50/p95 of each provider phase.
+
+        Args:
+            export (bool): Also write `metrics.export_path` (`metrics.export_format`: "prometheus" or "json").
+        """
+        samples = phase_metrics.pop_samples()
+        if not samples:
+            return
+        # Deliveries sent before the first `start_run` belong to the run they are saved with.
+        samples = [
+            sample._replace(run_id=phase_metrics.run_id) if sample.run_id is None else sample
+            for sample in samples
+        ]
+
+        with self.storage.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO run_metrics (run_id, provider, story_id, phase, duration_ms)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                samples,
+            )
+            conn.execute(
+                """
+                DELETE FROM run_metrics
+                WHERE run_id IS NULL OR run_id NOT IN (
+                    SELECT DISTINCT run_id FROM run_metrics
+                    WHERE run_id IS NOT NULL
+                    ORDER BY run_id DESC LIMIT ?
+                )
+                """,
+                (get_config("metrics.keep_runs", DEFAULT_METRICS_KEEP_RUNS),),
+            )
+
+        summary = summarize(samples)
+        for (provider, phase), stats in summary.items():
+            logger.info(
+                f"⏱️ {provider} {phase}: {stats['count']} lần | p50 {stats['p50_ms']:.0f}ms | p95 {stats['p95_ms']:.0f}ms"
+            )
+        export_path = get_config("metrics.export_path", "")
+        if export and export_path:
+            write_export(export_path, get_config("metrics.export_format", "prometheus"), summary, phase_metrics.run_id)
+
+    def shutdown(self):
+        self.delivery_worker.stop(get_config("discord.outbox_drain_timeout_sec", DEFAULT_OUTBOX_DRAIN_TIMEOUT_SEC))
+        pending = self.outbox.pending_count()
+        if pending:
+            logger.warning(f"📮 Còn {pending} tin nhắn chờ gửi, sẽ gửi ở lần chạy sau.")
+        self.save_run_metrics()
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+            self.parse_pool = None
+        close_sessions()
+        # Also writes the Discord cassette when `[http] transport = "record"`.
+        self.discord_client.close()
+        self.storage.close()
+
+    def run(self):
+        logger.info("🚀 Đang khởi động...")
+        self.start_delivery()
+        try:
+            self.run_cycle()
+        finally:
+            self.shutdown()
@@ -0,0 +1,166 @@
+import math
+from array import array
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence
+
+from .scheduler import (
+    DEFAULT_CHECKS_PER_CHAPTER,
+    DEFAULT_MAX_INTERVAL_HOURS,
+    DEFAULT_MIN_INTERVAL_HOURS,
+    DEFAULT_STALE_BACKOFF_RATIO,
+    DEFAULT_UNKNOWN_INTERVAL_HOURS,
+    STALE_THRESHOLD_DAYS,
+    _setting,
+    parse_check_time,
+)
+from .story import Story
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+    HAS_NUMPY = False
+
+# Day number of a missing or malformed `YYYY-MM-DD` date; sorts after every real date.
+MISSING_DAY = -(2 ** 31)
+NAN = float("nan")
+
+
+@lru_cache(maxsize=8192)
+def date_to_day(value: Optional[str]) -> int:
+    """
+        Converts a stored `YYYY-MM-DD` date to its day number (`date.toordinal`), MISSING_DAY if it is not one.
+
+        Stories share few distinct dates, so the parse is cached.
+    """
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return MISSING_DAY
+
+
+def _check_timestamp(value: Optional[str]) -> float:
+    check_time = parse_check_time(value)
+    return check_time.timestamp() if check_time is not None else NAN
+
+
+class StoryCatalog:
+    def __init__(self, stories: Sequence[Story]):
+        """
+            Column view of a list of stories for the per-run decisions taken over all of them at once.
+
+            Each date is parsed once into an `array` column: the latest chapter and last full fetch as day
+            numbers, `next_check_at` as a timestamp, the chapter EMA, the error flag and the source. Due
+            sets, success intervals (staleness included) and the update-date order are then computed per
+            column, with NumPy (zero-copy views of the arrays) when it is installed and plain loops otherwise.
+
+            Args:
+                stories (Sequence[Story]): The stories, in the order indices refer to.
+        """
+        self.stories = list(stories)
+        self.sources: List[str] = sorted({story.source for story in self.stories})
+        source_codes = {source: code for code, source in enumerate(self.sources)}
+
+        self.latest_day = array("q", (date_to_day(story.latest_chapter_date) for story in self.stories))
+        self.success_day = array("q", (date_to_day(story.last_success_date) for story in self.stories))
+        self.next_check = array("d", (_check_timestamp(story.next_check_at) for story in self.stories))
+        self.avg_days = array("d", (
+            NAN if story.avg_days_per_chapter is None else story.avg_days_per_chapter for story in self.stories
+        ))
+        self.flagged = array("b", (bool(story.error or story.force_check) for story in self.stories))
+        self.source = array("h", (source_codes[story.source] for story in self.stories))
+
+    def __len__(self) -> int:
+        return len(self.stories)
+
+    @staticmethod
+    def _view(column: array):
+        return np.frombuffer(column, dtype=column.typecode)
+
+    def _source_enabled(self, disabled: Iterable[str]) -> List[bool]:
+        disabled = set(disabled)
+        return [source not in disabled for source in self.sources]
+
+    def due_indices(self, now: datetime, disabled: Iterable[str] = ()) -> List[int]:
+        """
+            Indices of the stories to fetch now, like `Story.get_skip_reason() is None`: the source is
+            enabled and the story carries an error, was listed, was never scheduled or its
+            `next_check_at` has passed.
+        """
+        enabled = self._source_enabled(disabled)
+        now_ts = now.timestamp()
+        if HAS_NUMPY:
+            next_check = self._view(self.next_check)
+            # NaN (never scheduled) compares False, so `not (next_check > now)` keeps it due.
+            due = (self._view(self.flagged) != 0) | ~(next_check > now_ts)
+            due &= np.asarray(enabled, dtype=bool)[self._view(self.source)]
+            return np.flatnonzero(due).tolist()
+        return [
+            index for index, (flagged, next_check, source)
+            in enumerate(zip(self.flagged, self.next_check, self.source))
+            if enabled[source] and (flagged or not next_check > now_ts)
+        ]
+
+    def due(self, now: datetime, disabled: Iterable[str] = ()) -> List[Story]:
+        return [self.stories[index] for index in self.due_indices(now, disabled)]
+
+    def days_since_update(self, today: date):
+        """
+            Days since each story's latest chapter, None (NaN with NumPy) when its date is unknown.
+        """
+        today_day = today.toordinal()
+        if HAS_NUMPY:
+            latest = self._view(self.latest_day)
+            return np.where(latest == MISSING_DAY, np.nan, today_day - latest)
+        return [None if day == MISSING_DAY else today_day - day for day in self.latest_day]
+
+    def success_interval_hours(self, now: datetime) -> List[float]:
+        """
+            `scheduler.success_interval` of every story, in hours: the EMA split into `checks_per_chapter`
+            checks (or `unknown_interval_hours`), stretched for stale stories and clamped.
+        """
+        unknown_hours = _setting("unknown_interval_hours", DEFAULT_UNKNOWN_INTERVAL_HOURS)
+        checks = _setting("checks_per_chapter", DEFAULT_CHECKS_PER_CHAPTER)
+        stale_ratio = _setting("stale_backoff_ratio", DEFAULT_STALE_BACKOFF_RATIO)
+        min_hours = _setting("min_interval_hours", DEFAULT_MIN_INTERVAL_HOURS)
+        max_hours = _setting("max_interval_hours", DEFAULT_MAX_INTERVAL_HOURS)
+        days = self.days_since_update(now.date())
+
+        if HAS_NUMPY:
+            avg = self._view(self.avg_days)
+            hours = np.where(np.isnan(avg), unknown_hours, avg * 24 / checks)
+            stale = days >= STALE_THRESHOLD_DAYS
+            hours = np.where(stale, np.maximum(hours, days * 24 * stale_ratio), hours)
+            return np.clip(hours, min_hours, max_hours).tolist()
+
+        result = []
+        for avg, day in zip(self.avg_days, days):
+            hours = unknown_hours if math.isnan(avg) else avg * 24 / checks
+            if day is not None and day >= STALE_THRESHOLD_DAYS:
+                hours = max(hours, day * 24 * stale_ratio)
+            result.append(min(max(hours, min_hours), max_hours))
+        return result
+
+    def success_not_after(self, before: date) -> List[bool]:
+        """
+            Whether each story's last full fetch is unknown or not later than `before`.
+        """
+        before_day = before.toordinal()
+        if HAS_NUMPY:
+            success = self._view(self.success_day)
+            return ((success == MISSING_DAY) | (success <= before_day)).tolist()
+        return [day == MISSING_DAY or day <= before_day for day in self.success_day]
+
+    def update_order(self) -> List[int]:
+        """
+            Indices of the stories from the newest latest chapter to the oldest; unknown dates come last
+            and ties keep their order.
+        """
+        if HAS_NUMPY:
+            return np.argsort(-self._view(self.latest_day), kind="stable").tolist()
+        return sorted(range(len(self.stories)), key=self.latest_day.__getitem__, reverse=True)
+
+    def sorted_by_update_date(self) -> List[Story]:
+        return [self.stories[index] for index in self.update_order()]
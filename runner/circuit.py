@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict
+
+from logger import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN_SEC = 1800
+
+
+@dataclass
+class HostCircuit:
+    failures: int = 0
+    # Epoch seconds the circuit opened at, None while it is closed.
+    opened_at: float | None = None
+    probing: bool = False
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 cooldown_sec: float = DEFAULT_COOLDOWN_SEC, state: str | None = None):
+        """
+            Stops fetching from a host after several consecutive failures.
+
+            After `failure_threshold` failures in a row the host's circuit opens: its remaining stories
+            are deferred instead of fetched. Once `cooldown_sec` has passed, a single story probes the
+            host (the other fetches of that host wait for it); a success closes the circuit, a failure
+            opens it for another cooldown. Open circuits are saved with `dumps()`, so the next run starts
+            with the probe instead of hitting a host that is still down.
+
+            Args:
+                failure_threshold (int): Consecutive failures that open a circuit.
+                cooldown_sec (float): How long an open circuit defers its host before a probe.
+                state (str | None): The JSON returned by `dumps()` on a previous run.
+        """
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.cooldown_sec = cooldown_sec
+        self.deferred = 0
+        self._circuits: Dict[str, HostCircuit] = {}
+        self._cond = threading.Condition()
+        for host, opened_at in json.loads(state or "{}").items():
+            self._circuits[host] = HostCircuit(failures=self.failure_threshold, opened_at=opened_at)
+
+    def dumps(self) -> str:
+        with self._cond:
+            return json.dumps({
+                host: circuit.opened_at
+                for host, circuit in sorted(self._circuits.items())
+                if circuit.opened_at is not None
+            })
+
+    def retry_at(self, host: str) -> datetime:
+        """
+            Returns when the host may be probed again; now if its circuit is closed.
+        """
+        with self._cond:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return datetime.now()
+            return datetime.fromtimestamp(circuit.opened_at + self.cooldown_sec)
+
+    def acquire(self, host: str) -> bool:
+        """
+            Asks to send one request to `host`.
+
+            Returns:
+                bool: True if the request may go out; it must then be reported with `record()` or
+                    `release()`. False if the host is deferred.
+        """
+        with self._cond:
+            while True:
+                circuit = self._circuits.setdefault(host, HostCircuit())
+                if circuit.opened_at is None:
+                    return True
+                if time.time() < circuit.opened_at + self.cooldown_sec:
+                    self.deferred += 1
+                    return False
+                if not circuit.probing:
+                    circuit.probing = True
+                    return True
+                self._cond.wait()
+
+    def record(self, host: str, success: bool):
+        with self._cond:
+            circuit = self._circuits.setdefault(host, HostCircuit())
+            if success:
+                if circuit.opened_at is not None:
+                    logger.info(f"🔌 {host} hoạt động lại, đóng ngắt mạch.")
+                circuit.failures = 0
+                circuit.opened_at = None
+            else:
+                circuit.failures += 1
+                if circuit.probing or (circuit.opened_at is None and circuit.failures >= self.failure_threshold):
+                    circuit.opened_at = time.time()
+                    logger.warning(
+                        f"🔌 {host} lỗi {circuit.failures} lần liên tiếp, tạm ngưng {self.cooldown_sec:.0f}s."
+                    )
+            circuit.probing = False
+            self._cond.notify_all()
+
+    def release(self, host: str):
+        """
+            Gives back an `acquire()` that did not lead to a request.
+        """
+        with self._cond:
+            circuit = self._circuits.get(host)
+            if circuit is not None:
+                circuit.probing = False
+            self._cond.notify_all()
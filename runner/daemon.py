@@ -0,0 +1,74 @@
+import signal
+import threading
+from datetime import datetime
+
+from logger import setup_logger
+from utils.config import get_config
+from . import Runner
+
+logger = setup_logger()
+
+DEFAULT_MIN_SLEEP_SEC = 60
+DEFAULT_MAX_SLEEP_SEC = 900
+
+
+class Daemon:
+    def __init__(self, runner: Runner):
+        """
+            Keeps one Runner resident and runs a cycle whenever stories become due.
+
+            The config, HTTP sessions, SQLite connection, validator cache and delivery worker stay warm
+            between cycles; each cycle only loads the stories that are due. Notifications are queued
+            without the console prompt.
+
+            Args:
+                runner (Runner): The runner to drive.
+        """
+        self.runner = runner
+        self.min_sleep_sec = get_config("daemon.min_sleep_sec", DEFAULT_MIN_SLEEP_SEC)
+        self.max_sleep_sec = get_config("daemon.max_sleep_sec", DEFAULT_MAX_SLEEP_SEC)
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        logger.info("🛑 Nhận tín hiệu dừng, kết thúc sau chu kỳ hiện tại...")
+        self._stop.set()
+
+    def sleep_seconds(self, now: datetime) -> float:
+        """
+            Seconds until the next story is due, kept within `[min_sleep_sec, max_sleep_sec]`.
+            The upper bound also paces the listing detectors and retries of stories with an error.
+        """
+        next_due = self.runner.next_due_at()
+        if next_due is None:
+            return self.max_sleep_sec
+        return min(max((next_due - now).total_seconds(), self.min_sleep_sec), self.max_sleep_sec)
+
+    def _install_signal_handlers(self):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+    def serve(self, max_cycles: int | None = None):
+        """
+            Runs cycles until stopped (SIGINT/SIGTERM) or `max_cycles` cycles have run.
+        """
+        self._install_signal_handlers()
+        logger.info("🚀 Chạy chế độ daemon...")
+        self.runner.start_delivery()
+        cycles = 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.runner.run_cycle(auto_send=True)
+                except Exception as e:
+                    logger.error(f"❌ Chu kỳ daemon lỗi: {e}")
+                cycles += 1
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+
+                delay = self.sleep_seconds(datetime.now())
+                logger.info(f"💤 Chờ {delay:.0f}s tới lượt check tiếp theo.")
+                self._stop.wait(delay)
+        finally:
+            self.runner.shutdown()
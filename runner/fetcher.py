@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from consts import ProviderName
+from consts.enpoint import ENDPOINTS
+from logger import PrefixAdapter, setup_logger
+from utils.config import get_config
+from utils.metrics import phase_metrics
+from .circuit import CircuitBreaker
+from .story import Story
+
+logger = setup_logger()
+
+DEFAULT_HOST_CONCURRENCY = 2
+
+
+def get_source_host(source: str) -> str:
+    """
+        Resolves the network host a story source is fetched from.
+
+        Args:
+            source (str): The story source, e.g. "truyenqqto".
+
+        Returns:
+            str: The host of the source endpoint, or the source itself if unknown.
+    """
+    try:
+        return urlparse(ENDPOINTS[ProviderName(source)]).netloc or source
+    except (KeyError, ValueError):
+        return source
+
+
+def fetch_story(story: Story, breaker: CircuitBreaker | None = None) -> bool:
+    """
+        Runs `Story.get_latest_chapter` unless the circuit of the story's host is open.
+
+        A deferred story is rescheduled to the host's next probe, without counting as a failure. Only host
+        failures (no connection, timeout, 5xx) count against the host; a story that fails on its own (a 404,
+        a page that does not parse) leaves the circuit as it is.
+
+        Args:
+            story (Story): The story to fetch.
+            breaker (CircuitBreaker | None): Per-host breaker shared by the run, if any.
+
+        Returns:
+            bool: True if a request was made.
+    """
+    host = get_source_host(story.source)
+    if breaker is not None and not breaker.acquire(host):
+        story.defer_until(breaker.retry_at(host))
+        story.logger.info(f"{story.title} -> Hoãn tới {story.next_check_at} ({host} đang ngắt mạch)")
+        return False
+
+    started = time.perf_counter()
+    attempted = story.get_latest_chapter()
+    if attempted:
+        phase_metrics.record("fetch", (time.perf_counter() - started) * 1000, story.source, story.id)
+    if breaker is None:
+        return attempted
+    if attempted and (not story.fetch_failed or story.host_failed):
+        breaker.record(host, not story.fetch_failed)
+    else:
+        breaker.release(host)
+    return attempted
+
+
+class HostLimiter:
+    def __init__(self, stories: List[Story], delay_sec: float):
+        """
+            Builds one semaphore per source host.
+
+            Each host gets `provider.<source>.max_concurrency` slots. A slot is held for
+            `delay_sec` after its request, so every slot keeps the same pacing the
+            sequential loop used, as long as the host still has work queued.
+
+            Args:
+                stories (List[Story]): The stories that will be fetched.
+                delay_sec (float): Delay between two requests on the same slot.
+        """
+        self.delay_sec = delay_sec or 0
+        self._lock = threading.Lock()
+        self._pending: Counter = Counter()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+
+        for story in stories:
+            host = get_source_host(story.source)
+            self._pending[host] += 1
+            if host not in self._semaphores:
+                limit = get_config(f"provider.{story.source}.max_concurrency", DEFAULT_HOST_CONCURRENCY)
+                self._semaphores[host] = threading.Semaphore(max(1, int(limit)))
+
+    @contextmanager
+    def slot(self, source: str):
+        """
+            Holds one slot of the source's host. Set `requested = False` on the yielded object when no
+            request was sent, so the slot is handed over without the pacing delay.
+        """
+        host = get_source_host(source)
+        semaphore = self._semaphores[host]
+        with semaphore:
+            use = SimpleNamespace(requested=True)
+            try:
+                yield use
+            finally:
+                with self._lock:
+                    self._pending[host] -= 1
+                    has_more = self._pending[host] > 0
+                if use.requested and has_more and self.delay_sec > 0:
+                    time.sleep(self.delay_sec)
+
+
+class ConcurrentFetcher:
+    def __init__(self, max_workers: int, delay_sec: float):
+        """
+            Fetches stories on a thread pool with a concurrency cap per source host.
+
+            Args:
+                max_workers (int): Size of the worker pool shared by all hosts.
+                delay_sec (float): Delay between two requests on the same host slot.
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.delay_sec = delay_sec
+
+    @staticmethod
+    def _fetch_one(story: Story, limiter: HostLimiter, breaker: CircuitBreaker | None):
+        with limiter.slot(story.source) as slot:
+            slot.requested = fetch_story(story, breaker)
+
+    def run(self, stories: List[Story], breaker: CircuitBreaker | None = None):
+        """
+            Runs `Story.get_latest_chapter` for every story and waits for all of them.
+
+            Log prefixes are assigned up front, so they keep the `[index/total]` numbering
+            of the sequential loop even though stories finish out of order.
+
+            Args:
+                stories (List[Story]): The stories to fetch.
+                breaker (CircuitBreaker | None): Defers the stories of hosts that keep failing.
+        """
+        if not stories:
+            return
+
+        limiter = HostLimiter(stories, self.delay_sec)
+        for index, story in enumerate(stories):
+            story.logger = PrefixAdapter(logger, {"prefix": f"[{index + 1}/{len(stories)}] - "})
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch") as pool:
+            futures = {pool.submit(self._fetch_one, story, limiter, breaker): story for story in stories}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    story = futures[future]
+                    story.logger.error(f"{story.title} -> {e}")
@@ -0,0 +1,224 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple
+
+from logger import setup_logger
+from utils.discord import DiscordClient
+from utils.metrics import phase_metrics
+from .scheduler import format_check_time
+from .storage import Storage
+
+logger = setup_logger()
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_DEAD = "dead"
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_RETRY_BASE_SEC = 30
+MAX_RETRY_DELAY_SEC = 6 * 3600
+DEFAULT_POLL_INTERVAL_SEC = 5
+DELIVERY_BATCH_SIZE = 50
+# Discord accepts a nonce of at most 25 characters.
+NONCE_LENGTH = 25
+
+
+class OutboxMessage(NamedTuple):
+    idempotency_key: str
+    channel_id: str
+    content: str
+
+
+def message_nonce(idempotency_key: str) -> str:
+    """
+        Derives the Discord nonce of a message, so a retried POST after a lost response is not posted twice.
+    """
+    return hashlib.sha1(idempotency_key.encode("utf-8")).hexdigest()[:NONCE_LENGTH]
+
+
+class Outbox:
+    def __init__(self, storage: Storage, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 retry_base_sec: float = DEFAULT_RETRY_BASE_SEC):
+        """
+            Discord messages waiting for delivery, stored in the `notification_outbox` table.
+
+            Args:
+                storage (Storage): The database the outbox lives in.
+                max_attempts (int): Failed sends after which a message is given up (`dead`).
+                retry_base_sec (float): Wait after the first failure, doubled after each further one.
+        """
+        self.storage = storage
+        self.max_attempts = max_attempts
+        self.retry_base_sec = retry_base_sec
+
+    def enqueue(self, messages: List[OutboxMessage]) -> int:
+        """
+            Adds messages to the outbox. A message whose idempotency key is already queued (or was sent)
+            is ignored.
+
+            Returns:
+                int: The number of messages actually added.
+        """
+        now = format_check_time(datetime.now())
+        with self.storage.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT INTO notification_outbox (
+                    idempotency_key, channel_id, content, status, next_attempt_at, created_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(idempotency_key) DO NOTHING
+                """,
+                [(m.idempotency_key, str(m.channel_id), m.content, STATUS_PENDING, now, now) for m in messages],
+            )
+            return conn.total_changes - before
+
+    def due(self, now: datetime, limit: int = DELIVERY_BATCH_SIZE) -> List[dict]:
+        """
+            Returns the pending messages whose retry time has come, oldest first. A message waits while an
+            older message of its channel is still backing off, so each channel receives them in order.
+        """
+        now_str = format_check_time(now)
+        with self.storage.transaction() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, idempotency_key, channel_id, content, attempts
+                FROM notification_outbox AS message
+                WHERE status = ? AND next_attempt_at <= ?
+                  AND NOT EXISTS (
+                    SELECT 1
+                    FROM notification_outbox AS earlier
+                    WHERE earlier.channel_id = message.channel_id
+                      AND earlier.id < message.id
+                      AND earlier.status = ?
+                      AND earlier.next_attempt_at > ?
+                  )
+                ORDER BY id
+                LIMIT ?
+                """,
+                (STATUS_PENDING, now_str, STATUS_PENDING, now_str, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def pending_count(self) -> int:
+        with self.storage.transaction() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM notification_outbox WHERE status = ?", (STATUS_PENDING,)
+            ).fetchone()
+        return row[0]
+
+    def mark_sent(self, message_id: int):
+        with self.storage.transaction() as conn:
+            conn.execute(
+                "UPDATE notification_outbox SET status = ?, sent_at = ?, last_error = NULL WHERE id = ?",
+                (STATUS_SENT, format_check_time(datetime.now()), message_id),
+            )
+
+    def mark_failed(self, message: dict, error: str):
+        attempts = message["attempts"] + 1
+        status = STATUS_DEAD if attempts >= self.max_attempts else STATUS_PENDING
+        delay = min(self.retry_base_sec * 2 ** (attempts - 1), MAX_RETRY_DELAY_SEC)
+        next_attempt_at = format_check_time(datetime.now() + timedelta(seconds=delay))
+        with self.storage.transaction() as conn:
+            conn.execute(
+                """
+                UPDATE notification_outbox
+                SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?
+                WHERE id = ?
+                """,
+                (status, attempts, error, next_attempt_at, message["id"]),
+            )
+        if status == STATUS_DEAD:
+            logger.error(f"❌ Bỏ tin nhắn {message['idempotency_key']} sau {attempts} lần gửi lỗi: {error}")
+
+
+class DeliveryWorker:
+    def __init__(self, outbox: Outbox, client: DiscordClient, send_concurrency: int,
+                 poll_interval_sec: float = DEFAULT_POLL_INTERVAL_SEC):
+        """
+            Background thread that drains the outbox into Discord.
+
+            Messages of different channels are sent concurrently; the messages of one channel keep their
+            queue order, and the first failure in a channel defers the rest of that channel to a later pass.
+
+            Args:
+                outbox (Outbox): The queue to drain.
+                client (DiscordClient): The rate-limit-aware client used to send.
+                send_concurrency (int): Channels sent to at the same time.
+                poll_interval_sec (float): Wait between two passes when nothing is due.
+        """
+        self.outbox = outbox
+        self.client = client
+        self.send_concurrency = max(send_concurrency, 1)
+        self.poll_interval_sec = poll_interval_sec
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._draining = False
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="discord-outbox", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, drain_timeout_sec: float = 0):
+        """
+            Stops the worker once no message is due any more, waiting at most `drain_timeout_sec`.
+            Messages still pending stay in the outbox for the next run.
+        """
+        if self._thread is None:
+            return
+        self._draining = True
+        self.wake()
+        self._thread.join(drain_timeout_sec)
+        self._stop.set()
+        self.wake()
+        self._thread.join()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                delivered = self.deliver_due()
+            except Exception as e:
+                logger.error(f"❌ Outbox worker lỗi: {e}")
+                delivered = 0
+            if delivered == 0 and self._draining:
+                return
+            if delivered == 0:
+                self._wake.wait(self.poll_interval_sec)
+                self._wake.clear()
+
+    def deliver_due(self) -> int:
+        """
+            Sends one batch of due messages.
+
+            Returns:
+                int: The number of messages attempted.
+        """
+        batch = self.outbox.due(datetime.now())
+        if not batch:
+            return 0
+
+        by_channel: Dict[str, List[dict]] = {}
+        for message in batch:
+            by_channel.setdefault(message["channel_id"], []).append(message)
+
+        with ThreadPoolExecutor(max_workers=min(self.send_concurrency, len(by_channel))) as executor:
+            list(executor.map(self._deliver_channel, by_channel.values()))
+        return len(batch)
+
+    def _deliver_channel(self, messages: List[dict]):
+        for message in messages:
+            try:
+                with phase_metrics.timed("discord_send", "discord", message["channel_id"]):
+                    self.client.send_message(message["channel_id"], message["content"],
+                                             nonce=message_nonce(message["idempotency_key"]))
+            except Exception as e:
+                self.outbox.mark_failed(message, str(e))
+                return
+            self.outbox.mark_sent(message["id"])
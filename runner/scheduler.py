@@ -0,0 +1,88 @@
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from utils.config import get_config
+
+STALE_THRESHOLD_DAYS = 45
+DEFAULT_MIN_INTERVAL_HOURS = 3
+DEFAULT_MAX_INTERVAL_HOURS = 240
+DEFAULT_UNKNOWN_INTERVAL_HOURS = 24
+# How many checks to spend per expected chapter period, e.g. 2 -> a weekly story is checked every 3.5 days.
+DEFAULT_CHECKS_PER_CHAPTER = 2
+# Share of the time since the last chapter used as interval once a story goes stale.
+DEFAULT_STALE_BACKOFF_RATIO = 0.1
+DEFAULT_FAILURE_RETRY_HOURS = 1
+# Share of a failure delay that is randomized, so stories that failed together do not retry together.
+DEFAULT_FAILURE_JITTER_RATIO = 0.5
+
+
+def _setting(key: str, default: float) -> float:
+    return get_config(f"scheduler.{key}", default)
+
+
+def _clamp(hours: float) -> timedelta:
+    min_hours = _setting("min_interval_hours", DEFAULT_MIN_INTERVAL_HOURS)
+    max_hours = _setting("max_interval_hours", DEFAULT_MAX_INTERVAL_HOURS)
+    return timedelta(hours=min(max(hours, min_hours), max_hours))
+
+
+def success_interval(avg_days_per_chapter: Optional[float], days_since_update: Optional[int]) -> timedelta:
+    """
+        Computes how long to wait before checking a story again after a successful check.
+
+        The interval follows the story's update rhythm: its `avg_days_per_chapter` EMA split
+        into `checks_per_chapter` checks. Once the story has not updated for
+        `STALE_THRESHOLD_DAYS`, the interval grows with the time since the last chapter.
+        The result is clamped to `[min_interval_hours, max_interval_hours]`.
+
+        Args:
+            avg_days_per_chapter (Optional[float]): The EMA of days between chapters, None if unknown.
+            days_since_update (Optional[int]): Days since the latest chapter, None if unknown.
+
+        Returns:
+            timedelta: The wait before the next check.
+    """
+    if avg_days_per_chapter is None:
+        hours = _setting("unknown_interval_hours", DEFAULT_UNKNOWN_INTERVAL_HOURS)
+    else:
+        hours = avg_days_per_chapter * 24 / _setting("checks_per_chapter", DEFAULT_CHECKS_PER_CHAPTER)
+
+    if days_since_update is not None and days_since_update >= STALE_THRESHOLD_DAYS:
+        stale_hours = days_since_update * 24 * _setting("stale_backoff_ratio", DEFAULT_STALE_BACKOFF_RATIO)
+        hours = max(hours, stale_hours)
+
+    return _clamp(hours)
+
+
+def failure_interval(error_count: int) -> timedelta:
+    """
+        Computes how long to wait before retrying a story whose last fetch failed.
+
+        The delay doubles with each consecutive failure (`failure_retry_hours` x 2^(n-1)), capped at
+        `max_interval_hours`. The last `failure_jitter_ratio` of it is drawn at random.
+
+        Args:
+            error_count (int): Consecutive failed fetches, including the one just recorded.
+
+        Returns:
+            timedelta: The wait before the next attempt.
+    """
+    retry_hours = _setting("failure_retry_hours", DEFAULT_FAILURE_RETRY_HOURS)
+    max_hours = _setting("max_interval_hours", DEFAULT_MAX_INTERVAL_HOURS)
+    jitter_ratio = _setting("failure_jitter_ratio", DEFAULT_FAILURE_JITTER_RATIO)
+    hours = min(retry_hours * 2 ** (max(error_count, 1) - 1), max_hours)
+    return timedelta(hours=hours * (1 - jitter_ratio * random.random()))
+
+
+def format_check_time(value: datetime) -> str:
+    return value.isoformat(timespec="seconds")
+
+
+def parse_check_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
@@ -0,0 +1,274 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+MEMORY_DB_PATH = ":memory:"
+# Prepared statements kept per connection; Runner issues a few dozen distinct queries.
+STATEMENT_CACHE_SIZE = 128
+# Negative values are KiB for `PRAGMA cache_size`.
+DEFAULT_CACHE_SIZE_KIB = 16 * 1024
+PRAGMAS = (
+    # WAL keeps readers (e.g. a JSON export or a second process) unblocked while a run writes.
+    "PRAGMA journal_mode=WAL",
+    # Safe with WAL: a power loss can drop the last commits, never corrupt the file.
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA cache_size=-{DEFAULT_CACHE_SIZE_KIB}",
+    "PRAGMA temp_store=MEMORY",
+)
+# Columns added to `stories` after the first release, created on older databases at startup.
+STORY_EXTRA_COLUMNS = {
+    "source_meta": "TEXT",
+    "next_check_at": "TEXT",
+}
+# Date columns written as dd/mm/yyyy TEXT before schema version 2 and as ISO `YYYY-MM-DD` since.
+STORY_DATE_COLUMNS = ("latest_chapter_date", "last_check_date", "next_check_date", "last_success_date")
+# `app_state` entries holding a date.
+DATE_STATE_KEYS = ("last_json_sync_date", "tracking_json_migrated_date")
+
+
+def iso_date_sql(column: str) -> str:
+    """
+        SQL expression converting a dd/mm/yyyy `column` to `YYYY-MM-DD`; other values are kept as they are.
+    """
+    return (
+        f"CASE WHEN {column} LIKE '__/__/____' THEN substr({column}, 7, 4) || '-' || substr({column}, 4, 2)"
+        f" || '-' || substr({column}, 1, 2) ELSE {column} END"
+    )
+
+
+# Rows scheduled before `next_check_at` existed become due from the start of their `next_check_date`,
+# or right away without one, so the due query can stay a range scan on the index.
+BACKFILL_NEXT_CHECK_AT_SQL = f"""
+    UPDATE stories
+    SET next_check_at = CASE
+        WHEN next_check_date LIKE '__/__/____' OR next_check_date LIKE '____-__-__'
+            THEN {iso_date_sql("next_check_date")} || 'T00:00:00'
+        ELSE strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')
+    END
+    WHERE next_check_at IS NULL
+"""
+
+
+class Storage:
+    def __init__(self, db_path: str):
+        """
+            Opens the SQLite database once for the lifetime of the runner and creates the schema.
+
+            The connection is shared between threads; `transaction()` serializes access with a lock,
+            so fetch workers and the main thread never use it at the same time.
+
+            Args:
+                db_path (str): Path of the database file, or `:memory:` for a throwaway database
+                    (benchmarks, tests).
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        self._conn.row_factory = sqlite3.Row
+        try:
+            for pragma in PRAGMAS:
+                self._conn.execute(pragma)
+            with self.transaction() as conn:
+                self._migrate(conn)
+                conn.execute(BACKFILL_NEXT_CHECK_AT_SQL)
+        except BaseException:
+            # Nobody gets a Storage to close; closing here also removes the -wal/-shm files.
+            self._conn.close()
+            raise
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+            Yields the shared connection and commits on exit, or rolls back if the block raised.
+        """
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_state(self, key: str) -> str | None:
+        with self.transaction() as conn:
+            row = conn.execute("SELECT value FROM app_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_state(self, key: str, value: str):
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO app_state (key, value)
+                VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                """,
+                (key, value),
+            )
+
+    @property
+    def schema_version(self) -> int:
+        with self.transaction() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """
+            Brings the schema to `SCHEMA_VERSION`, tracked in `PRAGMA user_version`.
+
+            Pending migrations run in order inside one explicit transaction together with the version
+            bump, so an interrupted upgrade leaves the database exactly as it was. Databases created
+            before versioning are at version 0; the baseline migration only adds what they lack.
+        """
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        # Without it, sqlite3 would run the DDL statements below in autocommit mode.
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _create_baseline_schema(conn: sqlite3.Connection):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stories (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                source TEXT NOT NULL,
+                channel_id INTEGER NOT NULL,
+                last_chapter INTEGER NOT NULL,
+                latest_chapter_date TEXT NOT NULL,
+                error TEXT,
+                last_check_date TEXT,
+                avg_days_per_chapter REAL,
+                next_check_date TEXT,
+                last_success_date TEXT,
+                error_count INTEGER NOT NULL DEFAULT 0,
+                source_meta TEXT,
+                next_check_at TEXT
+            )
+            """
+        )
+        Storage._ensure_columns(conn, "stories", STORY_EXTRA_COLUMNS)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stories_next_check_at ON stories(next_check_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stories_error ON stories(error) WHERE error IS NOT NULL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS story_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel_id TEXT NOT NULL,
+                snapshot_date TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                avg_days_per_chapter REAL,
+                created_at TEXT NOT NULL DEFAULT (datetime('now')),
+                UNIQUE(channel_id, snapshot_date)
+            )
+            """
+        )
+        # Serves the per-channel "newest N snapshots" prune in `Runner.update_tracking`.
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_story_snapshots_channel ON story_snapshots(channel_id, id)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS app_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                channel_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TEXT NOT NULL,
+                last_error TEXT,
+                created_at TEXT NOT NULL,
+                sent_at TEXT
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_pending ON notification_outbox(next_attempt_at) "
+            "WHERE status = 'pending'"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_channel ON notification_outbox(channel_id, id)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                provider TEXT,
+                story_id TEXT,
+                phase TEXT NOT NULL,
+                duration_ms REAL NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (datetime('now'))
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_run_metrics_run ON run_metrics(run_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_run_metrics_provider ON run_metrics(provider, phase)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS provider_mirrors (
+                provider TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                healthy INTEGER NOT NULL DEFAULT 1,
+                latency_ms REAL,
+                failures INTEGER NOT NULL DEFAULT 0,
+                last_probe_at TEXT,
+                PRIMARY KEY (provider, origin)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_length INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+
+    @staticmethod
+    def _ensure_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]):
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+    @staticmethod
+    def _convert_dates_to_iso(conn: sqlite3.Connection):
+        """
+            Rewrites the dd/mm/yyyy dates of `stories`, `story_snapshots` and `app_state` as `YYYY-MM-DD`,
+            which sort and compare as text, and indexes `latest_chapter_date` for the update-date order.
+        """
+        assignments = ", ".join(f"{column} = {iso_date_sql(column)}" for column in STORY_DATE_COLUMNS)
+        conn.execute(f"UPDATE stories SET {assignments}")
+        conn.execute(f"UPDATE story_snapshots SET snapshot_date = {iso_date_sql('snapshot_date')}")
+        conn.execute(
+            f"UPDATE app_state SET value = {iso_date_sql('value')} "
+            f"WHERE key IN ({','.join('?' for _ in DATE_STATE_KEYS)})",
+            DATE_STATE_KEYS,
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stories_latest_chapter_date ON stories(latest_chapter_date)")
+
+
+# Schema migrations, applied in order; `PRAGMA user_version` is the number already applied.
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    Storage._create_baseline_schema,
+    Storage._convert_dates_to_iso,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
@@ -1,19 +1,36 @@
+import json
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from logging import LoggerAdapter, getLogger
 from typing import Literal, Optional
 
+import requests
+
 from consts.errors import StoryError
-from models.story_info import StoryStatus
-from providers import PROVIDER_MAP
+from models.story_info import StoryRef, StoryStatus
+from providers import get_provider
 from providers.base import BaseProvider
+from providers.mirrors import is_mirror_failure
+from utils.config import get_config
+from utils.datetime import ISO_DATE_FORMAT, to_display_date, to_iso_date
+from utils.metrics import phase_metrics
+from .scheduler import failure_interval, format_check_time, parse_check_time, success_interval
 
 EMA_ALPHA = 0.3
-STALE_THRESHOLD_DAYS = 45
+# Fields stored in the `stories` table; assigning a new value to one of them marks the story dirty.
+PERSISTED_FIELDS = frozenset({
+    "id", "title", "source", "channel_id", "last_chapter", "latest_chapter_date", "error", "last_check_date",
+    "avg_days_per_chapter", "next_check_date", "next_check_at", "last_success_date", "error_count", "source_meta",
+})
+# Day fields, kept as ISO `YYYY-MM-DD`; dd/mm/yyyy values (data.json, older rows) are converted on construction.
+DATE_FIELDS = ("latest_chapter_date", "last_check_date", "next_check_date", "last_success_date")
 
 
-@dataclass
+# Slots keep a tracked story small: no per-instance `__dict__`, and the provider is shared per source.
+@dataclass(slots=True)
 class Story:
+    # Declared first so `__init__` sets it before any tracked field; None until the story is built.
+    _dirty: Optional[set] = field(default=None, init=False, repr=False, compare=False)
     id: str
     title: str
     source: str
@@ -24,14 +41,29 @@ class Story:
     last_check_date: Optional[str] = None
     avg_days_per_chapter: Optional[float] = None
     next_check_date: Optional[str] = None
+    next_check_at: Optional[str] = None
     last_success_date: Optional[str] = None
     error_count: int = 0
+    source_meta: Optional[dict] = None
 
     is_new_chapter: bool = False
     is_completed: bool = False
     new_chapters_count: int = 0
-    provider: BaseProvider = None
+    force_check: bool = False
+    fetch_failed: bool = False
+    # The failure came from the host (no connection, timeout, 5xx), not from this story's page.
+    host_failed: bool = False
+    provider: BaseProvider = field(default=None, repr=False, compare=False)
     logger: LoggerAdapter = field(default=getLogger("story"), repr=False, compare=False)
+    _clean_source_meta: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        if name in PERSISTED_FIELDS:
+            dirty = self._dirty
+            if dirty is not None and getattr(self, name) != value:
+                dirty.add(name)
+        # `super()` has no class cell in a slots dataclass, which is rebuilt by the decorator.
+        object.__setattr__(self, name, value)
 
     def __post_init__(self):
         if isinstance(self.error, str):
@@ -40,11 +72,15 @@ class Story:
             except ValueError:
                 self.error = None
 
-        self.provider = PROVIDER_MAP.get(self.source)
-        if self.provider:
-            self.provider = self.provider(self.id, self.last_chapter)
-        else:
-            raise ValueError(f"Provider {self.source} not found.")
+        if isinstance(self.source_meta, str):
+            self.source_meta = json.loads(self.source_meta)
+        if self.source_meta is None:
+            self.source_meta = {}
+
+        for name in DATE_FIELDS:
+            setattr(self, name, to_iso_date(getattr(self, name)))
+
+        self.provider = get_provider(self.source)
 
         if self.last_check_date is None:
             self.last_check_date = self.latest_chapter_date
@@ -52,6 +88,39 @@ class Story:
         if self.next_check_date is None:
             self.next_check_date = self.last_check_date
 
+        # Rows saved before `next_check_at` existed are due from the start of their `next_check_date`.
+        if self.next_check_at is None:
+            next_check = self._parse_date(self.next_check_date) or datetime.now()
+            self.next_check_at = format_check_time(next_check)
+
+        # A story built outside the database has never been written: every field is dirty.
+        self._dirty = set(PERSISTED_FIELDS)
+        self._clean_source_meta = None
+
+    def mark_clean(self):
+        """
+        Marks the story as matching its database row, e.g. after it was loaded or saved.
+        """
+        self._dirty = set()
+        self._clean_source_meta = dict(self.source_meta)
+
+    @property
+    def dirty_fields(self) -> set:
+        # `source_meta` is updated in place by the provider, so it is compared with its last saved value.
+        if self.source_meta != self._clean_source_meta:
+            return self._dirty | {"source_meta"}
+        return set(self._dirty)
+
+    def is_dirty(self) -> bool:
+        return bool(self.dirty_fields)
+
+    @property
+    def ref(self) -> StoryRef:
+        """
+        The story as its provider sees it. `source_meta` is shared, so what the provider stores lands here.
+        """
+        return StoryRef(self.id, self.last_chapter, self.source_meta)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -64,8 +133,10 @@ class Story:
             "last_check_date": self.last_check_date,
             "avg_days_per_chapter": self.avg_days_per_chapter,
             "next_check_date": self.next_check_date,
+            "next_check_at": self.next_check_at,
             "last_success_date": self.last_success_date,
             "error_count": self.error_count,
+            "source_meta": self.source_meta,
         }
 
     @staticmethod
@@ -73,69 +144,74 @@ class Story:
         if not value:
             return None
         try:
-            return datetime.strptime(value, "%d/%m/%Y")
+            return datetime.strptime(value, ISO_DATE_FORMAT)
         except ValueError:
             return None
 
     @staticmethod
     def _format_date(value: datetime) -> str:
-        return value.strftime("%d/%m/%Y")
-
-    def _get_skip_interval(self) -> int:
-        avg = self.avg_days_per_chapter
-        if avg is None:
-            return 7
-        if avg <= 2:
-            return 3
-        if avg <= 7:
-            return 5
-        if avg <= 14:
-            return 7
-        return 10
-
-    def _is_stale_story(self) -> bool:
+        return value.strftime(ISO_DATE_FORMAT)
+
+    def _days_since_update(self, now: datetime) -> Optional[int]:
         last_update = self._parse_date(self.latest_chapter_date)
         if last_update is None:
-            return False
-        days_since_update = (datetime.today() - last_update).days
-        return days_since_update >= STALE_THRESHOLD_DAYS
-
-    def _get_stale_next_due_date(self) -> Optional[datetime]:
-        if not self._is_stale_story():
-            return None
-        last_check = self._parse_date(self.last_check_date)
-        if last_check is None:
             return None
-        return last_check + timedelta(days=self._get_skip_interval())
-
-    def _should_skip_check(self) -> bool:
-        if self.error:
-            return False
-        next_due = self._get_stale_next_due_date()
-        if next_due is None:
-            return False
-        return datetime.today().date() < next_due.date()
-
-    def _schedule_next_check(self):
-        interval = 1
-        if self._is_stale_story():
-            interval = self._get_skip_interval()
-        self.next_check_date = self._format_date(datetime.today() + timedelta(days=interval))
+        return (now - last_update).days
+
+    def _set_next_check(self, next_check: datetime):
+        self.next_check_at = format_check_time(next_check)
+        self.next_check_date = self._format_date(next_check)
+
+    def is_due(self, now: Optional[datetime] = None) -> bool:
+        """
+        Returns True when the story should be fetched on this run: its `next_check_at` has passed,
+        it was never scheduled, it carries an error, or a listing asked for it (`force_check`).
+        """
+        if self.error or self.force_check:
+            return True
+        next_check = parse_check_time(self.next_check_at)
+        return next_check is None or next_check <= (now or datetime.now())
+
+    def _schedule_next_check(self, interval: Optional[timedelta] = None):
+        now = datetime.now()
+        if interval is None:
+            interval = success_interval(self.avg_days_per_chapter, self._days_since_update(now))
+        self._set_next_check(now + interval)
 
     def _mark_fetch_success(self, today_str: str):
-        self.last_success_date = today_str
-        self.error_count = 0
-        self._schedule_next_check()
+        with phase_metrics.timed("schedule", self.source, self.id):
+            self.last_success_date = today_str
+            self.error_count = 0
+            self._schedule_next_check()
 
     def _mark_fetch_failure(self, today_str: str):
-        self.error_count += 1
-        self.next_check_date = today_str
+        with phase_metrics.timed("schedule", self.source, self.id):
+            self.error_count += 1
+            self._set_next_check(datetime.now() + failure_interval(self.error_count))
+
+    def defer_until(self, next_check: datetime):
+        """
+        Postpones a check that was not attempted (its host is failing), leaving the error count alone.
+        """
+        self._set_next_check(next_check)
+
+    def mark_checked_by_listing(self, today_str: str, interval: Optional[timedelta] = None):
+        """
+        Records a check answered by the source's update listing: the story was not listed as updated.
+        `last_success_date` is left alone, it keeps dating the last full page fetch. `interval` is the
+        success interval when the caller computed it for a whole batch (see `StoryCatalog`).
+        """
+        self.last_check_date = today_str
+        self._schedule_next_check(interval)
+
+    def _is_source_enabled(self) -> bool:
+        return get_config(f"provider.{self.source}.enabled", True)
 
     def get_skip_reason(self) -> str | None:
-        if self.source == "metruyenchu":
-            return "metruyenchu"
-        if self._should_skip_check():
-            return "stale_interval"
+        if not self._is_source_enabled():
+            return "source_disabled"
+        if not self.is_due():
+            return "not_due"
         return None
 
     def _update_avg(self, new_ch: int, prev_ch: int, prev_date_str: str):
@@ -155,31 +231,23 @@ class Story:
             self.avg_days_per_chapter = EMA_ALPHA * sample + (1 - EMA_ALPHA) * self.avg_days_per_chapter
 
     def get_latest_chapter(self):
-        if self.source == "metruyenchu":
-            self.logger.info(f"{self.title} -> Bỏ qua kiểm tra (METRUYENCHU)")
+        if not self._is_source_enabled():
+            self.logger.info(f"{self.title} -> Bỏ qua kiểm tra ({self.source} đang tắt)")
             return False
 
-        if self._should_skip_check():
-            interval = self._get_skip_interval()
-            last_check = self.last_check_date or "unknown"
-            next_due = self._get_stale_next_due_date()
-            next_due_str = self._format_date(next_due) if next_due else (self.next_check_date or "unknown")
-            if self.avg_days_per_chapter is not None:
-                self.logger.info(
-                    f"{self.title} -> Bỏ qua (không update >={STALE_THRESHOLD_DAYS}d, "
-                    f"avg={self.avg_days_per_chapter:.1f}d/chap, recheck_after={interval}d, "
-                    f"last_check={last_check}, next_due={next_due_str})"
-                )
-            else:
-                self.logger.info(
-                    f"{self.title} -> Bỏ qua (không update >={STALE_THRESHOLD_DAYS}d, recheck_after={interval}d, "
-                    f"last_check={last_check}, next_due={next_due_str})"
-                )
+        if not self.is_due():
+            avg = f"{self.avg_days_per_chapter:.1f}d/chap" if self.avg_days_per_chapter is not None else "unknown"
+            self.logger.info(
+                f"{self.title} -> Bỏ qua (chưa tới hạn, avg={avg}, "
+                f"last_check={self.last_check_date or 'unknown'}, next_check={self.next_check_at})"
+            )
             return False
 
         today_str = self._format_date(datetime.today())
+        self.fetch_failed = False
+        self.host_failed = False
         try:
-            story_info = self.provider.get_story_info()
+            story_info = self.provider.get_story_info(self.ref)
             latest_chapter = story_info.latest_chapter
             if latest_chapter and latest_chapter > 0:
                 prev_ch = self.last_chapter
@@ -187,7 +255,7 @@ class Story:
                 self.is_new_chapter = True
                 self.new_chapters_count = latest_chapter - prev_ch
                 self.last_chapter = latest_chapter
-                self.latest_chapter_date = story_info.latest_chapter_date
+                self.latest_chapter_date = to_iso_date(story_info.latest_chapter_date)
                 self.is_completed = story_info.status == StoryStatus.COMPLETED
                 self._update_avg(latest_chapter, prev_ch, prev_date)
                 self.display()
@@ -200,6 +268,9 @@ class Story:
                 self._mark_fetch_success(today_str)
         except Exception as e:
             self.logger.error(f"{self.title} -> {e}")
+            self.provider.discard_validators(self.ref)
+            self.fetch_failed = True
+            self.host_failed = isinstance(e, requests.RequestException) and is_mirror_failure(e)
             self._mark_fetch_failure(today_str)
         finally:
             self.last_check_date = today_str
@@ -225,7 +296,7 @@ class Story:
         return self.source == "metruyenchu"
 
     def channel_message(self, format: Literal["plain", "rich"] = "rich"):
-        link = self.provider.get_link_chapter(self.last_chapter)
+        link = self.provider.get_link_chapter(self.ref, self.last_chapter)
 
         if self.is_completed:
             chapter_plain = "Hoàn thành"
@@ -238,10 +309,11 @@ class Story:
                 chapter_plain = f"Chương {self.last_chapter}"
                 chapter_rich = f"Chương **{self.last_chapter}**"
 
+        chapter_date = to_display_date(self.latest_chapter_date)
         if format == "rich":
-            return f"{chapter_rich} - **{self.latest_chapter_date}** - [[Link-đọc]({link})]"
+            return f"{chapter_rich} - **{chapter_date}** - [[Link-đọc]({link})]"
         if format == "plain":
-            return f"{chapter_plain} - {self.latest_chapter_date}"
+            return f"{chapter_plain} - {chapter_date}"
         raise ValueError(f"Unknown format: {format}")
 
     def message_channel_general(self):
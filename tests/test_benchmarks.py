@@ -0,0 +1,21 @@
+import json
+import unittest
+
+from benchmarks.parse_bench import FIXTURE_PROVIDERS, compare, run
+from providers import PROVIDER_MAP
+
+
+class TestParseBenchmark(unittest.TestCase):
+    def test_every_provider_has_a_fixture(self):
+        self.assertEqual(set(FIXTURE_PROVIDERS), set(PROVIDER_MAP))
+
+    def test_report_is_machine_readable(self):
+        report = json.loads(json.dumps(run(iterations=2, warmup=0)))
+
+        chapters = {source: result["chapter"] for source, result in report["results"].items()}
+        self.assertEqual(chapters, {"truyenqqto": 245, "nettruyen": 180, "goctruyentranhvui": 212, "metruyenchu": 1201})
+        for result in report["results"].values():
+            self.assertLessEqual(result["min_ms"], result["mean_ms"])
+            self.assertLessEqual(result["mean_ms"], result["p95_ms"] * 2)
+            self.assertGreater(result["peak_kib"], 0)
+        self.assertEqual(len(compare(report, report)), len(PROVIDER_MAP))
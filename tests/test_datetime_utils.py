@@ -1,6 +1,6 @@
 import unittest
-from datetime import date, timedelta
-from utils.datetime import format_date_chapter
+from datetime import date, datetime, timedelta
+from utils.datetime import format_date_chapter, parse_update_time, to_display_date, to_iso_date
 from dateutil.relativedelta import relativedelta
 
 
@@ -23,4 +23,35 @@ class TestFormatDateChapter(unittest.TestCase):
 
     def test_returns_original_string_if_no_match(self):
         result = format_date_chapter("invalid-date")
-        self.assertEqual(result, "invalid/date")
\ No newline at end of file
+        self.assertEqual(result, "invalid/date")
+
+class TestDateConversion(unittest.TestCase):
+    def test_round_trips_between_display_and_iso(self):
+        self.assertEqual(to_iso_date("05/10/2023"), "2023-10-05")
+        self.assertEqual(to_display_date("2023-10-05"), "05/10/2023")
+
+    def test_leaves_other_values_unchanged(self):
+        for value in (None, "", "2023-10-05", "invalid-date"):
+            self.assertEqual(to_iso_date(value), value)
+        for value in (None, "05/10/2023", "invalid-date"):
+            self.assertEqual(to_display_date(value), value)
+
+class TestParseUpdateTime(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2026, 5, 20, 12, 0)
+
+    def test_relative_time_returns_newest_possible_moment(self):
+        self.assertEqual(parse_update_time("2 giờ trước", self.now), datetime(2026, 5, 20, 11, 0))
+        self.assertEqual(parse_update_time("1 ngày trước", self.now), self.now)
+
+    def test_absolute_formats(self):
+        self.assertEqual(parse_update_time("14:05 19/05", self.now), datetime(2026, 5, 19, 14, 5))
+        self.assertEqual(parse_update_time("18/05/2026", self.now), datetime(2026, 5, 19))
+
+    def test_unknown_text_returns_none(self):
+        self.assertIsNone(parse_update_time("hôm qua", self.now))
+
+    def test_impossible_dates_return_none(self):
+        for text in ("14:05 31/04", "31/02/2026", "14:05 29/02", "25:00 19/05"):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_update_time(text, self.now))
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.discord import DiscordClient, pack_lines
+
+
+class DiscordHandler(BaseHTTPRequestHandler):
+    # Responses to play back per request, then a plain 200.
+    script = []
+    requests = []
+    delay_sec = 0.0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        with DiscordHandler.lock:
+            DiscordHandler.requests.append((self.path, payload["content"], time.monotonic()))
+            status, headers, body = DiscordHandler.script.pop(0) if DiscordHandler.script else (200, {}, {})
+        time.sleep(DiscordHandler.delay_sec)
+
+        data = json.dumps(body or {"id": "1"}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestDiscordClient(unittest.TestCase):
+    def setUp(self):
+        DiscordHandler.script = []
+        DiscordHandler.requests = []
+        DiscordHandler.delay_sec = 0.0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), DiscordHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = DiscordClient("token")
+        self.client.BASE_URL = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_waits_only_when_bucket_is_exhausted(self):
+        exhausted = {"X-RateLimit-Bucket": "abc", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.3"}
+        DiscordHandler.script = [(200, exhausted, {})]
+
+        self.client.send_message(1, "first")
+        self.client.send_message(2, "other channel")
+        self.client.send_message(1, "second")
+
+        times = {content: at for _, content, at in DiscordHandler.requests}
+        self.assertLess(times["other channel"] - times["first"], 0.25)
+        self.assertGreaterEqual(times["second"] - times["first"], 0.25)
+
+    def test_retries_after_429(self):
+        DiscordHandler.script = [(429, {"Retry-After": "1"}, {"retry_after": 0.2, "global": False})]
+
+        result = self.client.send_message(1, "hello")
+
+        self.assertEqual(result, {"id": "1"})
+        self.assertEqual(len(DiscordHandler.requests), 2)
+        self.assertGreaterEqual(DiscordHandler.requests[1][2] - DiscordHandler.requests[0][2], 0.15)
+
+    def test_global_limit_blocks_every_channel(self):
+        DiscordHandler.script = [(429, {"X-RateLimit-Global": "true"}, {"retry_after": 0.2, "global": True})]
+
+        self.client.send_message(1, "hello")
+        self.client.send_message(2, "other")
+
+        self.assertGreaterEqual(DiscordHandler.requests[1][2] - DiscordHandler.requests[0][2], 0.15)
+
+    def test_channels_are_sent_concurrently(self):
+        DiscordHandler.delay_sec = 0.2
+        threads = [threading.Thread(target=self.client.send_message, args=(channel, "x")) for channel in range(5)]
+
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(DiscordHandler.requests), 5)
+        self.assertLess(time.monotonic() - started, 0.8)
+
+
+class TestPackLines(unittest.TestCase):
+    def test_fills_messages_up_to_the_limit_in_order(self):
+        lines = [f"line-{index:02d}" for index in range(10)]  # 7 chars each
+
+        messages = pack_lines(lines, header="HEAD", limit=30)
+
+        self.assertEqual([indexes for _, indexes in messages], [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]])
+        self.assertEqual(messages[0][0], "HEAD\nline-00\nline-01\nline-02")
+        self.assertTrue(all(len(message) <= 30 for message, _ in messages))
+
+    def test_oversized_line_is_split_without_losing_text(self):
+        messages = pack_lines(["short", "x" * 50, "tail"], limit=20)
+
+        self.assertEqual([indexes for _, indexes in messages], [[0], [1], [1], [1, 2]])
+        self.assertEqual([message for message, _ in messages[1:3]], ["x" * 20, "x" * 20])
+        self.assertEqual(messages[3][0], "x" * 10 + "\ntail")
+
+    def test_line_longer_than_the_limit_after_header_keeps_its_link(self):
+        line = "Chương **245** - " + "rất dài " * 40 + "[[Link-đọc](https://truyenqqko.com/chap-245.html)]"
+
+        messages = pack_lines([line], header="HEAD", limit=100)
+
+        self.assertTrue(messages[0][0].startswith("HEAD\n"))
+        self.assertTrue(all(len(message) <= 100 for message, _ in messages))
+        self.assertTrue(all(indexes == [0] for _, indexes in messages))
+        self.assertIn("[[Link-đọc](https://truyenqqko.com/chap-245.html)]", messages[-1][0])
+        self.assertEqual(" ".join(message for message, _ in messages), "HEAD\n" + line)
+
+    def test_60_updates_fit_in_few_messages(self):
+        line = "**[Truyện tranh]**<#123456789012345678> -> Chương **245** - **22/05/2026** - [[Link-đọc](https://truyenqqko.com/truyen-tranh/blue-box-11258-chap-245.html)]"
+        messages = pack_lines([line] * 60, header="**📢 BẢN TIN CẬP NHẬT CÔNG PHÁP!**")
+
+        self.assertLessEqual(len(messages), 6)
+        self.assertEqual(sum(len(indexes) for _, indexes in messages), 60)
+
@@ -1,6 +1,6 @@
 import unittest
 
-from models.story_info import StoryStatus
+from models.story_info import StoryRef, StoryStatus
 from providers.goctruyentranhvui import GocTruyenTranhVuiProvider
 from utils.config import load_config_project
 
@@ -8,16 +8,16 @@ from utils.config import load_config_project
 class TestGocTruyenTranhVuiProvider(unittest.TestCase):
     def test_fetches_latest_chapter_when_data_is_valid(self):
         load_config_project()
-        provider = GocTruyenTranhVuiProvider(id="dinh-cap-khi-van--lang-le-tu-luyen-ngan-nam", last_chapter=5)
-        story_info = provider.get_story_info()
+        provider = GocTruyenTranhVuiProvider()
+        story_info = provider.get_story_info(StoryRef("dinh-cap-khi-van--lang-le-tu-luyen-ngan-nam", last_chapter=5))
         self.assertGreater(story_info.latest_chapter, 5)
         self.assertIsNotNone(story_info.latest_chapter_date)
         self.assertEqual(story_info.status, StoryStatus.ONGOING)
 
     def test_completed_status_when_story_is_finished(self):
         load_config_project()
-        provider = GocTruyenTranhVuiProvider(id="su-tro-lai-cua-phap-su-vi-dai-sau-4000-nam", last_chapter=212)
-        story_info = provider.get_story_info()
+        provider = GocTruyenTranhVuiProvider()
+        story_info = provider.get_story_info(StoryRef("su-tro-lai-cua-phap-su-vi-dai-sau-4000-nam", last_chapter=212))
         self.assertGreaterEqual(story_info.latest_chapter, 212)
         self.assertIsNotNone(story_info.latest_chapter_date)
         self.assertEqual(story_info.status, StoryStatus.COMPLETED)
\ No newline at end of file
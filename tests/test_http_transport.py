@@ -0,0 +1,191 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from models.story_info import StoryInfo, StoryRef, StoryStatus
+from providers.http import build_session, close_sessions, read_until
+from providers.mirrors import MirrorRegistry
+from providers.truyenqqto import TruyenQQTOProvider
+from runner import Runner
+from utils.config import get_config, load_config_project
+from utils.discord import DiscordClient
+from utils.transport import Cassette, mount_transport
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"page {self.path} <div class='end'></div>".encode()
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = b'{"id": "9"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestCassetteTransport(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings = {"http.cassette_dir": self.tmp.name, "http.replay_latency_scale": 0}
+
+    def tearDown(self):
+        close_sessions()
+        self.tmp.cleanup()
+
+    def _transport(self, mode: str):
+        settings = {**self.settings, "http.transport": mode}
+        return patch(
+            "utils.transport.get_config",
+            side_effect=lambda path, default=None: settings.get(path, get_config(path, default)),
+        )
+
+    @staticmethod
+    def _serve():
+        server = HTTPServer(("127.0.0.1", 0), PageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"http://127.0.0.1:{server.server_port}"
+
+    @staticmethod
+    def _stop(server):
+        server.shutdown()
+        server.server_close()
+
+    def _write_cassette(self, name: str, interactions: list):
+        path = Path(self.tmp.name) / f"{name}.json"
+        path.write_text(json.dumps({"interactions": interactions}), encoding="utf-8")
+
+    def test_records_then_replays_without_network(self):
+        server = HTTPServer(("127.0.0.1", 0), PageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/story?id=1"
+        with self._transport("record"):
+            session = mount_transport(build_session({"max_retries": 0}), "local")
+        recorded = session.get(url)
+        session.close()
+        server.shutdown()
+        server.server_close()
+
+        with self._transport("replay"):
+            session = mount_transport(build_session({"max_retries": 0}), "local")
+        replayed = session.get(url, stream=True)
+        text, bytes_read, _ = read_until(replayed, ["class='end'"])
+
+        self.assertEqual(text, recorded.text)
+        self.assertEqual(bytes_read, len(recorded.content))
+        self.assertEqual(replayed.headers["ETag"], '"v1"')
+        with self.assertRaises(requests.ConnectionError):
+            session.get(url + "&unrecorded=1")
+
+    def test_replay_injects_recorded_latency(self):
+        self._write_cassette("local", [{
+            "request": {"method": "GET", "url": "http://stub.local/a", "body": None},
+            "response": {"status": 200, "headers": {}, "body": "a", "encoding": "utf-8", "elapsed_ms": 100},
+        }])
+        self.settings["http.replay_latency_scale"] = 2
+        with self._transport("replay"):
+            session = mount_transport(requests.Session(), "local")
+
+        started = time.monotonic()
+        session.get("http://stub.local/a")
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_provider_pipeline_replays_story_page(self):
+        provider_url = "https://truyenqqko.com/truyen-tranh/blue-box-11258"
+        self._write_cassette("truyenqqto", [{
+            "request": {"method": "GET", "url": provider_url, "body": None},
+            "response": {
+                "status": 200,
+                "headers": {"Content-Type": "text/html"},
+                "body": (FIXTURES_DIR / "truyenqqto.html").read_text(encoding="utf-8"),
+                "encoding": "utf-8",
+                "elapsed_ms": 0,
+            },
+        }])
+        close_sessions()
+        with self._transport("replay"):
+            provider = TruyenQQTOProvider()
+
+        story = StoryRef("blue-box-11258", last_chapter=1)
+        self.assertEqual(provider.get_story_info(story), StoryInfo(245, "22/05/2026", StoryStatus.ONGOING))
+
+    def test_discord_client_replays_without_a_real_token(self):
+        url = f"{DiscordClient.BASE_URL}/channels/42/messages"
+        self._write_cassette("discord", [{
+            "request": {"method": "POST", "url": url, "body": '{"content": "hi"}'},
+            "response": {"status": 200, "headers": {}, "body": '{"id": "9"}', "encoding": "utf-8", "elapsed_ms": 0},
+        }])
+        with self._transport("replay"):
+            client = DiscordClient("placeholder")
+
+        self.assertEqual(client.send_message(42, "hi"), {"id": "9"})
+        client.close()
+
+    def test_runner_records_then_replays_discord(self):
+        server, origin = self._serve()
+        with self._transport("record"), patch.object(DiscordClient, "BASE_URL", origin), \
+                tempfile.TemporaryDirectory() as temp_dir:
+            runner = Runner(db_path=str(Path(temp_dir) / "stories.db"), data_path=str(Path(temp_dir) / "data.json"))
+            runner.discord_client.token = "placeholder"
+            self.assertEqual(runner.discord_client.send_message(42, "hi"), {"id": "9"})
+            runner.shutdown()
+        self._stop(server)
+
+        self.assertTrue((Path(self.tmp.name) / "discord.json").is_file())
+        with self._transport("replay"), patch.object(DiscordClient, "BASE_URL", origin):
+            client = DiscordClient("placeholder")
+            self.assertEqual(client.send_message(42, "hi"), {"id": "9"})
+        client.close()
+
+    def test_mirror_probe_replays_without_network(self):
+        server, origin = self._serve()
+        with self._transport("record"):
+            recording = MirrorRegistry()
+            recording.configure("truyenqqto", [origin])
+            recording.probe("truyenqqto", timeout=2)
+        self._stop(server)
+
+        with self._transport("replay"):
+            registry = MirrorRegistry()
+            registry.configure("truyenqqto", [origin])
+            registry.probe("truyenqqto", timeout=2)
+
+        self.assertTrue((Path(self.tmp.name) / "truyenqqto-mirrors.json").is_file())
+        self.assertEqual(registry.current("truyenqqto"), origin)
+        self.assertEqual([row[2] for row in registry.rows()], [1])
+
+    def test_cassette_never_stores_request_headers(self):
+        cassette = Cassette(Path(self.tmp.name) / "c.json")
+        request = requests.Request("POST", "https://x/y", headers={"Authorization": "Bot secret"}, json={}).prepare()
+
+        cassette.record(request, 200, {"Content-Encoding": "gzip", "ETag": "e"}, b"{}", 1.0)
+        cassette.save()
+
+        saved = (Path(self.tmp.name) / "c.json").read_text(encoding="utf-8")
+        self.assertNotIn("secret", saved)
+        self.assertNotIn("gzip", saved)
@@ -1,17 +1,68 @@
 import unittest
-from models.story_info import StoryStatus
+from models.story_info import StoryRef, StoryStatus
 from providers.metruyenchu import MeChuyenChuProvider
+from utils.config import load_config_project
 
 class TestMeChuyenChuProvider(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+
     def test_fetches_latest_chapter_when_data_is_valid(self):
-        provider = MeChuyenChuProvider(id="133656", last_chapter=5)
-        story_info = provider.get_story_info()
+        provider = MeChuyenChuProvider()
+        story_info = provider.get_story_info(StoryRef("133656", last_chapter=5))
         self.assertGreater(story_info.latest_chapter, 5)
         self.assertIsNotNone(story_info.latest_chapter_date)
 
     def test_completed_status_when_story_is_finished(self):
-        provider = MeChuyenChuProvider(id="142758", last_chapter=1)
-        story_info = provider.get_story_info()
+        provider = MeChuyenChuProvider()
+        story_info = provider.get_story_info(StoryRef("142758", last_chapter=1))
         self.assertIsNone(story_info.latest_chapter)
         self.assertIsNotNone(story_info.latest_chapter_date)
-        self.assertEqual(story_info.status, StoryStatus.COMPLETED)
\ No newline at end of file
+        self.assertEqual(story_info.status, StoryStatus.COMPLETED)
+
+class TestMeChuyenChuProviderLatestQuery(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+
+    def test_unchanged_latest_index_skips_chapter_query(self):
+        story = StoryRef("133656", last_chapter=120, meta={"latest_index": 121})
+        provider = MeChuyenChuProvider()
+        provider.fetch_book = lambda story: {"latest_index": 121, "link": "https://metruyencv.com/truyen/abc"}
+        provider.fetch_api = lambda story: self.fail("chapter list should not be fetched")
+
+        story_info = provider.get_story_info(story)
+        self.assertEqual(story_info.latest_chapter, 0)
+        self.assertEqual(story.meta["link"], "https://metruyencv.com/truyen/abc")
+
+    def test_index_matching_chapter_number_without_meta_reads_chapter(self):
+        story = StoryRef("133656", last_chapter=121)
+        provider = MeChuyenChuProvider()
+        provider.fetch_book = lambda story: {"latest_index": 121, "link": "https://metruyencv.com/truyen/abc"}
+        provider.fetch_api = lambda story: {
+            "data": [{"index": 121, "name": "Chương 122: C", "published_at": "2026-05-03T10:00:00Z"}],
+            "extra": {"book": {"latest_index": 121, "link": "https://metruyencv.com/truyen/abc", "status": 1}},
+        }
+
+        story_info = provider.get_story_info(story)
+        self.assertEqual(story_info.latest_chapter, 122)
+        self.assertEqual(story.meta["latest_index"], 121)
+
+    def test_new_chapter_reads_newest_record_and_caches_meta(self):
+        meta = {}
+        story = StoryRef("133656", last_chapter=120, meta=meta)
+        provider = MeChuyenChuProvider()
+        provider.fetch_book = lambda story: {"latest_index": 122, "link": "https://metruyencv.com/truyen/abc"}
+        provider.fetch_api = lambda story: {
+            "data": [
+                {"index": 121, "name": "Chương 120: A", "published_at": "2026-05-01T10:00:00Z"},
+                {"index": 122, "name": "Chương 121: B", "published_at": "2026-05-02T10:00:00Z"},
+            ],
+            "extra": {"book": {"latest_index": 122, "link": "https://metruyencv.com/truyen/abc", "status": 2}},
+        }
+
+        story_info = provider.get_story_info(story)
+        self.assertEqual(story_info.latest_chapter, 121)
+        self.assertEqual(story_info.latest_chapter_date, "02/05/2026")
+        self.assertEqual(story_info.status, StoryStatus.COMPLETED)
+        self.assertEqual(meta["latest_index"], 122)
+        self.assertEqual(provider.get_link_chapter(story, 121), "https://metruyencv.com/truyen/abc/chuong-122")
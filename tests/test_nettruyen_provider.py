@@ -1,14 +1,18 @@
 import unittest
 
 # from models.chapter import Status
-from models.story_info import StoryStatus
+from models.story_info import StoryRef, StoryStatus
 from providers import NetTruyenProvider
+from utils.config import load_config_project
 
 
 class TestNetTruyenProvider(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+
     def test_fetches_latest_chapter_when_data_is_valid(self):
-        provider = NetTruyenProvider(id="hoa-than-thanh-meo", last_chapter=5)
-        chapter_info = provider.get_story_info()
+        provider = NetTruyenProvider()
+        chapter_info = provider.get_story_info(StoryRef("hoa-than-thanh-meo", last_chapter=5))
         self.assertGreater(chapter_info.latest_chapter, 5)
         self.assertIsNotNone(chapter_info.latest_chapter_date)
 
@@ -0,0 +1,89 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from models.story_info import StoryRef
+from providers.base import BaseProvider
+from providers.cache import ValidatorCache
+from providers.http import close_sessions
+from providers.truyenqqto import TruyenQQTOProvider
+from utils.config import load_config_project
+
+STORY_HTML = """
+<html><body>
+<div class="book_other"><div class="txt"><ul>
+<li class="status row"><p class="col-xs-3">Tình trạng</p><p class="col-xs-9">Đang Cập Nhật</p></li>
+</ul></div></div>
+<div class="works-chapter-item">
+<div class="name-chap"><a href="#">Chương 12</a></div>
+<div class="time-chap">10/05/2026</div>
+</div>
+</body></html>
+""".encode("utf-8")
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        ETagHandler.requests_seen.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(STORY_HTML)))
+        self.end_headers()
+        self.wfile.write(STORY_HTML)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestValidatorCache(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+        ETagHandler.requests_seen = []
+        self.server = HTTPServer(("127.0.0.1", 0), ETagHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/story"
+        BaseProvider.validator_cache = ValidatorCache()
+
+    def tearDown(self):
+        BaseProvider.validator_cache = None
+        self.server.shutdown()
+        self.server.server_close()
+        close_sessions()
+
+    def _provider(self) -> TruyenQQTOProvider:
+        provider = TruyenQQTOProvider()
+        provider.get_story_url = lambda story: self.url
+        return provider
+
+    def test_not_modified_page_is_reported_as_no_new_chapter(self):
+        provider = self._provider()
+        first = provider.get_story_info(StoryRef("story", last_chapter=10))
+        second = provider.get_story_info(StoryRef("story", last_chapter=12))
+
+        cache = BaseProvider.validator_cache
+        self.assertEqual(first.latest_chapter, 12)
+        self.assertEqual(second.latest_chapter, 0)
+        self.assertEqual(ETagHandler.requests_seen, [None, '"v1"'])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.bytes_saved, len(STORY_HTML))
+
+    def test_discarded_validators_force_full_download(self):
+        provider = self._provider()
+        story = StoryRef("story", last_chapter=10)
+        provider.get_story_info(story)
+        provider.discard_validators(story)
+        info = provider.get_story_info(story)
+
+        upserts, deleted = BaseProvider.validator_cache.pop_changes()
+        self.assertEqual(info.latest_chapter, 12)
+        self.assertEqual(ETagHandler.requests_seen, [None, None])
+        self.assertEqual([row[0] for row in upserts], [self.url])
+        self.assertEqual(deleted, [])
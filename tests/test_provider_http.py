@@ -0,0 +1,57 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from providers.http import build_session, close_sessions, get_session
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        FlakyHandler.hits += 1
+        status = 503 if FlakyHandler.hits == 1 else 200
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestProviderHttp(unittest.TestCase):
+    def tearDown(self):
+        close_sessions()
+
+    def test_session_is_shared_per_provider(self):
+        first = get_session("truyenqqto", {})
+        second = get_session("truyenqqto", {})
+        other = get_session("nettruyen", {})
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    def test_retry_policy_comes_from_settings(self):
+        session = build_session({"max_retries": 5, "backoff_factor": 1.5})
+        retry = session.get_adapter("https://example.com").max_retries
+
+        self.assertEqual(retry.total, 5)
+        self.assertEqual(retry.backoff_factor, 1.5)
+        self.assertIn(503, retry.status_forcelist)
+
+    def test_retries_5xx_response(self):
+        FlakyHandler.hits = 0
+        server = HTTPServer(("127.0.0.1", 0), FlakyHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            session = build_session({"max_retries": 2, "backoff_factor": 0})
+            res = session.get(f"http://127.0.0.1:{server.server_port}/", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(FlakyHandler.hits, 2)
@@ -0,0 +1,128 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from providers.listing import TruyenQQTOUpdateListing
+from runner import APP_STATE_LISTING_SCAN, Runner
+from utils.config import get_config, load_config_project
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class TestTruyenQQTOUpdateListing(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+        self.listing = TruyenQQTOUpdateListing()
+        self.html = (FIXTURES_DIR / "truyenqqto_listing.html").read_text(encoding="utf-8")
+        self.pages_read = []
+
+        def fake_fetch_page(page: int):
+            self.pages_read.append(page)
+            return self.html
+
+        self.listing.fetch_page = fake_fetch_page
+
+    def test_parse_page_extracts_story_ids_in_order(self):
+        entries = self.listing.parse_page(self.html, datetime.now())
+
+        self.assertEqual(len(entries), 12)
+        self.assertEqual(entries[0].story_id, "blue-box-11258")
+        self.assertEqual(entries[5].story_id, "ta-hoc-tram-than-trong-benh-vien-tam-than-15082")
+        self.assertTrue(all(entry.updated_at is not None for entry in entries))
+
+    def test_failed_page_logs_the_requested_url(self):
+        listing = TruyenQQTOUpdateListing()
+        urls = iter(["https://mirror-a.example/p1", "https://mirror-b.example/p1"])
+        with patch.object(listing, "page_url", side_effect=lambda page: next(urls)), \
+                patch.object(listing.session, "get", side_effect=requests.ConnectionError("down")) as get, \
+                patch("providers.listing.logger") as logger:
+            self.assertIsNone(listing.fetch_page(1))
+
+        self.assertEqual(get.call_args.args[0], "https://mirror-a.example/p1")
+        self.assertIn("https://mirror-a.example/p1", logger.error.call_args.args[0])
+
+    def test_stops_at_previous_scan(self):
+        updated_ids = self.listing.collect_updated_ids(datetime.now() - timedelta(hours=4))
+
+        self.assertEqual(self.pages_read, [1])
+        self.assertIn("ta-hoc-tram-than-trong-benh-vien-tam-than-15082", updated_ids)
+        self.assertIn("vo-luyen-dinh-phong-1204", updated_ids)
+        self.assertNotIn("toan-chuc-phap-su-2097", updated_ids)
+
+    def test_incomplete_scan_returns_none(self):
+        updated_ids = self.listing.collect_updated_ids(datetime.now() - timedelta(days=30), max_pages=2)
+
+        self.assertIsNone(updated_ids)
+        self.assertEqual(self.pages_read, [1, 2])
+
+
+class TestRunnerListingFilter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        data_path = Path(self.temp_dir.name) / "data.json"
+        today = datetime.today().strftime("%d/%m/%Y")
+        stories = [
+            {"id": story_id, "title": story_id, "source": "truyenqqto", "channel_id": index,
+             "last_chapter": 1, "latest_chapter_date": today, "last_success_date": today}
+            for index, story_id in enumerate(["listed", "unlisted", "never-fetched"])
+        ]
+        stories[2]["last_success_date"] = None
+        data_path.write_text(json.dumps(stories), encoding="utf-8")
+        self.runner = Runner(db_path=str(Path(self.temp_dir.name) / "stories.db"), data_path=str(data_path))
+        self.runner.prepare()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def _listing_enabled():
+        def fake_get_config(path, default=None):
+            if path == "provider.truyenqqto.listing_detector":
+                return True
+            return get_config(path, default)
+
+        return patch("runner.get_config", side_effect=fake_get_config)
+
+    def test_only_listed_or_unverified_stories_are_fetched(self):
+        self.runner._set_app_state(
+            APP_STATE_LISTING_SCAN.format(source="truyenqqto"),
+            (datetime.now() - timedelta(hours=1)).isoformat(timespec="seconds"),
+        )
+        with self._listing_enabled(), \
+                patch.object(TruyenQQTOUpdateListing, "collect_updated_ids", return_value={"listed"}):
+            to_fetch, _, skipped = self.runner._apply_update_listings(self.runner.stories)
+
+        self.assertEqual(sorted(s.id for s in to_fetch), ["listed", "never-fetched"])
+        self.assertEqual([s.id for s in skipped], ["unlisted"])
+
+    def test_first_scan_fetches_everything(self):
+        with self._listing_enabled():
+            to_fetch, _, skipped = self.runner._apply_update_listings(self.runner.stories)
+
+        self.assertEqual(len(to_fetch), 3)
+        self.assertEqual(skipped, [])
+        self.assertIsNotNone(self.runner._get_app_state(APP_STATE_LISTING_SCAN.format(source="truyenqqto")))
+
+    def test_listed_story_is_loaded_even_if_not_due(self):
+        self.runner.stories[0].next_check_at = (datetime.now() + timedelta(days=2)).isoformat(timespec="seconds")
+        self.runner.update_data()
+        self.runner.prepare()
+        self.assertNotIn("listed", [s.id for s in self.runner.stories])
+
+        self.runner._set_app_state(
+            APP_STATE_LISTING_SCAN.format(source="truyenqqto"),
+            (datetime.now() - timedelta(hours=1)).isoformat(timespec="seconds"),
+        )
+        with self._listing_enabled(), \
+                patch.object(TruyenQQTOUpdateListing, "collect_updated_ids", return_value={"listed"}):
+            to_fetch, listed_not_due, _ = self.runner._apply_update_listings(self.runner.stories)
+
+        self.assertEqual([s.id for s in listed_not_due], ["listed"])
+        self.assertIn("listed", [s.id for s in to_fetch])
+        self.assertTrue(listed_not_due[0].force_check)
+        self.assertIn(listed_not_due[0], self.runner.stories)
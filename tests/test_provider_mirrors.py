@@ -0,0 +1,134 @@
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from consts import ProviderName
+from consts.enpoint import ENDPOINTS
+from models.story_info import StoryRef
+from providers.base import BaseProvider
+from providers.http import build_session
+from providers.mirrors import MirrorRegistry, with_origin
+from providers.truyenqqto import TruyenQQTOProvider
+from utils.config import load_config_project
+
+
+def make_handler(status: int = 200, delay_sec: float = 0.0):
+    class MirrorHandler(BaseHTTPRequestHandler):
+        paths = []
+
+        def _respond(self, body: bytes):
+            time.sleep(delay_sec)
+            MirrorHandler.paths.append(self.path)
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command == "GET":
+                self.wfile.write(body)
+
+        def do_HEAD(self):
+            self._respond(b"")
+
+        def do_GET(self):
+            self._respond(b"ok")
+
+        def log_message(self, format, *args):
+            pass
+
+    return MirrorHandler
+
+
+def closed_port_origin() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+class TestMirrorRegistry(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+        self.servers = []
+
+    def tearDown(self):
+        BaseProvider.mirror_registry = None
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def _serve(self, handler) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    def test_probe_routes_to_fastest_healthy_mirror(self):
+        slow = self._serve(make_handler(delay_sec=0.2))
+        fast = self._serve(make_handler())
+        broken = self._serve(make_handler(status=503))
+        registry = MirrorRegistry()
+        registry.configure("truyenqqto", [f"{slow}/truyen-tranh", broken, fast, closed_port_origin()])
+
+        registry.probe("truyenqqto", timeout=2)
+
+        self.assertEqual(registry.current("truyenqqto"), fast)
+        self.assertEqual(registry.route("truyenqqto", f"{slow}/truyen-tranh/a-1"), f"{fast}/truyen-tranh/a-1")
+        self.assertEqual(registry.route("truyenqqto", "https://example.com/a"), "https://example.com/a")
+        healthy = {origin: bool(flag) for _, origin, flag, *_ in registry.rows()}
+        self.assertEqual(sum(healthy.values()), 2)
+        self.assertFalse(registry.probe_due("truyenqqto", 3600))
+
+    def test_request_fails_over_mid_run(self):
+        dead = closed_port_origin()
+        live_handler = make_handler()
+        live = self._serve(live_handler)
+        registry = MirrorRegistry()
+        registry.configure("truyenqqto", [dead, live])
+        BaseProvider.mirror_registry = registry
+        provider = TruyenQQTOProvider()
+        provider.session = build_session({"max_retries": 0})
+
+        res = provider.request_get(f"{dead}/truyen-tranh/blue-box-11258")
+
+        self.assertEqual(res.text, "ok")
+        self.assertEqual(live_handler.paths, ["/truyen-tranh/blue-box-11258"])
+        self.assertEqual(registry.current("truyenqqto"), live)
+
+    def test_chapter_links_point_to_the_current_mirror(self):
+        registry = MirrorRegistry()
+        registry.configure("truyenqqto", [ENDPOINTS[ProviderName.TRUYENQQTO], "https://truyenqq.example"])
+        registry.failover("truyenqqto", ENDPOINTS[ProviderName.TRUYENQQTO])
+        BaseProvider.mirror_registry = registry
+
+        link = TruyenQQTOProvider().get_link_chapter(StoryRef("blue-box-11258"), 3)
+
+        self.assertEqual(link, "https://truyenqq.example/truyen-tranh/blue-box-11258-chap-3")
+
+    def test_gives_up_when_every_mirror_fails(self):
+        registry = MirrorRegistry()
+        registry.configure("truyenqqto", [closed_port_origin(), closed_port_origin()])
+        BaseProvider.mirror_registry = registry
+        provider = TruyenQQTOProvider()
+        provider.session = build_session({"max_retries": 0})
+        url = with_origin("https://truyenqqko.com/truyen-tranh/x", registry.origins("truyenqqto")[0])
+
+        with self.assertRaises(requests.ConnectionError):
+            provider.request_get(url)
+
+    def test_stats_survive_a_reload(self):
+        registry = MirrorRegistry()
+        registry.configure("nettruyen", ["https://a.example", "https://b.example"])
+        registry.record_success("nettruyen", "https://b.example/x", 80)
+        registry.failover("nettruyen", "https://a.example/x")
+        keys = ("provider", "origin", "healthy", "latency_ms", "failures", "last_probe_at")
+        rows = [dict(zip(keys, row)) for row in registry.rows()]
+
+        reloaded = MirrorRegistry()
+        reloaded.configure("nettruyen", ["https://a.example", "https://b.example", "https://c.example"])
+        reloaded.load(rows)
+
+        self.assertEqual(reloaded.current("nettruyen"), "https://b.example")
+        self.assertEqual(len(reloaded.rows()), 3)
@@ -0,0 +1,85 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from models.story_info import StoryInfo, StoryRef, StoryStatus
+from providers.base import BaseProvider
+from providers.parse_pool import ParsePool
+from providers.truyenqqto import TruyenQQTOProvider
+from runner import Runner
+from utils.config import get_config, load_config_project
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class TestParsePool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_config_project()
+        cls.pool = ParsePool(2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_worker_result_matches_in_process_parse(self):
+        html = (FIXTURES_DIR / "truyenqqto.html").read_text(encoding="utf-8")
+        provider = TruyenQQTOProvider()
+        story = StoryRef("blue-box-11258", last_chapter=1)
+
+        with patch.object(BaseProvider, "parse_pool", self.pool):
+            info = provider.parse_story_info(html, story)
+
+        self.assertEqual(info, StoryInfo(245, "22/05/2026", StoryStatus.ONGOING))
+        self.assertEqual(info, provider.parse_story_info(html, story))
+
+    def test_extraction_error_is_raised_in_the_caller(self):
+        provider = TruyenQQTOProvider()
+
+        with patch.object(BaseProvider, "parse_pool", self.pool), self.assertRaises(Exception):
+            provider.parse_story_info("<html><body></body></html>", StoryRef("blue-box-11258", last_chapter=1))
+
+
+class TestParsePoolThreshold(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        data_path = Path(self.temp_dir.name) / "data.json"
+        data_path.write_text(json.dumps([
+            {"id": f"story-{i}", "title": f"Story {i}", "source": "truyenqqto", "channel_id": i,
+             "last_chapter": 1, "latest_chapter_date": "01/05/2026"}
+            for i in range(4)
+        ]), encoding="utf-8")
+        self.runner = Runner(db_path=str(Path(self.temp_dir.name) / "stories.db"), data_path=str(data_path))
+        self.runner.prepare()
+
+    def tearDown(self):
+        self.runner.storage.close()
+        self.temp_dir.cleanup()
+
+    def _pool_for(self, fetch_concurrency: int, min_batch: int, calls: int = 1):
+        settings = {"common.parse_processes": 2, "common.parse_pool_min_batch": min_batch}
+        with patch("runner.get_config", side_effect=lambda path, default=None:
+                   settings.get(path, get_config(path, default))), \
+                patch("runner.ParsePool") as pool_class:
+            pools = [self.runner._parse_pool_for(self.runner.stories, fetch_concurrency) for _ in range(calls)]
+        return pools[-1], pool_class
+
+    def test_small_batches_parse_in_fetch_threads(self):
+        pool, pool_class = self._pool_for(fetch_concurrency=4, min_batch=16)
+
+        self.assertIsNone(pool)
+        pool_class.assert_not_called()
+
+    def test_sequential_fetch_never_starts_a_pool(self):
+        pool, pool_class = self._pool_for(fetch_concurrency=1, min_batch=1)
+
+        self.assertIsNone(pool)
+        pool_class.assert_not_called()
+
+    def test_large_batch_starts_the_pool_once(self):
+        pool, pool_class = self._pool_for(fetch_concurrency=4, min_batch=4, calls=2)
+
+        self.assertIs(pool, pool_class.return_value)
+        pool_class.assert_called_once_with(2)
@@ -0,0 +1,66 @@
+import unittest
+from pathlib import Path
+
+from bs4 import SoupStrainer
+
+from models.story_info import StoryInfo, StoryRef, StoryStatus
+from providers.base import BaseProvider
+from providers.goctruyentranhvui import GocTruyenTranhVuiProvider
+from providers.nettruyen import NetTruyenProvider
+from providers.parsing import HAS_LXML, PARSER_HTML, PARSER_LXML, has_class, parsed_html, resolve_parser
+from providers.truyenqqto import TruyenQQTOProvider
+from utils.config import load_config_project
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+CASES = [
+    (TruyenQQTOProvider, "truyenqqto.html", StoryInfo(245, "22/05/2026", StoryStatus.ONGOING)),
+    (NetTruyenProvider, "nettruyen.html", StoryInfo(180, "13/05/2026", StoryStatus.ONGOING)),
+    (GocTruyenTranhVuiProvider, "goctruyentranhvui.html", StoryInfo(212, "17/05/2026", StoryStatus.COMPLETED)),
+]
+
+
+class TestParsingBackends(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+
+    def _story_info(self, provider_cls, fixture: str, parser: str, parse_only: bool, last_chapter: int = 1):
+        provider = provider_cls()
+        provider.config = {**provider.config, "parser": parser, "parse_only": parse_only}
+        html = (FIXTURES_DIR / fixture).read_text(encoding="utf-8")
+        provider.fetch_html = lambda story: html
+        return provider.get_story_info(StoryRef("fixture", last_chapter))
+
+    def test_backends_produce_same_story_info(self):
+        parsers = [PARSER_HTML, PARSER_LXML] if HAS_LXML else [PARSER_HTML]
+        for provider_cls, fixture, expected in CASES:
+            for parser in parsers:
+                for parse_only in (False, True):
+                    with self.subTest(provider=provider_cls.__name__, parser=parser, parse_only=parse_only):
+                        self.assertEqual(self._story_info(provider_cls, fixture, parser, parse_only), expected)
+
+    def test_provider_without_extract_story_info_cannot_be_created(self):
+        class IncompleteProvider(BaseProvider):
+            def get_story_info(self, story):
+                return self.parse_story_info("<html></html>", story)
+
+            def get_link_chapter(self, story, chapter):
+                return ""
+
+        with self.assertRaises(TypeError):
+            IncompleteProvider()
+
+    def test_known_chapter_returns_empty_info(self):
+        for provider_cls, fixture, expected in CASES:
+            with self.subTest(provider=provider_cls.__name__):
+                info = self._story_info(provider_cls, fixture, "auto", True, last_chapter=expected.latest_chapter)
+                self.assertEqual(info, StoryInfo.empty())
+
+    def test_resolve_parser_falls_back_without_lxml(self):
+        self.assertEqual(resolve_parser("auto"), PARSER_LXML if HAS_LXML else PARSER_HTML)
+        self.assertEqual(resolve_parser(PARSER_HTML), PARSER_HTML)
+
+    def test_strainer_keeps_only_matching_subtrees(self):
+        html = '<div class="a b"><p>keep</p></div><div class="c"><p>drop</p></div>'
+        with parsed_html(html, PARSER_HTML, SoupStrainer(class_=has_class("b"))) as soup:
+            self.assertEqual([p.get_text() for p in soup.find_all("p")], ["keep"])
@@ -0,0 +1,96 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+from models.story_info import StoryRef, StoryStatus
+from providers.http import build_session, close_sessions, read_until, transfer_stats
+from providers.truyenqqto import TruyenQQTOProvider
+from utils.config import load_config_project
+
+HEAD_HTML = """
+<html><body>
+<div class="book_other"><div class="txt"><ul>
+<li class="status row"><p class="col-xs-3">Tình trạng</p><p class="col-xs-9">Hoàn Thành</p></li>
+</ul></div></div>
+<div class="works-chapter-item">
+<div class="name-chap"><a href="#">Chương 20</a></div>
+<div class="time-chap">10/05/2026</div>
+</div>
+"""
+FILLER_HTML = "".join(
+    f'<div class="works-chapter-item"><div class="name-chap"><a href="#">Chương {i}</a></div></div>\n'
+    for i in range(19, 0, -1)
+) * 200
+PAGE = (HEAD_HTML + FILLER_HTML + "</body></html>").encode("utf-8")
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        try:
+            self.wfile.write(PAGE)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestStreamedFetch(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+        transfer_stats.reset()
+        self.server = HTTPServer(("127.0.0.1", 0), PageHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/story"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        close_sessions()
+
+    def test_read_until_stops_after_markers(self):
+        res = build_session().get(self.url, stream=True, timeout=5)
+        text, bytes_read, early_stop = read_until(res, ["works-chapter-item", "status row"], tail_bytes=1024)
+
+        self.assertTrue(early_stop)
+        self.assertIn("Chương 20", text)
+        self.assertLess(bytes_read, len(PAGE))
+
+    def test_streamed_provider_returns_same_story_info(self):
+        provider = TruyenQQTOProvider()
+        provider.get_story_url = lambda story: self.url
+        provider.config = {**provider.config, "stream": True, "stream_tail_bytes": 1024}
+        info = provider.get_story_info(StoryRef("story", last_chapter=10))
+
+        stats = transfer_stats.snapshot()[provider.name]
+        self.assertEqual(info.latest_chapter, 20)
+        self.assertEqual(info.latest_chapter_date, "10/05/2026")
+        self.assertEqual(info.status, StoryStatus.COMPLETED)
+        self.assertEqual(stats["early_stops"], 1)
+        self.assertEqual(stats["bytes_read"] + stats["bytes_saved"], len(PAGE))
+
+    def test_streamed_error_response_is_closed(self):
+        provider = TruyenQQTOProvider()
+        responses = []
+        session_get = provider.session.get
+
+        def get(url, **kwargs):
+            responses.append(session_get(url, **kwargs))
+            return responses[-1]
+
+        with patch.object(provider.session, "get", side_effect=get):
+            self.assertIsNone(provider.request_get(self.url.replace("/story", "/missing"), stream=True))
+
+        self.assertEqual(responses[0].status_code, 404)
+        self.assertTrue(responses[0].raw.closed)
@@ -0,0 +1,92 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from consts.errors import StoryError
+from runner import catalog
+from runner.catalog import StoryCatalog
+from runner.scheduler import format_check_time, success_interval
+from runner.story import Story
+from utils.config import load_config_project
+
+NOW = datetime(2026, 5, 22, 10, 0, 0)
+
+
+def make_story(index: int, **fields) -> Story:
+    values = {
+        "id": f"story-{index}",
+        "title": f"Story {index}",
+        "source": "truyenqqto",
+        "channel_id": index,
+        "last_chapter": index,
+        "latest_chapter_date": (NOW - timedelta(days=index * 7)).strftime("%d/%m/%Y"),
+        "avg_days_per_chapter": None if index % 4 == 0 else index / 2,
+        "next_check_at": format_check_time(NOW + timedelta(hours=index % 3 - 1)),
+    }
+    values.update(fields)
+    return Story(**values)
+
+
+class TestStoryCatalog(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+        self.stories = [make_story(i) for i in range(12)]
+        self.stories += [
+            make_story(20, latest_chapter_date="not a date"),
+            make_story(21, error=StoryError.SEND_DISCORD_GENERAL.value),
+            make_story(22, source="nettruyen", next_check_at=None),
+        ]
+        self.stories[3].force_check = True
+
+    def _backends(self):
+        yield "numpy" if catalog.HAS_NUMPY else "loops"
+        with patch.object(catalog, "HAS_NUMPY", False):
+            yield "loops"
+
+    def test_due_set_matches_skip_reason(self):
+        with patch("runner.story.datetime") as story_datetime:
+            story_datetime.now.return_value = NOW
+            story_datetime.strptime = datetime.strptime
+            expected = [story.id for story in self.stories if story.get_skip_reason() is None]
+
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                due = StoryCatalog(self.stories).due(NOW)
+                self.assertEqual([story.id for story in due], expected)
+                disabled = StoryCatalog(self.stories).due(NOW, ["nettruyen"])
+                self.assertNotIn("story-22", [story.id for story in disabled])
+
+    def test_success_intervals_match_scheduler(self):
+        expected = [
+            success_interval(story.avg_days_per_chapter, story._days_since_update(NOW)).total_seconds() / 3600
+            for story in self.stories
+        ]
+
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                hours = StoryCatalog(self.stories).success_interval_hours(NOW)
+                for got, want in zip(hours, expected):
+                    self.assertAlmostEqual(got, want)
+
+    def test_update_order_matches_date_sort(self):
+        def parse_date(story: Story) -> datetime:
+            try:
+                return datetime.strptime(story.latest_chapter_date, "%Y-%m-%d")
+            except ValueError:
+                return datetime(1900, 1, 1)
+
+        shuffled = self.stories[5:] + self.stories[:5]
+        expected = [story.id for story in sorted(shuffled, key=parse_date, reverse=True)]
+
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                ordered = StoryCatalog(shuffled).sorted_by_update_date()
+                self.assertEqual([story.id for story in ordered], expected)
+
+    def test_empty_catalog(self):
+        for backend in self._backends():
+            with self.subTest(backend=backend):
+                empty = StoryCatalog([])
+                self.assertEqual(empty.due(NOW), [])
+                self.assertEqual(empty.success_interval_hours(NOW), [])
+                self.assertEqual(empty.update_order(), [])
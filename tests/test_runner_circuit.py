@@ -0,0 +1,148 @@
+import threading
+import time
+import unittest
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import requests
+
+from models.story_info import StoryInfo
+from providers.base import BaseProvider
+from providers.metruyenchu import MeChuyenChuProvider
+from providers.truyenqqto import TruyenQQTOProvider
+from runner.circuit import CircuitBreaker
+from runner.fetcher import ConcurrentFetcher, get_source_host
+from runner.story import Story
+from utils.config import load_config_project
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, cooldown_sec=60)
+
+        for success in (False, False, True, False, False):
+            self.assertTrue(breaker.acquire("a.com"))
+            breaker.record("a.com", success)
+        self.assertTrue(breaker.acquire("a.com"))
+        breaker.record("a.com", False)
+
+        self.assertFalse(breaker.acquire("a.com"))
+        self.assertTrue(breaker.acquire("b.com"))
+        self.assertEqual(breaker.deferred, 1)
+
+    def test_next_run_probes_with_a_single_request(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=60)
+        breaker.acquire("a.com")
+        breaker.record("a.com", False)
+
+        with patch("runner.circuit.time.time", return_value=time.time() + 61):
+            resumed = CircuitBreaker(failure_threshold=1, cooldown_sec=60, state=breaker.dumps())
+            self.assertTrue(resumed.acquire("a.com"))
+
+            waiter_result = []
+            waiter = threading.Thread(target=lambda: waiter_result.append(resumed.acquire("a.com")))
+            waiter.start()
+            waiter.join(0.1)
+            self.assertTrue(waiter.is_alive())
+
+            resumed.record("a.com", True)
+            waiter.join(1)
+        self.assertEqual(waiter_result, [True])
+        self.assertEqual(resumed.dumps(), "{}")
+
+    def test_failed_probe_reopens_for_another_cooldown(self):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown_sec=60, state='{"a.com": 0}')
+
+        self.assertTrue(breaker.acquire("a.com"))
+        breaker.record("a.com", False)
+
+        self.assertFalse(breaker.acquire("a.com"))
+        self.assertGreater(breaker.retry_at("a.com").timestamp(), time.time() + 50)
+
+
+class TestFetchWithBreaker(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _make_story(self, index: int) -> Story:
+        story = Story(
+            id=f"story-{index}",
+            title=f"Story {index}",
+            source="nettruyen",
+            channel_id=index,
+            last_chapter=1,
+            latest_chapter_date="01/05/2026",
+        )
+
+        def failing_get_story_info(_story):
+            with self.lock:
+                self.calls += 1
+            raise requests.ConnectionError("host down")
+
+        story.provider = Mock(get_story_info=failing_get_story_info)
+        return story
+
+    def test_remaining_stories_of_a_failing_host_are_deferred(self):
+        stories = [self._make_story(i) for i in range(10)]
+        breaker = CircuitBreaker(failure_threshold=3, cooldown_sec=600)
+
+        ConcurrentFetcher(max_workers=1, delay_sec=0).run(stories, breaker)
+
+        deferred = [story for story in stories if story.error_count == 0]
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(len(deferred), 7)
+        self.assertEqual(breaker.deferred, 7)
+        self.assertIn(get_source_host("nettruyen"), breaker.dumps())
+        self.assertTrue(all(not story.is_due() for story in deferred))
+
+    def test_success_is_recorded(self):
+        story = self._make_story(1)
+        story.provider = Mock(get_story_info=Mock(return_value=StoryInfo.empty()))
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=600)
+
+        ConcurrentFetcher(max_workers=1, delay_sec=0).run([story], breaker)
+
+        self.assertFalse(story.fetch_failed)
+        self.assertEqual(breaker.dumps(), "{}")
+
+    def test_failing_api_host_opens_the_circuit(self):
+        stories = [self._make_story(i) for i in range(4)]
+        for story in stories:
+            story.source = "metruyenchu"
+            story.provider = MeChuyenChuProvider()
+        breaker = CircuitBreaker(failure_threshold=2, cooldown_sec=600)
+
+        with patch.object(BaseProvider, "request_get", side_effect=requests.ConnectionError("down")) as request_get:
+            ConcurrentFetcher(max_workers=1, delay_sec=0).run(stories, breaker)
+
+        self.assertEqual(request_get.call_count, 2)
+        self.assertEqual([story.error_count for story in stories], [1, 1, 0, 0])
+        self.assertTrue(stories[0].fetch_failed)
+        self.assertEqual(breaker.deferred, 2)
+        self.assertIn(get_source_host("metruyenchu"), breaker.dumps())
+
+    def test_missing_story_pages_do_not_trip_the_breaker(self):
+        def not_found(url, **kwargs):
+            res = requests.Response()
+            res.status_code = 404
+            res.url = url
+            res.elapsed = timedelta(0)
+            res._content = b""
+            return res
+
+        stories = [self._make_story(i) for i in range(3)]
+        for story in stories:
+            story.source = "truyenqqto"
+            story.provider = TruyenQQTOProvider()
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_sec=600)
+
+        with patch.object(requests.Session, "get", side_effect=not_found) as get:
+            ConcurrentFetcher(max_workers=1, delay_sec=0).run(stories, breaker)
+
+        self.assertEqual(get.call_count, 3)
+        self.assertEqual([story.error_count for story in stories], [1, 1, 1])
+        self.assertFalse(any(story.host_failed for story in stories))
+        self.assertEqual(breaker.deferred, 0)
+        self.assertEqual(breaker.dumps(), "{}")
@@ -0,0 +1,78 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from models.story_info import StoryInfo, StoryStatus
+from providers.listing import TruyenQQTOUpdateListing
+from providers.truyenqqto import TruyenQQTOProvider
+from runner import Runner
+from runner.daemon import Daemon
+from runner.outbox import Outbox
+from runner.storage import Storage
+from utils.config import get_config
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        data_path = Path(self.temp_dir.name) / "data.json"
+        data_path.write_text(json.dumps([{
+            "id": "daemon-story", "title": "Daemon", "source": "truyenqqto", "channel_id": 1,
+            "last_chapter": 1, "latest_chapter_date": "01/05/2026",
+        }]), encoding="utf-8")
+        self.db_path = str(Path(self.temp_dir.name) / "stories.db")
+        self.runner = Runner(db_path=self.db_path, data_path=str(data_path))
+        self.daemon = Daemon(self.runner)
+        self.daemon.min_sleep_sec = 0
+
+    def tearDown(self):
+        self.runner.storage.close()
+        self.temp_dir.cleanup()
+
+    def test_cycles_fetch_only_due_stories_without_prompt(self):
+        story_info = StoryInfo(2, datetime.today().strftime("%d/%m/%Y"), StoryStatus.ONGOING)
+        with patch.object(TruyenQQTOProvider, "get_story_info", return_value=story_info) as get_story_info, \
+                patch.object(TruyenQQTOUpdateListing, "collect_updated_ids", return_value=None), \
+                patch("builtins.input", side_effect=AssertionError("daemon must not prompt")), \
+                patch.object(Daemon, "sleep_seconds", return_value=0), \
+                patch("runner.get_config", side_effect=lambda path, default=None:
+                      "token" if path == "discord.bot_token" else get_config(path, default)), \
+                patch.object(self.runner.delivery_worker, "start"):
+            self.daemon.serve(max_cycles=2)
+
+        self.assertEqual(get_story_info.call_count, 1)
+        storage = Storage(self.db_path)
+        self.assertEqual(Outbox(storage).pending_count(), 2)
+        storage.close()
+
+    def test_cache_stats_cover_one_cycle(self):
+        def get_story_info(_provider, story):
+            self.runner.validator_cache.record_response(story.id, Mock(status_code=304))
+            return StoryInfo.empty()
+
+        summaries = []
+        with patch.object(TruyenQQTOProvider, "get_story_info", autospec=True, side_effect=get_story_info), \
+                patch.object(TruyenQQTOUpdateListing, "collect_updated_ids", return_value=None), \
+                patch.object(Daemon, "sleep_seconds", return_value=0), \
+                patch.object(self.runner, "confirm_and_send_discord",
+                             side_effect=lambda *args, **kwargs: summaries.append(dict(self.runner.last_fetch_summary))), \
+                patch.object(self.runner.delivery_worker, "start"):
+            self.daemon.serve(max_cycles=2)
+
+        self.assertEqual([summary["fetched"] for summary in summaries], [1, 0])
+        self.assertEqual([summary["cache_hit"] for summary in summaries], [1, 0])
+
+    def test_sleep_follows_next_due_story(self):
+        now = datetime.now()
+        self.runner.prepare()
+        story = self.runner.stories[0]
+
+        for due_in, expected in ((timedelta(minutes=2), 120), (timedelta(hours=5), 900), (-timedelta(hours=1), 60)):
+            with self.subTest(due_in=due_in):
+                story.next_check_at = (now + due_in).isoformat(timespec="seconds")
+                self.runner.update_data()
+                self.daemon.min_sleep_sec = 60
+                self.assertAlmostEqual(self.daemon.sleep_seconds(now), expected, delta=1)
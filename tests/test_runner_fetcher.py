@@ -0,0 +1,64 @@
+import threading
+import time
+import unittest
+from collections import defaultdict
+from unittest.mock import Mock
+
+from models.story_info import StoryInfo
+from runner.fetcher import DEFAULT_HOST_CONCURRENCY, ConcurrentFetcher, get_source_host
+from runner.story import Story
+from utils.config import get_config, load_config_project
+
+
+class TestConcurrentFetcher(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+        self.lock = threading.Lock()
+        self.active = defaultdict(int)
+        self.peak = defaultdict(int)
+
+    def _make_story(self, index: int, source: str) -> Story:
+        story = Story(
+            id=f"story-{index}",
+            title=f"Story {index}",
+            source=source,
+            channel_id=index,
+            last_chapter=1,
+            latest_chapter_date="01/05/2026",
+        )
+        host = get_source_host(source)
+
+        def fake_get_story_info(_story):
+            with self.lock:
+                self.active[host] += 1
+                self.peak[host] = max(self.peak[host], self.active[host])
+            time.sleep(0.02)
+            with self.lock:
+                self.active[host] -= 1
+            if index % 3 == 0:
+                raise RuntimeError("boom")
+            return StoryInfo.empty()
+
+        story.provider = Mock(get_story_info=fake_get_story_info)
+        return story
+
+    def test_respects_per_host_concurrency_limit(self):
+        stories = [self._make_story(i, "truyenqqto") for i in range(9)]
+        stories += [self._make_story(i + 100, "nettruyen") for i in range(4)]
+
+        ConcurrentFetcher(max_workers=8, delay_sec=0).run(stories)
+
+        for source in ("truyenqqto", "nettruyen"):
+            limit = get_config(f"provider.{source}.max_concurrency", DEFAULT_HOST_CONCURRENCY)
+            self.assertLessEqual(self.peak[get_source_host(source)], limit)
+        self.assertTrue(all(story.last_check_date != "01/05/2026" for story in stories))
+
+    def test_keeps_success_and_failure_bookkeeping(self):
+        stories = [self._make_story(i, "truyenqqto") for i in range(6)]
+
+        ConcurrentFetcher(max_workers=4, delay_sec=0).run(stories)
+
+        for index, story in enumerate(stories):
+            expected_errors = 1 if index % 3 == 0 else 0
+            self.assertEqual(story.error_count, expected_errors)
+        self.assertEqual(stories[1].logger.extra["prefix"], "[2/6] - ")
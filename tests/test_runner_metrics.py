@@ -0,0 +1,92 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from providers.listing import TruyenQQTOUpdateListing
+from providers.truyenqqto import TruyenQQTOProvider
+from runner import Runner
+from utils.config import get_config
+from utils.metrics import PhaseSample, phase_metrics, summarize, to_prometheus
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class TestPhaseSummary(unittest.TestCase):
+    def test_percentiles_per_provider_and_phase(self):
+        samples = [PhaseSample("r", "truyenqqto", str(i), "ttfb", float(i)) for i in range(1, 101)]
+        samples.append(PhaseSample("r", None, None, "sqlite_stories", 3.0))
+
+        summary = summarize(samples)
+
+        self.assertEqual(summary[("truyenqqto", "ttfb")]["p50_ms"], 50.0)
+        self.assertEqual(summary[("truyenqqto", "ttfb")]["p95_ms"], 95.0)
+        self.assertEqual(summary[("runner", "sqlite_stories")]["count"], 1)
+        text = to_prometheus(summary)
+        self.assertIn('novelnow_phase_duration_ms{provider="truyenqqto",phase="ttfb",quantile="0.95"} 95.0', text)
+        self.assertIn('novelnow_phase_duration_ms_count{provider="runner",phase="sqlite_stories"} 1', text)
+
+
+class TestRunMetrics(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        data_path = Path(self.temp_dir.name) / "data.json"
+        data_path.write_text(json.dumps([
+            {"id": f"story-{i}", "title": f"Story {i}", "source": "truyenqqto", "channel_id": i,
+             "last_chapter": 1, "latest_chapter_date": "01/05/2026"}
+            for i in range(3)
+        ]), encoding="utf-8")
+        self.export_path = Path(self.temp_dir.name) / "metrics.json"
+        self.runner = Runner(db_path=str(Path(self.temp_dir.name) / "stories.db"), data_path=str(data_path))
+        phase_metrics.pop_samples()
+
+    def tearDown(self):
+        self.runner.storage.close()
+        self.temp_dir.cleanup()
+
+    def test_phases_are_stored_per_story_and_exported(self):
+        html = (FIXTURES_DIR / "truyenqqto.html").read_text(encoding="utf-8")
+        settings = {
+            "common.fetch_concurrency": 1,
+            "common.story_fetch_delay_sec": 0,
+            "metrics.export_path": str(self.export_path),
+            "metrics.export_format": "json",
+        }
+        phase_metrics.start_run("2026-05-22T10:00:00")
+        with patch.object(TruyenQQTOProvider, "fetch_html", return_value=html), \
+                patch.object(TruyenQQTOUpdateListing, "collect_updated_ids", return_value=None), \
+                patch("runner.get_config", side_effect=lambda path, default=None:
+                      settings.get(path, get_config(path, default))):
+            self.runner.prepare()
+            self.runner.fetch_latest_chapters()
+            self.runner.update_data()
+            self.runner.save_run_metrics(export=True)
+
+        with self.runner.storage.transaction() as conn:
+            rows = conn.execute(
+                "SELECT provider, phase, COUNT(DISTINCT story_id) AS stories, COUNT(*) AS samples "
+                "FROM run_metrics WHERE run_id = ? GROUP BY provider, phase",
+                ("2026-05-22T10:00:00",),
+            ).fetchall()
+        counts = {(row["provider"], row["phase"]): (row["stories"], row["samples"]) for row in rows}
+        for phase in ("parse", "schedule", "fetch"):
+            self.assertEqual(counts[("truyenqqto", phase)], (3, 3))
+        self.assertEqual(counts[(None, "sqlite_stories")][1], 1)
+
+        exported = json.loads(self.export_path.read_text(encoding="utf-8"))
+        self.assertEqual(exported["run_id"], "2026-05-22T10:00:00")
+        self.assertEqual(exported["providers"]["truyenqqto"]["fetch"]["count"], 3)
+        self.assertIn("p95_ms", exported["providers"]["runner"]["sqlite_stories"])
+
+    def test_untagged_samples_join_the_run_or_are_pruned(self):
+        phase_metrics.run_id = None
+        phase_metrics.record("discord_send", 5.0, "discord", "1")
+        self.runner.save_run_metrics()
+        phase_metrics.record("discord_send", 6.0, "discord", "1")
+        phase_metrics.start_run("2026-05-22T10:00:00")
+        self.runner.save_run_metrics()
+
+        with self.runner.storage.transaction() as conn:
+            run_ids = [row["run_id"] for row in conn.execute("SELECT run_id FROM run_metrics")]
+        self.assertEqual(run_ids, ["2026-05-22T10:00:00"])
@@ -0,0 +1,103 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from consts.errors import StoryError
+from runner import Runner
+from runner.outbox import STATUS_DEAD, STATUS_SENT, DeliveryWorker, Outbox, OutboxMessage
+from runner.storage import MEMORY_DB_PATH, Storage
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        self.storage = Storage(MEMORY_DB_PATH)
+        self.outbox = Outbox(self.storage, max_attempts=2, retry_base_sec=60)
+        self.client = MagicMock()
+        self.worker = DeliveryWorker(self.outbox, self.client, send_concurrency=4)
+
+    def tearDown(self):
+        self.storage.close()
+
+    def _statuses(self):
+        with self.storage.transaction() as conn:
+            return {row["idempotency_key"]: (row["status"], row["attempts"])
+                    for row in conn.execute("SELECT * FROM notification_outbox")}
+
+    def test_enqueue_is_idempotent(self):
+        message = OutboxMessage("story:a:1", "10", "hello")
+
+        self.assertEqual(self.outbox.enqueue([message]), 1)
+        self.assertEqual(self.outbox.enqueue([message]), 0)
+        self.assertEqual(self.outbox.pending_count(), 1)
+
+    def test_worker_sends_and_marks_messages(self):
+        self.outbox.enqueue([OutboxMessage("a", "1", "one"), OutboxMessage("b", "2", "two")])
+
+        self.assertEqual(self.worker.deliver_due(), 2)
+        self.assertEqual(self._statuses(), {"a": (STATUS_SENT, 0), "b": (STATUS_SENT, 0)})
+        nonces = {call.kwargs["nonce"] for call in self.client.send_message.call_args_list}
+        self.assertEqual(len(nonces), 2)
+        self.assertEqual(self.worker.deliver_due(), 0)
+
+    def test_failure_backs_off_and_keeps_channel_order(self):
+        self.client.send_message.side_effect = RuntimeError("discord down")
+        self.outbox.enqueue([OutboxMessage("first", "1", "one"), OutboxMessage("second", "1", "two")])
+
+        self.worker.deliver_due()
+
+        self.assertEqual(self._statuses(), {"first": ("pending", 1), "second": ("pending", 0)})
+        self.assertEqual(self.outbox.due(datetime.now()), [])
+        retry_at = datetime.now() + timedelta(seconds=61)
+        self.assertEqual([m["idempotency_key"] for m in self.outbox.due(retry_at)], ["first", "second"])
+
+    def test_message_is_given_up_after_max_attempts(self):
+        self.client.send_message.side_effect = RuntimeError("discord down")
+        self.outbox.enqueue([OutboxMessage("a", "1", "one")])
+
+        message = self.outbox.due(datetime.now())[0]
+        self.outbox.mark_failed(message, "boom")
+        self.outbox.mark_failed({**message, "attempts": 1}, "boom")
+
+        self.assertEqual(self._statuses()["a"], (STATUS_DEAD, 2))
+        self.assertEqual(self.outbox.pending_count(), 0)
+
+    def test_background_worker_drains_on_stop(self):
+        self.worker.start()
+        self.outbox.enqueue([OutboxMessage(str(i), str(i % 3), f"m{i}") for i in range(6)])
+        self.worker.wake()
+        self.worker.stop(drain_timeout_sec=5)
+
+        self.assertEqual(self.outbox.pending_count(), 0)
+        self.assertEqual(self.client.send_message.call_count, 6)
+
+
+class TestRunnerNotifications(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        data_path = Path(self.temp_dir.name) / "data.json"
+        stories = [
+            {"id": f"story-{index}", "title": f"Story {index}", "source": "truyenqqto", "channel_id": index,
+             "last_chapter": index, "latest_chapter_date": "01/05/2026"}
+            for index in range(40)
+        ]
+        data_path.write_text(json.dumps(stories), encoding="utf-8")
+        self.runner = Runner(db_path=MEMORY_DB_PATH, data_path=str(data_path))
+        self.runner.prepare()
+
+    def tearDown(self):
+        self.runner.storage.close()
+        self.temp_dir.cleanup()
+
+    def test_updates_are_queued_once(self):
+        self.runner.stories[0].set_error(StoryError.SEND_DISCORD_GENERAL)
+        general = self.runner.build_general_channel_messages(self.runner.stories)
+
+        self.runner.enqueue_notifications(self.runner.stories)
+        self.runner.enqueue_notifications(self.runner.stories)
+
+        self.assertGreater(len(general), 1)
+        self.assertEqual(self.runner.outbox.pending_count(), len(general) + len(self.runner.stories))
+        self.assertIsNone(self.runner.stories[0].error)
@@ -0,0 +1,39 @@
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+from runner.scheduler import failure_interval, success_interval
+from utils.config import load_config_project
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+
+    def test_interval_follows_update_rhythm(self):
+        self.assertEqual(success_interval(1, 0), timedelta(hours=12))
+        self.assertEqual(success_interval(7, 3), timedelta(days=3, hours=12))
+        self.assertLess(success_interval(1, 0), success_interval(7, 0))
+
+    def test_unknown_rhythm_uses_default(self):
+        self.assertEqual(success_interval(None, None), timedelta(hours=24))
+
+    def test_interval_is_clamped(self):
+        self.assertEqual(success_interval(0.01, 0), timedelta(hours=3))
+        self.assertEqual(success_interval(100, 0), timedelta(hours=240))
+
+    def test_stale_story_backs_off(self):
+        self.assertEqual(success_interval(1, 60), timedelta(hours=60 * 24 * 0.1))
+        self.assertEqual(success_interval(1, 44), timedelta(hours=12))
+
+    def test_failure_retry_doubles_with_error_count(self):
+        with patch("runner.scheduler.random.random", return_value=0):
+            self.assertEqual(failure_interval(1), timedelta(hours=1))
+            self.assertEqual(failure_interval(3), timedelta(hours=4))
+            self.assertEqual(failure_interval(1000), timedelta(hours=240))
+
+    def test_failure_retry_is_jittered(self):
+        intervals = {failure_interval(4) for _ in range(20)}
+
+        self.assertGreater(len(intervals), 1)
+        self.assertTrue(all(timedelta(hours=4) <= interval <= timedelta(hours=8) for interval in intervals))
@@ -1,10 +1,17 @@
 import json
+import sqlite3
 import tempfile
 import unittest
 from datetime import datetime, timedelta
 from pathlib import Path
+from unittest.mock import patch
+
+from consts.errors import StoryError
 from models.story_info import StoryInfo
-from runner import APP_STATE_LAST_JSON_SYNC, Runner
+from runner import APP_STATE_LAST_JSON_SYNC, APP_STATE_TRACKING_MIGRATED, MAX_TRACKING_SNAPSHOTS, Runner
+from runner import storage as storage_module
+from runner.storage import DEFAULT_CACHE_SIZE_KIB, MEMORY_DB_PATH, SCHEMA_VERSION, Storage
+from utils.config import get_config
 
 
 class TestRunnerStorage(unittest.TestCase):
@@ -35,7 +42,9 @@ class TestRunnerStorage(unittest.TestCase):
         self.assertEqual(len(runner.stories), 1)
         story = runner.stories[0]
         self.assertEqual(story.id, self.sample_story["id"])
-        self.assertEqual(story.next_check_date, self.sample_story["last_check_date"])
+        # data.json keeps dd/mm/yyyy, stories hold ISO dates.
+        self.assertEqual(story.latest_chapter_date, "2026-05-01")
+        self.assertEqual(story.next_check_date, "2026-05-01")
 
     def test_update_data_persists_and_removes_completed_story(self):
         runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
@@ -43,17 +52,17 @@ class TestRunnerStorage(unittest.TestCase):
 
         story = runner.stories[0]
         story.last_chapter = 11
-        story.latest_chapter_date = "02/05/2026"
-        story.last_check_date = "03/05/2026"
-        story.next_check_date = "04/05/2026"
-        story.last_success_date = "03/05/2026"
+        story.latest_chapter_date = "2026-05-02"
+        story.last_check_date = "2026-05-03"
+        story.next_check_date = "2026-05-04"
+        story.last_success_date = "2026-05-03"
         story.error_count = 2
         runner.update_data()
 
         runner.prepare()
         persisted = runner.stories[0]
         self.assertEqual(persisted.last_chapter, 11)
-        self.assertEqual(persisted.next_check_date, "04/05/2026")
+        self.assertEqual(persisted.next_check_date, "2026-05-04")
         self.assertEqual(persisted.error_count, 2)
 
         persisted.is_completed = True
@@ -61,51 +70,231 @@ class TestRunnerStorage(unittest.TestCase):
         runner.prepare()
         self.assertEqual(runner.stories, [])
 
+    def test_update_data_writes_only_dirty_stories(self):
+        self._write_stories(2)
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
+        with runner.storage.transaction() as conn:
+            conn.execute("UPDATE stories SET title = 'edited elsewhere'")
+
+        self.assertFalse(any(story.is_dirty() for story in runner.stories))
+        runner.stories[0].last_chapter = 42
+        runner.stories[1].source_meta["link"] = "https://example.com"
+        self.assertEqual(runner.stories[0].dirty_fields, {"last_chapter"})
+        self.assertEqual(runner.stories[1].dirty_fields, {"source_meta"})
+        runner.update_data()
+
+        with runner.storage.transaction() as conn:
+            rows = {row["id"]: row for row in conn.execute("SELECT * FROM stories")}
+        self.assertEqual(rows["story-0"]["last_chapter"], 42)
+        self.assertEqual(rows["story-0"]["title"], self.sample_story["title"])
+        self.assertEqual(json.loads(rows["story-1"]["source_meta"]), {"link": "https://example.com"})
+        self.assertFalse(any(story.is_dirty() for story in runner.stories))
+
+    def test_stories_share_their_source_provider(self):
+        self._write_stories(3)
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
+
+        first, second, _ = runner.stories
+        self.assertIs(first.provider, second.provider)
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertEqual(first.ref.id, first.id)
+        self.assertIs(first.ref.meta, first.source_meta)
+
+    def test_database_uses_wal(self):
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        with runner.storage.transaction() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
     def test_story_fetch_updates_scheduler_metadata(self):
         runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
         runner.prepare()
 
         story = runner.stories[0]
-        story.provider.get_story_info = lambda: StoryInfo.empty()
-        attempted = story.get_latest_chapter()
+        story.latest_chapter_date = datetime.today().strftime("%Y-%m-%d")
+        story.avg_days_per_chapter = 2
+        before = datetime.now()
+        with patch.object(story.provider, "get_story_info", return_value=StoryInfo.empty()):
+            attempted = story.get_latest_chapter()
 
         self.assertTrue(attempted)
         self.assertEqual(story.error_count, 0)
-        self.assertEqual(story.last_success_date, datetime.today().strftime("%d/%m/%Y"))
-        self.assertEqual(
-            story.next_check_date,
-            (datetime.today() + timedelta(days=1)).strftime("%d/%m/%Y"),
-        )
+        self.assertEqual(story.last_success_date, datetime.today().strftime("%Y-%m-%d"))
+        next_check = datetime.fromisoformat(story.next_check_at)
+        self.assertGreaterEqual(next_check, before.replace(microsecond=0) + timedelta(days=1))
+        self.assertLessEqual(next_check, datetime.now() + timedelta(days=1))
+        self.assertEqual(story.next_check_date, next_check.strftime("%Y-%m-%d"))
+
+    def test_story_is_skipped_until_next_check_at(self):
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
+
+        story = runner.stories[0]
+        story.next_check_at = (datetime.now() + timedelta(hours=2)).isoformat(timespec="seconds")
+        self.assertEqual(story.get_skip_reason(), "not_due")
+        self.assertFalse(story.get_latest_chapter())
+
+        story.next_check_at = (datetime.now() - timedelta(minutes=1)).isoformat(timespec="seconds")
+        self.assertIsNone(story.get_skip_reason())
+
+    def test_legacy_next_check_date_is_honored(self):
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        tomorrow = datetime.today() + timedelta(days=1)
+        with runner.storage.transaction() as conn:
+            conn.execute(
+                "UPDATE stories SET next_check_date = ?, next_check_at = NULL",
+                (tomorrow.strftime("%d/%m/%Y"),),
+            )
+
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
+
+        self.assertEqual(runner.stories, [])
+        self.assertEqual(runner.queue_summary["skip_not_due"], 1)
+        with runner.storage.transaction() as conn:
+            next_check_at = conn.execute("SELECT next_check_at FROM stories").fetchone()["next_check_at"]
+        self.assertEqual(next_check_at, tomorrow.strftime("%Y-%m-%dT00:00:00"))
 
-    def test_active_story_is_not_skipped_by_next_check_date(self):
+    def test_failed_fetch_retries_sooner_than_success(self):
         runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
         runner.prepare()
 
         story = runner.stories[0]
-        story.latest_chapter_date = datetime.today().strftime("%d/%m/%Y")
-        story.last_check_date = datetime.today().strftime("%d/%m/%Y")
-        story.next_check_date = (datetime.today() + timedelta(days=1)).strftime("%d/%m/%Y")
+        with patch.object(story.provider, "get_story_info", side_effect=RuntimeError("boom")):
+            story.get_latest_chapter()
+
+        self.assertEqual(story.error_count, 1)
+        next_check = datetime.fromisoformat(story.next_check_at)
+        self.assertLess(next_check, datetime.now() + timedelta(hours=2))
+
+        runner.update_data()
+        with runner.storage.transaction() as conn:
+            row = conn.execute("SELECT next_check_at, error_count FROM stories").fetchone()
+        self.assertEqual(row["next_check_at"], story.next_check_at)
+        self.assertEqual(row["error_count"], 1)
 
-        self.assertFalse(story._should_skip_check())
+    def _write_stories(self, count: int):
+        stories = [{**self.sample_story, "id": f"story-{index}", "channel_id": index} for index in range(count)]
+        self.data_path.write_text(json.dumps(stories, ensure_ascii=False), encoding="utf-8")
 
-    def test_stale_story_skip_uses_last_check_plus_interval(self):
+    def test_prepare_loads_only_due_stories(self):
+        self._write_stories(3)
         runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
         runner.prepare()
+        later = (datetime.now() + timedelta(days=1)).isoformat(timespec="seconds")
+        for story in runner.stories[:2]:
+            story.next_check_at = later
+        runner.update_data()
+
+        runner.prepare()
+        self.assertEqual([s.id for s in runner.stories], ["story-2"])
+        self.assertEqual(runner.queue_summary["skip_not_due"], 2)
+
+        runner.update_data()
+        runner.prepare()
+        self.assertEqual(runner.queue_summary["total"], 3)
 
+    def test_story_with_error_is_loaded_before_next_check_at(self):
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
         story = runner.stories[0]
-        story.latest_chapter_date = (datetime.today() - timedelta(days=60)).strftime("%d/%m/%Y")
-        story.last_check_date = (datetime.today() - timedelta(days=1)).strftime("%d/%m/%Y")
-        story.next_check_date = "01/01/2000"
+        story.next_check_at = (datetime.now() + timedelta(days=1)).isoformat(timespec="seconds")
+        story.set_error(StoryError.SEND_DISCORD_GENERAL)
+        runner.update_data()
+
+        runner.prepare()
+        self.assertEqual([s.id for s in runner.stories], ["sample-story"])
+        self.assertEqual(runner.stories[0].next_check_at, story.next_check_at)
 
-        next_due = story._get_stale_next_due_date()
-        self.assertIsNotNone(next_due)
-        self.assertEqual(next_due.strftime("%d/%m/%Y"), (datetime.today() + timedelta(days=6)).strftime("%d/%m/%Y"))
-        self.assertTrue(story._should_skip_check())
+    def test_loading_leaves_error_backoff_of_unfetched_stories(self):
+        self._write_stories(3)
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
+        backoff = (datetime.now() + timedelta(hours=3)).isoformat(timespec="seconds")
+        runner.stories[0].next_check_at = backoff
+        runner.stories[0].set_error(StoryError.SEND_DISCORD_GENERAL)
+        for hours, story in zip((2, 1), runner.stories[1:]):
+            story.next_check_at = (datetime.now() - timedelta(hours=hours)).isoformat(timespec="seconds")
+        runner.update_data()
+
+        with patch("runner.get_config", side_effect=lambda path, default=None:
+                   2 if path == "common.max_stories_per_run" else get_config(path, default)):
+            runner.prepare()
+        self.assertEqual([s.id for s in runner.stories], ["story-1", "story-2"])
+        self.assertEqual(runner.queue_summary["skip_limit"], 1)
+
+        with patch("runner.get_config", side_effect=lambda path, default=None:
+                   False if path == "provider.truyenqqto.enabled" else get_config(path, default)):
+            runner.prepare()
+        self.assertEqual(runner.stories, [])
+
+        with runner.storage.transaction() as conn:
+            stored = conn.execute("SELECT next_check_at FROM stories WHERE id = 'story-0'").fetchone()[0]
+        self.assertEqual(stored, backoff)
+
+    def test_max_stories_per_run_loads_most_overdue_first(self):
+        self._write_stories(3)
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
+        for hours, story in zip((1, 3, 2), runner.stories):
+            story.next_check_at = (datetime.now() - timedelta(hours=hours)).isoformat(timespec="seconds")
+        runner.update_data()
+
+        with patch("runner.get_config", side_effect=lambda path, default=None:
+                   2 if path == "common.max_stories_per_run" else get_config(path, default)):
+            runner.prepare()
+
+        self.assertEqual([s.id for s in runner.stories], ["story-1", "story-2"])
+        self.assertEqual(runner.queue_summary["skip_limit"], 1)
+
+    def test_due_query_uses_next_check_index(self):
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        with runner.storage.transaction() as conn:
+            plan = " ".join(
+                row["detail"] for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT * FROM stories WHERE next_check_at <= ? ORDER BY next_check_at",
+                    (datetime.now().isoformat(),),
+                )
+            )
+        self.assertIn("idx_stories_next_check_at", plan)
+
+    def test_update_tracking_prunes_only_updated_channels(self):
+        self._write_stories(2)
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
+        with runner.storage.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO story_snapshots (channel_id, snapshot_date, chapter) VALUES (?, ?, ?)",
+                [(str(channel), f"day-{day}", day) for channel in (0, 1) for day in range(MAX_TRACKING_SNAPSHOTS + 5)],
+            )
+
+        runner.stories[0].is_new_chapter = True
+        runner.stories[0].last_chapter = 99
+        runner.update_tracking()
+
+        with runner.storage.transaction() as conn:
+            counts = dict(conn.execute("SELECT channel_id, COUNT(*) FROM story_snapshots GROUP BY channel_id"))
+            newest = conn.execute(
+                "SELECT chapter FROM story_snapshots WHERE channel_id = '0' ORDER BY id DESC LIMIT 1"
+            ).fetchone()[0]
+        self.assertEqual(counts, {"0": MAX_TRACKING_SNAPSHOTS, "1": MAX_TRACKING_SNAPSHOTS + 5})
+        self.assertEqual(newest, 99)
+
+    def test_tracking_json_migration_runs_once(self):
+        runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
+        runner.prepare()
+        with patch("runner.load_json_file", side_effect=FileNotFoundError) as load_json:
+            runner.update_tracking()
+            runner.update_tracking()
+
+        self.assertEqual(load_json.call_count, 1)
+        self.assertIsNotNone(runner._get_app_state(APP_STATE_TRACKING_MIGRATED))
 
     def test_update_data_skips_json_sync_when_under_3_days(self):
         runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
         runner.prepare()
-        runner._set_app_state(APP_STATE_LAST_JSON_SYNC, datetime.today().strftime("%d/%m/%Y"))
+        runner._set_app_state(APP_STATE_LAST_JSON_SYNC, datetime.today().strftime("%Y-%m-%d"))
 
         original_json = self.data_path.read_text(encoding="utf-8")
         runner.stories[0].last_chapter = 77
@@ -117,7 +306,7 @@ class TestRunnerStorage(unittest.TestCase):
     def test_update_data_syncs_json_when_due_3_days(self):
         runner = Runner(db_path=self.db_path, data_path=str(self.data_path))
         runner.prepare()
-        due_date = (datetime.today() - timedelta(days=3)).strftime("%d/%m/%Y")
+        due_date = (datetime.today() - timedelta(days=3)).strftime("%Y-%m-%d")
         runner._set_app_state(APP_STATE_LAST_JSON_SYNC, due_date)
 
         runner.stories[0].last_chapter = 88
@@ -125,7 +314,118 @@ class TestRunnerStorage(unittest.TestCase):
 
         exported = json.loads(self.data_path.read_text(encoding="utf-8"))
         self.assertEqual(exported[0]["last_chapter"], 88)
+        self.assertEqual(exported[0]["latest_chapter_date"], "01/05/2026")
         self.assertEqual(
             runner._get_app_state(APP_STATE_LAST_JSON_SYNC),
-            datetime.today().strftime("%d/%m/%Y"),
+            datetime.today().strftime("%Y-%m-%d"),
         )
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.storage = Storage(MEMORY_DB_PATH)
+
+    def tearDown(self):
+        self.storage.close()
+
+    def test_connection_is_reused_across_transactions(self):
+        with self.storage.transaction() as first:
+            pass
+        with self.storage.transaction() as second:
+            pass
+        self.assertIs(first, second)
+
+    def test_failed_transaction_is_rolled_back(self):
+        with self.assertRaises(RuntimeError):
+            with self.storage.transaction() as conn:
+                conn.execute("INSERT INTO app_state (key, value) VALUES ('k', 'v')")
+                raise RuntimeError("boom")
+
+        self.assertIsNone(self.storage.get_state("k"))
+
+    def test_pragmas_are_applied(self):
+        with self.storage.transaction() as conn:
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+            self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -DEFAULT_CACHE_SIZE_KIB)
+
+    def test_runner_runs_in_memory(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_path = Path(temp_dir) / "data.json"
+            data_path.write_text(json.dumps([{
+                "id": "memory-story", "title": "Memory", "source": "truyenqqto", "channel_id": 1,
+                "last_chapter": 1, "latest_chapter_date": "01/05/2026",
+            }]), encoding="utf-8")
+            runner = Runner(db_path=MEMORY_DB_PATH, data_path=str(data_path))
+            runner.prepare()
+
+        self.assertEqual([s.id for s in runner.stories], ["memory-story"])
+        runner.storage.close()
+
+
+class TestStorageMigrations(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "legacy.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        Storage._create_baseline_schema(conn)
+        conn.execute(
+            "INSERT INTO stories (id, title, source, channel_id, last_chapter, latest_chapter_date, "
+            "last_check_date, next_check_date) VALUES ('legacy', 'Legacy', 'truyenqqto', '1', 3, "
+            "'02/05/2026', '03/05/2026', 'not a date')"
+        )
+        conn.execute("INSERT INTO story_snapshots (channel_id, snapshot_date, chapter) VALUES ('1', '02/05/2026', 3)")
+        conn.execute(f"INSERT INTO app_state (key, value) VALUES ('{APP_STATE_LAST_JSON_SYNC}', '01/05/2026')")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _row(self, storage: Storage):
+        with storage.transaction() as conn:
+            return conn.execute("SELECT * FROM stories").fetchone()
+
+    def test_legacy_dates_are_converted_to_iso(self):
+        storage = Storage(self.db_path)
+        row = self._row(storage)
+
+        self.assertEqual(storage.schema_version, SCHEMA_VERSION)
+        self.assertEqual(row["latest_chapter_date"], "2026-05-02")
+        self.assertEqual(row["last_check_date"], "2026-05-03")
+        self.assertEqual(row["next_check_date"], "not a date")
+        self.assertEqual(storage.get_state(APP_STATE_LAST_JSON_SYNC), "2026-05-01")
+        with storage.transaction() as conn:
+            self.assertEqual(conn.execute("SELECT snapshot_date FROM story_snapshots").fetchone()[0], "2026-05-02")
+        storage.close()
+
+        reopened = Storage(self.db_path)
+        self.assertEqual(self._row(reopened)["latest_chapter_date"], "2026-05-02")
+        reopened.close()
+
+    def test_interrupted_migration_leaves_database_untouched(self):
+        def fail(conn):
+            raise RuntimeError("boom")
+
+        opened = []
+        real_connect = sqlite3.connect
+
+        def connect(*args, **kwargs):
+            opened.append(real_connect(*args, **kwargs))
+            return opened[-1]
+
+        migrations = [*storage_module.MIGRATIONS, fail]
+        with patch.object(storage_module, "MIGRATIONS", migrations), \
+                patch.object(storage_module, "SCHEMA_VERSION", len(migrations)), \
+                patch("runner.storage.sqlite3.connect", side_effect=connect):
+            with self.assertRaisesRegex(RuntimeError, "boom"):
+                Storage(self.db_path)
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            opened[0].execute("SELECT 1")
+        self.assertFalse(Path(self.db_path + "-wal").exists())
+
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], 0)
+        self.assertEqual(conn.execute("SELECT latest_chapter_date FROM stories").fetchone()[0], "02/05/2026")
+        conn.close()
@@ -1,18 +1,22 @@
 import unittest
 
-from models.story_info import StoryStatus
+from models.story_info import StoryRef, StoryStatus
 from providers.truyenqqto import TruyenQQTOProvider
+from utils.config import load_config_project
 
 class TestTruyenQQTOProvider(unittest.TestCase):
+    def setUp(self):
+        load_config_project()
+
     def test_fetches_latest_chapter_when_data_is_valid(self):
-        provider = TruyenQQTOProvider(id="ta-hoc-tram-than-trong-benh-vien-tam-than-15082", last_chapter=5)
-        story_info = provider.get_story_info()
+        provider = TruyenQQTOProvider()
+        story_info = provider.get_story_info(StoryRef("ta-hoc-tram-than-trong-benh-vien-tam-than-15082", last_chapter=5))
         self.assertGreater(story_info.latest_chapter, 5)
         self.assertIsNotNone(story_info.latest_chapter_date)
 
     def test_completed_status_when_story_is_finished(self):
-        provider = TruyenQQTOProvider(id="multiverse-no-watashi-koishite-ii-desu-ka-16000", last_chapter=9)
-        story_info = provider.get_story_info()
+        provider = TruyenQQTOProvider()
+        story_info = provider.get_story_info(StoryRef("multiverse-no-watashi-koishite-ii-desu-ka-16000", last_chapter=9))
         self.assertGreaterEqual(story_info.latest_chapter, 10)
         self.assertIsNotNone(story_info.latest_chapter_date)
         self.assertEqual(story_info.status, StoryStatus.COMPLETED)
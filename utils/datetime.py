@@ -1,7 +1,50 @@
 import re
 from datetime import date, timedelta, datetime
+from typing import Optional
+
 from dateutil.relativedelta import relativedelta
 
+# Dates are stored as ISO `YYYY-MM-DD`, which SQLite can index, order and compare. Sources, Discord messages
+# and data.json use `dd/mm/yyyy`; convert at those edges only.
+ISO_DATE_FORMAT = "%Y-%m-%d"
+DISPLAY_DATE_FORMAT = "%d/%m/%Y"
+DISPLAY_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})$")
+ISO_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})$")
+
+
+def to_iso_date(value: Optional[str]) -> Optional[str]:
+    """
+        Converts a 'dd/mm/yyyy' date to the stored 'YYYY-MM-DD' format.
+
+        Args:
+            value (Optional[str]): e.g. '05/10/2023', as scraped or written in data.json.
+
+        Returns:
+            Optional[str]: '2023-10-05'. ISO dates, empty and unrecognised values are returned unchanged.
+    """
+    match = DISPLAY_DATE_RE.match(value) if value else None
+    if not match:
+        return value
+    day, month, year = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def to_display_date(value: Optional[str]) -> Optional[str]:
+    """
+        Converts a stored 'YYYY-MM-DD' date to 'dd/mm/yyyy' for messages and data.json.
+
+        Args:
+            value (Optional[str]): e.g. '2023-10-05'.
+
+        Returns:
+            Optional[str]: '05/10/2023'. Other values are returned unchanged.
+    """
+    match = ISO_DATE_RE.match(value) if value else None
+    if not match:
+        return value
+    year, month, day = match.groups()
+    return f"{day}/{month}/{year}"
+
 def iso_to_ddmmyyyy(iso_date: str) -> str:
     """
         Converts an ISO 8601 date string to the format 'dd/mm/yyyy'.
@@ -63,3 +106,59 @@ def get_time_now_format() -> str:
     """
     now = datetime.now()
     return now.strftime("%H:%M - %d/%m/%Y")
+
+
+RELATIVE_TIME_UNITS = {
+    "giây": timedelta(seconds=1),
+    "phút": timedelta(minutes=1),
+    "giờ": timedelta(hours=1),
+    "ngày": timedelta(days=1),
+    "tuần": timedelta(weeks=1),
+    "tháng": timedelta(days=30),
+    "năm": timedelta(days=365),
+}
+
+
+def parse_update_time(raw_text: str, now: datetime | None = None) -> datetime | None:
+    """
+    Parses the update time shown on listing pages into the latest moment it can stand for.
+
+    Relative times are coarse ("2 giờ trước" means anywhere between 2 and 3 hours ago),
+    so the newest possible time is returned. Comparing it with a cut-off therefore never
+    drops an entry that might be newer than the cut-off.
+
+    Args:
+        raw_text (str): e.g. '5 phút trước', '2 ngày trước', '14:05 20/05', '20/05/2026'.
+        now (datetime | None): Reference time, defaults to `datetime.now()`.
+
+    Returns:
+        datetime | None: The newest datetime the text can mean, or None if it is not recognised.
+    """
+    now = now or datetime.now()
+    text = raw_text.lower().strip()
+
+    match_relative = re.match(r"(\d+)\s+(giây|phút|giờ|ngày|tuần|tháng|năm)\s+trước", text)
+    if match_relative:
+        amount = int(match_relative.group(1))
+        unit = RELATIVE_TIME_UNITS[match_relative.group(2)]
+        return now - unit * amount + unit
+
+    match_time_day = re.match(r"(\d{1,2}):(\d{2})\s+(\d{1,2})/(\d{1,2})$", text)
+    if match_time_day:
+        hour, minute, day, month = (int(part) for part in match_time_day.groups())
+        try:
+            value = datetime(now.year, month, day, hour, minute)
+        except ValueError:
+            # Impossible date or time, e.g. 31/04, or 29/02 outside a leap year.
+            return None
+        return value if value <= now else value - relativedelta(years=1)
+
+    match_date = re.match(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})$", text)
+    if match_date:
+        day, month, year = (int(part) for part in match_date.groups())
+        try:
+            return datetime(year, month, day) + timedelta(days=1)
+        except ValueError:
+            return None
+
+    return None
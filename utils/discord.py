@@ -1,8 +1,23 @@
 import os
+import threading
+import time
 import requests
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
 from functools import wraps
 
+from requests.adapters import HTTPAdapter
+
+from utils.transport import mount_transport
+
+MESSAGE_ROUTE = "POST /channels/{channel_id}/messages"
+# A 429 is retried after the wait Discord asks for, at most this many times per message.
+MAX_RATE_LIMIT_RETRIES = 3
+DEFAULT_MAX_CONNECTIONS = 10
+# Discord rejects message `content` longer than this many characters.
+MESSAGE_CHAR_LIMIT = 2000
+
+
 def require_token(func):
     @wraps(func)
     def wrapper(self, *args, **kwargs):
@@ -11,24 +26,162 @@ def require_token(func):
         return func(self, *args, **kwargs)
     return wrapper
 
+
+@dataclass
+class BucketState:
+    remaining: int
+    reset_at: float
+
+
+class RateLimitBuckets:
+    def __init__(self):
+        """
+        Tracks Discord's rate limit buckets from the `X-RateLimit-*` headers of each response.
+
+        Discord shares one bucket between the routes that return the same `X-RateLimit-Bucket` hash, and
+        splits it per major parameter (the channel ID for message routes). A request only waits when its
+        bucket has no request left before `X-RateLimit-Reset-After`, or while a global limit is active.
+        """
+        self._lock = threading.Lock()
+        self._route_buckets: Dict[str, str] = {}
+        self._states: Dict[Tuple[str, str], BucketState] = {}
+        self._global_reset_at = 0.0
+
+    def _key(self, route: str, major: str) -> Tuple[str, str]:
+        return self._route_buckets.get(route, route), major
+
+    def acquire(self, route: str, major: str):
+        """
+        Blocks until a request on `route` for `major` may be sent, and reserves it in the bucket.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._global_reset_at - now
+                state = self._states.get(self._key(route, major))
+                if state is not None and state.reset_at <= now:
+                    state = None
+                    self._states.pop(self._key(route, major), None)
+                if state is not None and state.remaining <= 0:
+                    delay = max(delay, state.reset_at - now)
+                if delay <= 0:
+                    if state is not None:
+                        state.remaining -= 1
+                    return
+            time.sleep(delay)
+
+    def update(self, route: str, major: str, res: requests.Response):
+        """
+        Records the bucket state carried by a response, including the wait requested by a 429.
+        """
+        headers = res.headers
+        now = time.monotonic()
+        with self._lock:
+            bucket = headers.get("X-RateLimit-Bucket")
+            if bucket:
+                self._route_buckets[route] = bucket
+            key = self._key(route, major)
+
+            if res.status_code == 429:
+                retry_after = _retry_after(res)
+                if headers.get("X-RateLimit-Global") or headers.get("X-RateLimit-Scope") == "global":
+                    self._global_reset_at = max(self._global_reset_at, now + retry_after)
+                else:
+                    self._states[key] = BucketState(0, now + retry_after)
+                return
+
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset_after = headers.get("X-RateLimit-Reset-After")
+            if remaining is not None and reset_after is not None:
+                self._states[key] = BucketState(int(remaining), now + float(reset_after))
+
+
+def _retry_after(res: requests.Response) -> float:
+    try:
+        return float(res.json().get("retry_after"))
+    except (ValueError, TypeError, AttributeError):
+        return float(res.headers.get("Retry-After", 1))
+
+
+def _split_line(line: str, width: int) -> List[str]:
+    # Cuts at the last space of the second half of the window when there is one, so words stay whole.
+    pieces = []
+    while len(line) > width:
+        cut = line.rfind(" ", width // 2, width + 1)
+        if cut <= 0:
+            cut = width
+        pieces.append(line[:cut])
+        line = line[cut:].lstrip(" ")
+    pieces.append(line)
+    return pieces
+
+
+def pack_lines(lines: List[str], header: str = "", limit: int = MESSAGE_CHAR_LIMIT) -> List[Tuple[str, List[int]]]:
+    """
+    Packs lines, in order, into as few messages as possible under Discord's content limit.
+
+    The header opens the first message. A line too long to follow the header is first split into
+    pieces that do, each carrying the line's index, so no message is ever cut.
+
+    Args:
+        lines (List[str]): The lines to send, already in display order.
+        header (str): Text placed before the lines of the first message.
+        limit (int): Maximum characters per message.
+
+    Returns:
+        List[Tuple[str, List[int]]]: Each message with the indexes of the lines it carries.
+    """
+    messages: List[Tuple[str, List[int]]] = []
+    parts: List[str] = [header] if header else []
+    indexes: List[int] = []
+    length = len(header)
+    width = max(limit - len(header) - 1 if header else limit, 1)
+    pieces = [(index, piece) for index, line in enumerate(lines) for piece in _split_line(line, width)]
+
+    for index, line in pieces:
+        added = len(line) + (1 if parts else 0)
+        if indexes and length + added > limit:
+            messages.append(("\n".join(parts), indexes))
+            parts, indexes, length = [], [], 0
+            added = len(line)
+        parts.append(line)
+        if not indexes or indexes[-1] != index:
+            indexes.append(index)
+        length += added
+
+    if indexes:
+        messages.append(("\n".join(parts), indexes))
+    return messages
+
+
 class DiscordClient:
     BASE_URL = "https://discord.com/api/v10"
 
-    def __init__(self, bot_token: str | None = None) -> None:
+    def __init__(self, bot_token: str | None = None, max_connections: int = DEFAULT_MAX_CONNECTIONS) -> None:
         self.token: str = bot_token or os.getenv("DISCORD_BOT_TOKEN", "")
         self.session = requests.Session()
+        # One pooled connection per concurrent sender, see `discord.send_concurrency`.
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max_connections))
+        # `[http] transport = "replay"` serves recorded responses, so any placeholder token works.
+        mount_transport(self.session, "discord")
         self.session.headers.update({"Content-Type": "application/json"})
         if self.token:
             self.session.headers["Authorization"] = f"Bot {self.token}"
+        self.rate_limits = RateLimitBuckets()
 
     @require_token
-    def send_message(self, channel_id: int | str, content: str) -> Any:
+    def send_message(self, channel_id: int | str, content: str, nonce: str | None = None) -> Any:
         """
         Sends a message to a specified Discord channel.
 
+        Waits only when the channel's rate limit bucket is exhausted, and retries a 429 after the
+        `retry_after` Discord returns. Safe to call from several threads at once.
+
         Args:
             channel_id (int | str): The ID of the Discord channel where the message will be sent.
             content (str): The content of the message to be sent.
+            nonce (str | None): Optional unique nonce (max 25 characters). Discord then returns the
+                message already created with that nonce instead of posting it twice.
 
         Returns:
             Any: The JSON response from the Discord API containing details of the sent message.
@@ -37,7 +190,17 @@ class DiscordClient:
             requests.exceptions.HTTPError: If the HTTP request to the Discord API fails.
         """
         url = f"{self.BASE_URL}/channels/{channel_id}/messages"
-        resp = self.session.post(url, json={"content": content}, timeout=20)
+        major = str(channel_id)
+        payload = {"content": content}
+        if nonce:
+            payload.update({"nonce": nonce, "enforce_nonce": True})
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.rate_limits.acquire(MESSAGE_ROUTE, major)
+            resp = self.session.post(url, json=payload, timeout=20)
+            self.rate_limits.update(MESSAGE_ROUTE, major, resp)
+            if resp.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+
         try:
             resp.raise_for_status()
         except requests.exceptions.HTTPError:
@@ -47,4 +210,4 @@ class DiscordClient:
         return resp.json()
 
     def close(self) -> None:
-        self.session.close()
\ No newline at end of file
+        self.session.close()
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+EXPORT_PROMETHEUS = "prometheus"
+EXPORT_JSON = "json"
+PROMETHEUS_METRIC = "novelnow_phase_duration_ms"
+
+
+class PhaseSample(NamedTuple):
+    run_id: Optional[str]
+    provider: Optional[str]
+    story_id: Optional[str]
+    phase: str
+    duration_ms: float
+
+
+class PhaseMetrics:
+    def __init__(self):
+        """
+            Collects how long each phase of a run takes, per provider and per story.
+
+            Phases recorded by the pipeline: `ttfb` (request sent to response headers, connection setup
+            included), `download` (reading the body), `parse` (building the tree and extracting the info),
+            `schedule`, `fetch` (the whole story), `sqlite_*` writes and `discord_send`. Samples are
+            tagged with the run they belong to and written to `run_metrics` by the Runner.
+        """
+        self._lock = threading.Lock()
+        self._samples: List[PhaseSample] = []
+        self.run_id: Optional[str] = None
+        self.enabled = True
+
+    def start_run(self, run_id: str) -> None:
+        self.run_id = run_id
+
+    def record(self, phase: str, duration_ms: float, provider: Optional[str] = None,
+               story_id: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        sample = PhaseSample(self.run_id, provider, None if story_id is None else str(story_id), phase, duration_ms)
+        with self._lock:
+            self._samples.append(sample)
+
+    @contextmanager
+    def timed(self, phase: str, provider: Optional[str] = None, story_id: Optional[str] = None) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, (time.perf_counter() - started) * 1000, provider, story_id)
+
+    def pop_samples(self) -> List[PhaseSample]:
+        with self._lock:
+            samples, self._samples = self._samples, []
+        return samples
+
+
+phase_metrics = PhaseMetrics()
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[PhaseSample]) -> Dict[Tuple[str, str], Dict[str, float]]:
+    """
+        Aggregates samples per `(provider, phase)`.
+
+        Returns:
+            Dict[Tuple[str, str], Dict[str, float]]: `count`, `sum_ms`, `p50_ms` and `p95_ms`; runner-wide
+            phases are listed under the provider "runner".
+    """
+    durations: Dict[Tuple[str, str], List[float]] = {}
+    for sample in samples:
+        durations.setdefault((sample.provider or "runner", sample.phase), []).append(sample.duration_ms)
+
+    summary = {}
+    for key, values in sorted(durations.items()):
+        values.sort()
+        summary[key] = {
+            "count": len(values),
+            "sum_ms": round(sum(values), 3),
+            "p50_ms": round(_percentile(values, 50), 3),
+            "p95_ms": round(_percentile(values, 95), 3),
+        }
+    return summary
+
+
+def to_prometheus(summary: Dict[Tuple[str, str], Dict[str, float]]) -> str:
+    lines = [
+        f"# HELP {PROMETHEUS_METRIC} Duration of each pipeline phase in the last run, per provider.",
+        f"# TYPE {PROMETHEUS_METRIC} summary",
+    ]
+    for (provider, phase), stats in summary.items():
+        labels = f'provider="{provider}",phase="{phase}"'
+        lines.append(f'{PROMETHEUS_METRIC}{{{labels},quantile="0.5"}} {stats["p50_ms"]}')
+        lines.append(f'{PROMETHEUS_METRIC}{{{labels},quantile="0.95"}} {stats["p95_ms"]}')
+        lines.append(f"{PROMETHEUS_METRIC}_sum{{{labels}}} {stats['sum_ms']}")
+        lines.append(f"{PROMETHEUS_METRIC}_count{{{labels}}} {stats['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json(summary: Dict[Tuple[str, str], Dict[str, float]], run_id: Optional[str]) -> str:
+    providers: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (provider, phase), stats in summary.items():
+        providers.setdefault(provider, {})[phase] = stats
+    return json.dumps({"run_id": run_id, "providers": providers}, ensure_ascii=False, indent=2) + "\n"
+
+
+def write_export(path: str, export_format: str, summary: Dict[Tuple[str, str], Dict[str, float]],
+                 run_id: Optional[str]) -> None:
+    """
+        Writes the summary for a Prometheus textfile collector or as JSON. The file is replaced atomically,
+        so a scraper never reads a half-written file.
+    """
+    if export_format == EXPORT_PROMETHEUS:
+        text = to_prometheus(summary)
+    elif export_format == EXPORT_JSON:
+        text = to_json(summary, run_id)
+    else:
+        raise ValueError(f"Unknown metrics.export_format: {export_format}")
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, target)
@@ -0,0 +1,193 @@
+import base64
+import io
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from utils.config import get_config
+
+TRANSPORT_LIVE = "live"
+TRANSPORT_RECORD = "record"
+TRANSPORT_REPLAY = "replay"
+DEFAULT_CASSETTE_DIR = "cassettes"
+# Headers describing the wire encoding; cassettes keep the decoded body, so they are dropped.
+WIRE_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+class Cassette:
+    def __init__(self, path: Path, load: bool = True):
+        """
+            Recorded HTTP exchanges of one session, stored as JSON.
+
+            Responses are replayed per `METHOD url` in the order they were recorded; once a key runs out,
+            its last response keeps being served. Request headers are never stored, so a cassette holds
+            no token or cookie.
+
+            Args:
+                path (Path): The cassette file.
+                load (bool): Read the exchanges already in the file (replay). A recording starts empty.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._interactions: List[dict] = []
+        self._responses: Dict[str, List[dict]] = defaultdict(list)
+        self._played: Dict[str, int] = defaultdict(int)
+        if load and path.is_file():
+            for interaction in json.loads(path.read_text(encoding="utf-8"))["interactions"]:
+                self._add(interaction)
+
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return f"{method.upper()} {url}"
+
+    def _add(self, interaction: dict):
+        self._interactions.append(interaction)
+        request = interaction["request"]
+        self._responses[self.key(request["method"], request["url"])].append(interaction["response"])
+
+    def record(self, request: requests.PreparedRequest, status: int, headers: Dict[str, str], body: bytes,
+               elapsed_ms: float) -> dict:
+        try:
+            text, encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(body).decode("ascii"), "base64"
+        request_body = request.body.decode("utf-8") if isinstance(request.body, bytes) else request.body
+        response = {
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in WIRE_HEADERS},
+            "body": text,
+            "encoding": encoding,
+            "elapsed_ms": round(elapsed_ms, 1),
+        }
+        with self._lock:
+            self._add({
+                "request": {"method": request.method, "url": request.url, "body": request_body},
+                "response": response,
+            })
+        return response
+
+    def play(self, method: str, url: str) -> Optional[dict]:
+        key = self.key(method, url)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                return None
+            index = min(self._played[key], len(responses) - 1)
+            self._played[key] += 1
+            return responses[index]
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            data = {"interactions": self._interactions}
+            self.path.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def _response_body(response: dict) -> bytes:
+    if response.get("encoding") == "base64":
+        return base64.b64decode(response["body"])
+    return response["body"].encode("utf-8")
+
+
+class CassetteAdapter(HTTPAdapter):
+    def __init__(self, cassette: Cassette, mode: str, inner: Optional[HTTPAdapter] = None,
+                 latency_scale: float = 1.0):
+        """
+            Transport adapter that records exchanges into a cassette or replays them without network.
+
+            In `record` mode requests go through `inner` (the session's own adapter, with its retry policy)
+            and each response is read in full and saved. In `replay` mode the recorded response is served
+            after its recorded latency times `latency_scale`; a request that was never recorded fails like
+            a refused connection. Both modes hand back a response built from the cassette data, so
+            streamed reads behave the same way.
+
+            Args:
+                cassette (Cassette): Where exchanges are stored.
+                mode (str): `record` or `replay`.
+                inner (Optional[HTTPAdapter]): Adapter that sends requests while recording.
+                latency_scale (float): Multiplier of the recorded latency on replay; 0 replays instantly.
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner or HTTPAdapter()
+        self.latency_scale = latency_scale
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout=None, verify=True, cert=None,
+             proxies=None) -> requests.Response:
+        if self.mode == TRANSPORT_RECORD:
+            started = time.monotonic()
+            res = self.inner.send(request, stream=False, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+            elapsed_ms = (time.monotonic() - started) * 1000
+            recorded = self.cassette.record(request, res.status_code, dict(res.headers), res.content, elapsed_ms)
+        else:
+            recorded = self.cassette.play(request.method, request.url)
+            if recorded is None:
+                raise requests.ConnectionError(f"No recorded response for {request.method} {request.url}",
+                                               request=request)
+            time.sleep(recorded.get("elapsed_ms", 0) / 1000 * self.latency_scale)
+        return self._build(request, recorded)
+
+    def _build(self, request: requests.PreparedRequest, recorded: dict) -> requests.Response:
+        body = _response_body(recorded)
+        headers = {**recorded["headers"], "Content-Length": str(len(body))}
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=recorded["status"],
+            preload_content=False,
+            decode_content=False,
+            request_url=request.url,
+        )
+        return self.build_response(request, raw)
+
+    def close(self):
+        if self.mode == TRANSPORT_RECORD:
+            self.cassette.save()
+        self.inner.close()
+        super().close()
+
+
+def transport_mode() -> str:
+    try:
+        return get_config("http.transport", TRANSPORT_LIVE) or TRANSPORT_LIVE
+    except RuntimeError:
+        return TRANSPORT_LIVE
+
+
+def mount_transport(session: requests.Session, name: str) -> requests.Session:
+    """
+        Puts the `[http] transport` in front of a session: `live` (default) leaves it untouched,
+        `record` / `replay` use the cassette `<cassette_dir>/<name>.json`.
+
+        Args:
+            session (requests.Session): A provider session or the Discord client session.
+            name (str): Cassette name, e.g. the provider name or "discord".
+
+        Returns:
+            requests.Session: The same session.
+    """
+    mode = transport_mode()
+    if mode == TRANSPORT_LIVE:
+        return session
+    if mode not in (TRANSPORT_RECORD, TRANSPORT_REPLAY):
+        raise ValueError(f"Unknown http.transport: {mode}")
+
+    path = Path(get_config("http.cassette_dir", DEFAULT_CASSETTE_DIR)) / f"{name}.json"
+    cassette = Cassette(path, load=mode == TRANSPORT_REPLAY)
+    adapter = CassetteAdapter(
+        cassette,
+        mode,
+        inner=session.get_adapter("https://"),
+        latency_scale=get_config("http.replay_latency_scale", 1.0),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session